@@ -1,11 +1,4 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import psycopg2
-from dotenv import load_dotenv
-import os
-from sqlalchemy import create_engine, text
 
 # Configuração inicial
 st.set_page_config(page_title="Análise COVID", layout="wide")
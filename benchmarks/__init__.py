@@ -0,0 +1 @@
+"""Benchmarks do pipeline PNAD-COVID (rodados à parte, contra serviços locais)."""
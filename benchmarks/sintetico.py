@@ -0,0 +1,155 @@
+"""Microdados sintéticos da PNAD-COVID para os benchmarks.
+
+Gera linhas no formato dos CSVs do IBGE (mesmas colunas de
+``fontes.COLUNAS_INGESTAO``) com os domínios de código dos dicionários de
+``pipeline.mapeamentos``: respostas fora do dicionário e nulos (perguntas
+puladas) aparecem na proporção configurada, e UPA, estrato e peso seguem um
+desenho amostral simples (estratos dentro da UF, UPAs dentro do estrato).
+Os lotes são gerados sob demanda, então escalas de dezenas de milhões de
+linhas não precisam caber em memória.
+"""
+
+import io
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import numpy as np
+import pandas as pd
+
+from pipeline.fontes import COLUNAS_INGESTAO, NOMES_ORIGEM
+from pipeline.mapeamentos import COLUNAS_GOLD, MAPEAMENTO_MORADIA, MAPEAMENTOS_GOLD
+
+CAMINHO_CODIGO_UF = Path('covid') / 'codigo_uf.csv'
+
+LINHAS_POR_LOTE = 1_000_000
+MESES = (7, 8, 9)
+
+# Proporção de respostas nulas (pergunta pulada) e fora do dicionário (ex.: 9 = ignorado)
+PROPORCAO_NULOS = 0.2
+PROPORCAO_INVALIDOS = 0.02
+CODIGO_INVALIDO = 9
+
+# Desenho amostral sintético: estratos por UF e UPAs por estrato
+ESTRATOS_POR_UF = 20
+UPAS_POR_ESTRATO = 20
+
+# Domínios que não estão em MAPEAMENTOS_GOLD (variáveis de identificação e numéricas ficam em _column)
+DOMINIOS_EXTRAS = {
+    'F001': list(MAPEAMENTO_MORADIA),
+    'A006': [1, 2],
+    'V1012': [1, 2, 3, 4],
+}
+
+# Colunas que nunca são nulas nos microdados
+COLUNAS_OBRIGATORIAS = {'Ano', 'V1013', 'V1012', 'UF', 'UPA', 'Estrato', 'posest', 'V1008', 'A001',
+                        'V1032', 'A002', 'A003', 'A004'}
+
+
+def load_uf_table(caminho=CAMINHO_CODIGO_UF) -> pd.DataFrame:
+    """Tabela de UFs (``Código, UF, Sigla, Região``) usada no merge da Silver."""
+    return pd.read_csv(caminho, sep=",")
+
+
+def source_domains() -> dict:
+    """``{coluna dos microdados: [códigos válidos]}`` a partir dos dicionários da Gold."""
+    origem_para_silver = {valor: chave for chave, valor in NOMES_ORIGEM.items()}
+    dominios = {}
+    for coluna in COLUNAS_INGESTAO:
+        silver = origem_para_silver.get(coluna, coluna.lower())
+        mapeamento = MAPEAMENTOS_GOLD.get(COLUNAS_GOLD.get(silver, silver))
+        if mapeamento:
+            dominios[coluna] = list(mapeamento)
+    dominios.update(DOMINIOS_EXTRAS)
+    return dominios
+
+
+def _with_gaps(valores: np.ndarray, rng, proporcao_nulos: float, proporcao_invalidos: float) -> pd.Series:
+    """Troca uma fração dos valores por código inválido e outra por nulo."""
+    serie = pd.Series(valores, dtype='Int64')
+    sorteio = rng.random(len(valores))
+    serie[sorteio < proporcao_invalidos] = CODIGO_INVALIDO
+    serie[(sorteio >= proporcao_invalidos) & (sorteio < proporcao_invalidos + proporcao_nulos)] = pd.NA
+    return serie
+
+
+def synthetic_microdata(linhas: int, mes: int, rng, codigos_uf: np.ndarray, dominios: dict = None,
+                        proporcao_nulos: float = PROPORCAO_NULOS,
+                        proporcao_invalidos: float = PROPORCAO_INVALIDOS) -> pd.DataFrame:
+    """Um lote de ``linhas`` entrevistas do mês ``mes``, com as colunas de ``COLUNAS_INGESTAO``."""
+    dominios = source_domains() if dominios is None else dominios
+    uf = rng.choice(codigos_uf, linhas)
+    indice_upa = rng.integers(0, ESTRATOS_POR_UF * UPAS_POR_ESTRATO, linhas)
+    estrato = uf * 10_000 + indice_upa // UPAS_POR_ESTRATO
+    capital = rng.random(linhas) < 0.3
+
+    especiais = {
+        'Ano': np.full(linhas, 2020),
+        'V1013': np.full(linhas, mes),
+        'UF': uf,
+        'UPA': uf.astype('int64') * 10_000_000 + indice_upa,
+        'Estrato': estrato,
+        'posest': uf * 100 + indice_upa // (2 * UPAS_POR_ESTRATO) + 1,
+        'V1008': rng.integers(1, 15, linhas),
+        'A001': rng.integers(1, 9, linhas),
+        'A002': rng.integers(0, 100, linhas),
+        'V1032': np.round(rng.lognormal(np.log(250), 0.6, linhas), 6),
+        'CAPITAL': np.where(capital, uf, -1),
+        'RM_RIDE': np.where(capital & (rng.random(linhas) < 0.5), uf, -1),
+    }
+
+    dados = {}
+    for coluna in COLUNAS_INGESTAO:
+        if coluna in especiais:
+            valores = especiais[coluna]
+            if coluna == 'V1032':
+                dados[coluna] = valores
+            elif coluna in ('CAPITAL', 'RM_RIDE'):
+                dados[coluna] = pd.Series(valores, dtype='Int64').mask(valores < 0)
+            else:
+                dados[coluna] = pd.Series(valores, dtype='Int64')
+            continue
+        valores = rng.choice(dominios.get(coluna, list(range(1, 10))), linhas)
+        if coluna in COLUNAS_OBRIGATORIAS:
+            dados[coluna] = pd.Series(valores, dtype='Int64')
+        else:
+            dados[coluna] = _with_gaps(valores, rng, proporcao_nulos, proporcao_invalidos)
+    return pd.DataFrame(dados)
+
+
+def iter_synthetic_microdata(linhas: int, meses: tuple = MESES, seed: int = 0,
+                             linhas_por_lote: int = LINHAS_POR_LOTE, df_uf: pd.DataFrame = None):
+    """Gera ``(mes, lote)`` até somar ``linhas``, divididas igualmente entre os ``meses``."""
+    rng = np.random.default_rng(seed)
+    df_uf = load_uf_table() if df_uf is None else df_uf
+    codigos_uf = df_uf['Código'].to_numpy()
+    dominios = source_domains()
+    por_mes = np.diff(np.linspace(0, linhas, len(meses) + 1).astype(int))
+    for mes, total in zip(meses, por_mes):
+        for inicio in range(0, total, linhas_por_lote):
+            yield mes, synthetic_microdata(min(linhas_por_lote, total - inicio), mes, rng, codigos_uf, dominios)
+
+
+def write_synthetic_zips(diretorio, linhas: int, meses: tuple = MESES, seed: int = 0,
+                         linhas_por_lote: int = LINHAS_POR_LOTE) -> list:
+    """Grava um ZIP por mês (``PNAD_COVID_<mm>2020.zip``, um CSV dentro) como os do IBGE e devolve os caminhos."""
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminhos = {}
+    abertos = {}
+    try:
+        for mes, lote in iter_synthetic_microdata(linhas, meses, seed, linhas_por_lote):
+            if mes not in abertos:
+                caminho = diretorio / f"PNAD_COVID_{mes:02d}2020.zip"
+                zip_file = ZipFile(caminho, 'w', ZIP_DEFLATED)
+                csv = io.TextIOWrapper(zip_file.open(f"PNAD_COVID_{mes:02d}2020.csv", 'w', force_zip64=True),
+                                       encoding='utf-8', newline='')
+                abertos[mes] = (zip_file, csv, True)
+                caminhos[mes] = caminho
+            zip_file, csv, cabecalho = abertos[mes]
+            lote.to_csv(csv, index=False, header=cabecalho)
+            abertos[mes] = (zip_file, csv, False)
+    finally:
+        for zip_file, csv, _ in abertos.values():
+            csv.close()
+            zip_file.close()
+    return [caminhos[mes] for mes in meses if mes in caminhos]
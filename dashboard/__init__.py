@@ -0,0 +1 @@
+"""Módulos de apoio do dashboard Streamlit (cache, gráficos e artefatos)."""
@@ -0,0 +1,97 @@
+"""Pré-renderização dos gráficos do dashboard em artefatos estáticos.
+
+Uma vez por versão dos dados, todos os gráficos são renderizados e gravados
+em um diretório endereçado por conteúdo (o nome do arquivo é o hash SHA-256
+da imagem). Um manifesto por versão aponta para os arquivos e ``atual.json``
+aponta para a última versão publicada. No modo ``artefatos`` a página apenas
+serve esses arquivos, sem consultar o banco nem desenhar nada.
+
+Uso (com as variáveis ``POSTGRES_*_PNAD`` do ``.env``)::
+
+    python -m dashboard.artefatos
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from dashboard.graficos import GRAFICOS, render_image, sem_dados
+
+DIRETORIO_ARTEFATOS = Path('artefatos') / 'graficos'
+MANIFESTO_ATUAL = 'atual.json'
+
+
+def _gravar_atomico(caminho: Path, conteudo: bytes):
+    """Grava em arquivo temporário e troca de uma vez, para nunca servir arquivo pela metade."""
+    tmp = caminho.with_name(f".{caminho.name}.tmp")
+    tmp.write_bytes(conteudo)
+    os.replace(tmp, caminho)
+
+
+def render_artifacts(distribuicoes: dict, versao: str, diretorio=DIRETORIO_ARTEFATOS, formato: str = 'png') -> dict:
+    """Renderiza todos os gráficos de ``distribuicoes`` e publica o manifesto de ``versao``."""
+    diretorio = Path(diretorio)
+    (diretorio / 'versoes').mkdir(parents=True, exist_ok=True)
+
+    graficos = {}
+    for chave in GRAFICOS:
+        valor = distribuicoes[chave]
+        imagem = render_image(valor, chave, formato)
+        nome = f"{hashlib.sha256(imagem).hexdigest()[:16]}.{formato}"
+        caminho = diretorio / nome
+        # Conteúdo idêntico gera o mesmo nome: gráficos que não mudaram entre versões são reaproveitados
+        if not caminho.exists():
+            _gravar_atomico(caminho, imagem)
+        graficos[chave] = {'arquivo': nome, 'sem_dados': bool(sem_dados(valor))}
+
+    manifesto = {
+        'versao': versao,
+        'total': distribuicoes['total'],
+        'gerado_em': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'graficos': graficos,
+    }
+    conteudo = json.dumps(manifesto, ensure_ascii=False, indent=2).encode('utf-8')
+    _gravar_atomico(diretorio / 'versoes' / f"{versao}.json", conteudo)
+    _gravar_atomico(diretorio / MANIFESTO_ATUAL, conteudo)
+    return manifesto
+
+
+def load_manifest(diretorio=DIRETORIO_ARTEFATOS, versao: str = None):
+    """Lê o manifesto de ``versao`` (ou o atual); retorna ``None`` se não existir."""
+    diretorio = Path(diretorio)
+    caminho = diretorio / 'versoes' / f"{versao}.json" if versao else diretorio / MANIFESTO_ATUAL
+    if not caminho.exists():
+        return None
+    return json.loads(caminho.read_text(encoding='utf-8'))
+
+
+def artifact_path(manifesto: dict, chave: str, diretorio=DIRETORIO_ARTEFATOS) -> Path:
+    """Caminho do arquivo do gráfico ``chave`` descrito no manifesto."""
+    return Path(diretorio) / manifesto['graficos'][chave]['arquivo']
+
+
+def main():
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    from pipeline.consultas import load_distributions
+    from pipeline.versao import read_data_version
+
+    load_dotenv()
+    engine = create_engine(
+        f"postgresql+psycopg2://{os.getenv('POSTGRES_USER_PNAD')}:{os.getenv('POSTGRES_PASSWORD_PNAD')}"
+        f"@{os.getenv('POSTGRES_HOST_PNAD')}:{os.getenv('POSTGRES_PORT_PNAD')}/{os.getenv('POSTGRES_DB_PNAD')}"
+    )
+    with engine.connect() as conn:
+        versao = read_data_version(conn)
+        if load_manifest(versao=versao) is not None:
+            print(f"➡️  Gráficos da versão {versao} já renderizados")
+            return
+        manifesto = render_artifacts(load_distributions(conn), versao)
+    print(f"✅ {len(manifesto['graficos'])} gráficos renderizados em {DIRETORIO_ARTEFATOS} (versão {versao})")
+
+
+if __name__ == '__main__':
+    main()
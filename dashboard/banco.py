@@ -0,0 +1,61 @@
+"""Acesso ao RDS compartilhado pelas páginas do dashboard.
+
+Um único ``Engine`` por processo (``st.cache_resource``) com pool de
+conexões: cada consulta pega uma conexão do pool e a devolve ao terminar, em
+vez de todas as sessões dividirem a mesma ``Connection``. ``pool_pre_ping``
+testa a conexão antes de usá-la (descartando as que o RDS fechou) e
+``pool_recycle`` renova as conexões antes do timeout de inatividade.
+
+Credenciais em ``.streamlit/secrets.toml`` (``DB_USER``, ``DB_PASS``,
+``DB_HOST``, ``DB_NAME``, ``DB_PORT``).
+"""
+
+import streamlit as st
+
+from dashboard.cache import VERSAO_TTL_SEGUNDOS, cache_por_versao
+from pipeline.consultas import load_distributions
+from pipeline.versao import read_data_version
+
+# Conexões mantidas abertas e extras permitidas em picos de sessões simultâneas
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+
+# Espera máxima por uma conexão livre e idade máxima de uma conexão (segundos)
+POOL_TIMEOUT_SEGUNDOS = 30
+POOL_RECYCLE_SEGUNDOS = 30 * 60
+
+
+def database_url() -> str:
+    """String de conexão do RDS a partir dos secrets do Streamlit."""
+    segredos = st.secrets
+    return (f"postgresql+psycopg2://{segredos['DB_USER']}:{segredos['DB_PASS']}"
+            f"@{segredos['DB_HOST']}:{segredos['DB_PORT']}/{segredos['DB_NAME']}")
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    """Engine com pool, compartilhado entre as sessões e as páginas."""
+    from sqlalchemy import create_engine
+
+    return create_engine(
+        database_url(),
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT_SEGUNDOS,
+        pool_recycle=POOL_RECYCLE_SEGUNDOS,
+        pool_pre_ping=True,
+    )
+
+
+@st.cache_data(ttl=VERSAO_TTL_SEGUNDOS, show_spinner=False)
+def load_version() -> str:
+    """Versão atual dos dados no RDS (reconsultada a cada VERSAO_TTL_SEGUNDOS)."""
+    with get_engine().connect() as conn:
+        return read_data_version(conn)
+
+
+@cache_por_versao
+def load_data(versao: str) -> dict:
+    """Carrega do banco as distribuições já agregadas de todos os gráficos."""
+    with get_engine().connect() as conn:
+        return load_distributions(conn)
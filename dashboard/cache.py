@@ -0,0 +1,26 @@
+"""Cache compartilhado entre sessões, versionado pelo conteúdo do banco.
+
+A carga Gold -> RDS grava uma versão nova dos dados a cada carga (ver
+``pipeline.versao``). O dashboard usa essa versão como parte da chave do
+cache: enquanto ela não muda, as agregações e os gráficos saem da memória;
+quando o ETL carrega dados novos, a chave muda e o cache é invalidado sozinho.
+"""
+
+import streamlit as st
+
+# Tempo de vida das entradas (segundos) e limite de entradas (LRU) por função
+CACHE_TTL_SEGUNDOS = 6 * 60 * 60
+CACHE_MAX_ENTRADAS = 64
+
+# Intervalo em que a versão é reconsultada no banco
+VERSAO_TTL_SEGUNDOS = 60
+
+
+def cache_por_versao(func):
+    """Aplica ``st.cache_data`` com TTL e LRU padronizados do dashboard.
+
+    A função decorada deve receber a versão dos dados como argumento, para que
+    ela faça parte da chave. Argumentos não hasheáveis (como conexões) devem
+    começar com ``_``, conforme a convenção do Streamlit.
+    """
+    return st.cache_data(ttl=CACHE_TTL_SEGUNDOS, max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)(func)
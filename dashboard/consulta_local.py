@@ -0,0 +1,145 @@
+"""Agregações do dashboard com DuckDB sobre uma cópia local da Gold em Parquet.
+
+Modo opcional da página de análises (``DASHBOARD_MODO = "local"``): a mesma
+consulta de ``pipeline.consultas`` roda no DuckDB, em processo, direto nos
+arquivos Parquet (execução vetorizada e em vários núcleos). Como não há ida
+ao RDS, a página pode recalcular todos os gráficos a cada mudança dos filtros
+de estado, região e mês.
+
+Cópia da Gold (com as variáveis ``aws_*``/``region`` do ``.env``)::
+
+    python -m dashboard.consulta_local
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import duckdb
+
+from pipeline.consultas import build_distribution_query, filtro_sintomas, to_distributions
+
+DIRETORIO_GOLD_LOCAL = Path('dados') / 'gold'
+
+# Colunas disponíveis como filtro na página
+COLUNAS_FILTRO = ['estado', 'regiao', 'mes_pesquisa']
+
+NOMES_MESES = {
+    1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril', 5: 'Maio', 6: 'Junho',
+    7: 'Julho', 8: 'Agosto', 9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro',
+}
+
+
+def connect_local():
+    """Conexão DuckDB em memória; cada consulta abre um cursor próprio (seguro entre as threads do Streamlit)."""
+    return duckdb.connect()
+
+
+def _arquivos(diretorio) -> list:
+    return sorted(Path(diretorio).rglob('*.parquet'))
+
+
+def gold_source(diretorio=DIRETORIO_GOLD_LOCAL) -> str:
+    """Expressão ``FROM`` do DuckDB para todos os Parquet da Gold local (inclusive partições ``ano=/mes_pesquisa=``).
+
+    As colunas de partição estão dentro dos arquivos, então as pastas não são
+    lidas como colunas (``hive_partitioning = false``).
+    """
+    padrao = (Path(diretorio) / '**' / '*.parquet').as_posix().replace("'", "''")
+    return f"read_parquet('{padrao}', union_by_name = true, hive_partitioning = false)"
+
+
+def local_data_version(diretorio=DIRETORIO_GOLD_LOCAL) -> str:
+    """Versão da cópia local: hash dos nomes, tamanhos e datas dos arquivos (muda a cada sincronização).
+
+    Retorna ``None`` se ainda não há nenhum arquivo.
+    """
+    arquivos = _arquivos(diretorio)
+    if not arquivos:
+        return None
+    h = hashlib.sha256()
+    for caminho in arquivos:
+        info = caminho.stat()
+        h.update(f"{caminho}:{info.st_size}:{info.st_mtime_ns}".encode())
+    return f"local_{h.hexdigest()[:16]}"
+
+
+def build_filter(estados=None, regioes=None, meses=None) -> tuple:
+    """Condição ``WHERE`` (recorte com sintomas + filtros escolhidos) e seus parâmetros."""
+    condicoes = [f"({filtro_sintomas()})"]
+    parametros = {}
+    for coluna, valores in (('estado', estados), ('regiao', regioes), ('mes_pesquisa', meses)):
+        if valores:
+            condicoes.append(f"list_contains(${coluna}, {coluna})")
+            parametros[coluna] = list(valores)
+    return ' AND '.join(condicoes), parametros
+
+
+def load_distributions_local(con, diretorio=DIRETORIO_GOLD_LOCAL, estados=None, regioes=None, meses=None) -> dict:
+    """Distribuições de todos os gráficos para o recorte filtrado, calculadas pelo DuckDB."""
+    filtro, parametros = build_filter(estados, regioes, meses)
+    consulta = build_distribution_query(gold_source(diretorio), filtro)
+    contagens = con.cursor().execute(consulta, parametros).df()
+    return to_distributions(contagens)
+
+
+def filter_options(con, diretorio=DIRETORIO_GOLD_LOCAL) -> dict:
+    """Valores distintos de cada coluna de filtro: ``{coluna: [valores]}``."""
+    opcoes = {}
+    for coluna in COLUNAS_FILTRO:
+        valores = con.cursor().execute(
+            f"SELECT DISTINCT {coluna} FROM {gold_source(diretorio)} WHERE {coluna} IS NOT NULL ORDER BY 1"
+        ).fetchall()
+        opcoes[coluna] = [valor for (valor,) in valores]
+    return opcoes
+
+
+def sync_gold(s3_client, bucket: str, prefix: str = 'gold', destino=DIRETORIO_GOLD_LOCAL) -> int:
+    """Baixa a Gold do S3 para ``destino``, mantendo as pastas de partição.
+
+    Arquivos já baixados com o mesmo tamanho são mantidos; arquivos locais que
+    não existem mais no S3 são removidos. Retorna quantos arquivos foram baixados.
+    """
+    from pipeline.s3 import list_parquet_keys
+
+    destino = Path(destino)
+    raiz = prefix.rstrip('/') + '/'
+    chaves = list_parquet_keys(s3_client, bucket, prefix)
+    esperados = set()
+    baixados = 0
+    for chave in chaves:
+        caminho = destino / chave[len(raiz):]
+        esperados.add(caminho)
+        tamanho = s3_client.head_object(Bucket=bucket, Key=chave)['ContentLength']
+        if caminho.exists() and caminho.stat().st_size == tamanho:
+            continue
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(f".{caminho.name}.tmp")
+        s3_client.download_file(bucket, chave, str(tmp))
+        os.replace(tmp, caminho)
+        baixados += 1
+    for caminho in _arquivos(destino):
+        if caminho not in esperados:
+            caminho.unlink()
+    return baixados
+
+
+def main():
+    import boto3
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    s3_client = boto3.client(
+        's3',
+        aws_access_key_id=os.getenv('aws_access_key_id'),
+        aws_secret_access_key=os.getenv('aws_secret_access_key'),
+        aws_session_token=os.getenv('aws_session_token'),
+        region_name=os.getenv('region'),
+    )
+    bucket = os.getenv('S3_BUCKET_PNAD', 'fiaptechchallengefase3')
+    baixados = sync_gold(s3_client, bucket)
+    print(f"✅ Gold sincronizada em {DIRETORIO_GOLD_LOCAL} ({baixados} arquivo(s) baixado(s), versão {local_data_version()})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+"""Tabelas cruzadas pré-calculadas de todas as dimensões da Gold, duas a duas.
+
+Cada dimensão escolhida (sintomas, comorbidades, internação, renda,
+isolamento, faixa etária etc.) é codificada como o índice inteiro da sua
+categoria (``Desconhecido`` por último). Em cada bloco de linhas, a matriz
+indicadora (uma coluna por categoria de cada dimensão) multiplicada pela sua
+transposta dá, de uma vez, as contagens de todos os pares de categorias de
+todos os pares de dimensões: uma única passada pela Gold, sem laço por par.
+
+O resultado é um array de contagens ``(recorte, dimensão, dimensão,
+categoria, categoria)`` de algumas centenas de KB, com os recortes "todos" e
+"com sintomas" e a soma dos pesos amostrais ao lado das contagens. Qualquer
+par sai desse array sem voltar às linhas, com χ², V de Cramér e lift
+calculados sobre as contagens da amostra.
+
+Com centenas de milhares de linhas quase todo χ² é "significativo"; o V de
+Cramér (0 a 1) é o que ordena as associações mais fortes.
+
+Uso (com as variáveis ``aws_*``/``region`` do ``.env``)::
+
+    python -m dashboard.cruzamentos
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.consultas import FAIXAS_ETARIAS
+from pipeline.mapeamentos import (CODIGO_SIM, COLUNA_PESO, COLUNAS_COMORBIDADES, COLUNAS_SINTOMAS_PRINCIPAIS,
+                                  DESCONHECIDO, MAPEAMENTO_MORADIA, MAPEAMENTOS_GOLD)
+from pipeline.transformacoes import any_equals
+
+DIRETORIO_CRUZAMENTOS = Path('artefatos') / 'cruzamentos'
+MANIFESTO_ATUAL = 'atual.json'
+
+RECORTES = ('todos', 'com_sintomas')
+
+# Linhas por multiplicação de matrizes (a matriz indicadora do bloco ocupa ~15 MB)
+LINHAS_POR_BLOCO = 16_384
+
+# Primeiro dígito do código da UF (IBGE) -> região
+REGIOES = {1: 'Norte', 2: 'Nordeste', 3: 'Sudeste', 4: 'Sul', 5: 'Centro-Oeste'}
+
+# Dimensão -> {código: rótulo}; códigos com o mesmo rótulo formam uma categoria só
+ROTULOS_CRUZAMENTO = {
+    **{col: MAPEAMENTOS_GOLD[col] for col in COLUNAS_SINTOMAS_PRINCIPAIS},
+    **{col: MAPEAMENTOS_GOLD[col] for col in ['buscou_auxilio_medico', 'precisou_de_internacao',
+                                              'precisou_de_sedacao', 'plano_de_saude', 'realizou_teste_covid']},
+    **{col: MAPEAMENTOS_GOLD[col] for col in COLUNAS_COMORBIDADES},
+    **{col: MAPEAMENTOS_GOLD[col] for col in ['isolamento_social', 'trabalha_atualmente', 'auxilio_emergencial',
+                                              'faixa_salarial']},
+    'moradia': MAPEAMENTO_MORADIA,
+    'faixa_etaria': {i: rotulo for i, (_, _, rotulo) in enumerate(FAIXAS_ETARIAS)},
+    'sexo': MAPEAMENTOS_GOLD['sexo'],
+    'cor': MAPEAMENTOS_GOLD['cor'],
+    'escolaridade': MAPEAMENTOS_GOLD['escolaridade'],
+    'regiao': REGIOES,
+}
+DIMENSOES_CRUZAMENTO = list(ROTULOS_CRUZAMENTO)
+
+# Dimensões calculadas a partir de outra coluna da Gold
+COLUNAS_ORIGEM = {'moradia': 'modaria', 'faixa_etaria': 'idade', 'regiao': 'uf'}
+
+
+def categories(dimensao: str) -> list:
+    """Rótulos das categorias de ``dimensao`` na ordem do array, com ``Desconhecido`` por último."""
+    return list(dict.fromkeys(ROTULOS_CRUZAMENTO[dimensao].values())) + [DESCONHECIDO]
+
+
+def source_columns(dimensoes: list = None) -> list:
+    """Colunas da Gold lidas para montar as tabelas de ``dimensoes``."""
+    dimensoes = DIMENSOES_CRUZAMENTO if dimensoes is None else dimensoes
+    colunas = [COLUNAS_ORIGEM.get(dim, dim) for dim in dimensoes]
+    return list(dict.fromkeys(colunas + COLUNAS_SINTOMAS_PRINCIPAIS + [COLUNA_PESO]))
+
+
+def _source_codes(df: pd.DataFrame, dimensao: str) -> np.ndarray:
+    """Códigos da dimensão em ``float64`` (``nan`` para nulo), derivando faixa etária e região."""
+    numeros = pd.to_numeric(df[COLUNAS_ORIGEM.get(dimensao, dimensao)], errors='coerce').to_numpy(
+        dtype='float64', na_value=np.nan)
+    if dimensao == 'faixa_etaria':
+        fora = ~((numeros >= FAIXAS_ETARIAS[0][0]) & (numeros <= FAIXAS_ETARIAS[-1][1]))
+        faixas = np.searchsorted([fim for _, fim, _ in FAIXAS_ETARIAS], numeros).astype('float64')
+        return np.where(fora, np.nan, faixas)
+    if dimensao == 'regiao':
+        return numeros // 10
+    return numeros
+
+
+def encode_dimensions(df: pd.DataFrame, dimensoes: list = None) -> np.ndarray:
+    """Matriz ``(linhas, dimensões)`` com o índice da categoria de cada linha em cada dimensão.
+
+    Nulos e códigos fora do dicionário vão para o índice de ``Desconhecido``.
+    """
+    dimensoes = DIMENSOES_CRUZAMENTO if dimensoes is None else dimensoes
+    indices = np.empty((len(df), len(dimensoes)), dtype='int16')
+    for j, dimensao in enumerate(dimensoes):
+        rotulos = ROTULOS_CRUZAMENTO[dimensao]
+        posicao = {rotulo: i for i, rotulo in enumerate(categories(dimensao))}
+        desconhecido = len(posicao) - 1
+        # Tabela de consulta código -> índice; a última posição recebe tudo que está fora do dicionário
+        maior = max(rotulos)
+        tabela = np.full(maior + 2, desconhecido, dtype='int16')
+        for codigo, rotulo in rotulos.items():
+            tabela[codigo] = posicao[rotulo]
+        codigos = _source_codes(df, dimensao)
+        validos = (codigos >= 0) & (codigos <= maior)
+        indices[:, j] = tabela[np.where(validos, codigos, maior + 1).astype('int64')]
+    return indices
+
+
+class CrossTabs:
+    """Contagens de todos os pares de dimensões, por recorte.
+
+    ``contagens[r, i, j, a, b]`` é o número de linhas do recorte ``r`` com a
+    categoria ``a`` na dimensão ``i`` e ``b`` na dimensão ``j``; ``pesos`` tem
+    a mesma forma com a soma de ``peso``. A diagonal ``i == j`` guarda a
+    distribuição de cada dimensão.
+    """
+
+    def __init__(self, dimensoes: list, contagens: np.ndarray, pesos: np.ndarray, versao: str = None,
+                 gerado_em: str = None):
+        self.dimensoes = list(dimensoes)
+        self.categorias = {dim: categories(dim) for dim in self.dimensoes}
+        self.contagens = contagens
+        self.pesos = pesos
+        self.versao = versao
+        self.gerado_em = gerado_em
+
+    @classmethod
+    def build(cls, lotes, dimensoes: list = None, versao: str = None, linhas_por_bloco: int = LINHAS_POR_BLOCO):
+        """Calcula as tabelas percorrendo uma vez os ``lotes`` (``DataFrame``s da Gold com ``source_columns``)."""
+        dimensoes = DIMENSOES_CRUZAMENTO if dimensoes is None else list(dimensoes)
+        d = len(dimensoes)
+        k = max(len(categories(dim)) for dim in dimensoes)
+        deslocamentos = np.arange(d) * k
+        # Acumuladores das linhas sem e com sintomas: cada linha entra em uma multiplicação só e "todos" é a soma
+        contagens = np.zeros((2, d * k, d * k), dtype='int64')
+        pesos = np.zeros((2, d * k, d * k), dtype='float64')
+
+        for lote in lotes:
+            indices = encode_dimensions(lote, dimensoes) + deslocamentos
+            com_sintomas = any_equals(lote, COLUNAS_SINTOMAS_PRINCIPAIS, CODIGO_SIM)
+            peso = pd.to_numeric(lote[COLUNA_PESO], errors='coerce').to_numpy(dtype='float64', na_value=0.0)
+            # Peso inválido (o -1 de ausente) entra nas contagens, mas não nos totais ponderados
+            peso = np.where(peso > 0, peso, 0.0)
+            for inicio in range(0, len(lote), linhas_por_bloco):
+                bloco = slice(inicio, inicio + linhas_por_bloco)
+                # float32 é exato para contagens de até 2**24 linhas por bloco
+                indicadora = np.zeros((len(indices[bloco]), d * k), dtype='float32')
+                np.put_along_axis(indicadora, indices[bloco], 1.0, axis=1)
+                for r, mascara in enumerate((~com_sintomas[bloco], com_sintomas[bloco])):
+                    x = indicadora[mascara]
+                    contagens[r] += np.rint(x.T @ x).astype('int64')
+                    pesos[r] += x.T @ (x * peso[bloco][mascara, None])
+
+        contagens = np.stack([contagens.sum(axis=0), contagens[1]])
+        pesos = np.stack([pesos.sum(axis=0), pesos[1]])
+        # (recorte, i·k + a, j·k + b) -> (recorte, i, j, a, b)
+        forma = (len(RECORTES), d, k, d, k)
+        contagens = contagens.reshape(forma).transpose(0, 1, 3, 2, 4)
+        pesos = pesos.reshape(forma).transpose(0, 1, 3, 2, 4)
+        gerado_em = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        return cls(dimensoes, np.ascontiguousarray(contagens), np.ascontiguousarray(pesos), versao, gerado_em)
+
+    @property
+    def total(self) -> dict:
+        """Linhas de cada recorte."""
+        return {recorte: int(self.contagens[r, 0, 0].sum()) for r, recorte in enumerate(RECORTES)}
+
+    def _valid_categories(self, incluir_desconhecido: bool) -> np.ndarray:
+        """Máscara ``(dimensões, k)`` das posições que são categorias (sem o enchimento e, opcionalmente, sem ``Desconhecido``)."""
+        k = self.contagens.shape[-1]
+        tamanhos = np.array([len(self.categorias[dim]) - (0 if incluir_desconhecido else 1) for dim in self.dimensoes])
+        return np.arange(k)[None, :] < tamanhos[:, None]
+
+    def _pair(self, array: np.ndarray, a: str, b: str, recorte: str, incluir_desconhecido: bool) -> pd.DataFrame:
+        i, j = self.dimensoes.index(a), self.dimensoes.index(b)
+        linhas = self.categorias[a] if incluir_desconhecido else self.categorias[a][:-1]
+        colunas = self.categorias[b] if incluir_desconhecido else self.categorias[b][:-1]
+        tabela = array[RECORTES.index(recorte), i, j, :len(linhas), :len(colunas)]
+        return pd.DataFrame(tabela, index=pd.Index(linhas, name=a), columns=pd.Index(colunas, name=b))
+
+    def table(self, a: str, b: str, recorte: str = 'com_sintomas', ponderado: bool = False,
+              incluir_desconhecido: bool = False) -> pd.DataFrame:
+        """Tabela de contingência ``a`` x ``b`` (contagens da amostra ou, com ``ponderado``, população estimada)."""
+        return self._pair(self.pesos if ponderado else self.contagens, a, b, recorte, incluir_desconhecido)
+
+    def lift(self, a: str, b: str, recorte: str = 'com_sintomas', incluir_desconhecido: bool = False) -> pd.DataFrame:
+        """Observado / esperado sob independência de cada célula (1 = independente)."""
+        tabela = self.table(a, b, recorte, incluir_desconhecido=incluir_desconhecido)
+        _, _, _, esperado = chi_square(tabela.to_numpy(dtype='float64'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return tabela / np.where(esperado > 0, esperado, np.nan)
+
+    def statistics(self, a: str, b: str, recorte: str = 'com_sintomas', incluir_desconhecido: bool = False) -> dict:
+        """``n``, ``chi2``, graus de liberdade (``gl``) e ``v_cramer`` do par ``a`` x ``b``."""
+        tabela = self.table(a, b, recorte, incluir_desconhecido=incluir_desconhecido).to_numpy(dtype='float64')
+        qui2, gl, v, _ = chi_square(tabela)
+        return {'n': int(tabela.sum()), 'chi2': float(qui2), 'gl': int(gl), 'v_cramer': float(v)}
+
+    def associations(self, recorte: str = 'com_sintomas', incluir_desconhecido: bool = False) -> pd.DataFrame:
+        """χ² e V de Cramér de todos os pares de dimensões de uma vez, do mais forte para o mais fraco."""
+        validas = self._valid_categories(incluir_desconhecido)
+        mascara = validas[:, None, :, None] & validas[None, :, None, :]
+        tabelas = np.where(mascara, self.contagens[RECORTES.index(recorte)], 0).astype('float64')
+        qui2, gl, v, _ = chi_square(tabelas)
+        n = tabelas.sum(axis=(-2, -1))
+
+        i, j = np.triu_indices(len(self.dimensoes), k=1)
+        resultado = pd.DataFrame({
+            'dimensao_a': np.array(self.dimensoes)[i],
+            'dimensao_b': np.array(self.dimensoes)[j],
+            'n': n[i, j].astype('int64'),
+            'chi2': qui2[i, j],
+            'gl': gl[i, j],
+            'v_cramer': v[i, j],
+        })
+        return resultado.sort_values('v_cramer', ascending=False, ignore_index=True)
+
+    def save(self, diretorio=DIRETORIO_CRUZAMENTOS) -> Path:
+        """Grava ``versoes/<versao>.npz`` e aponta ``atual.json`` para ele."""
+        diretorio = Path(diretorio)
+        (diretorio / 'versoes').mkdir(parents=True, exist_ok=True)
+        caminho = diretorio / 'versoes' / f"{self.versao}.npz"
+        metadados = {'versao': self.versao, 'gerado_em': self.gerado_em, 'dimensoes': self.dimensoes,
+                     'recortes': list(RECORTES), 'total': self.total}
+
+        # Arquivo temporário + os.replace: a página nunca lê um arquivo pela metade
+        tmp = caminho.with_name(f".{caminho.name}.tmp")
+        with open(tmp, 'wb') as arquivo:
+            np.savez_compressed(arquivo, contagens=self.contagens.astype('int32'), pesos=self.pesos,
+                                metadados=np.array(json.dumps(metadados, ensure_ascii=False)))
+        os.replace(tmp, caminho)
+
+        atual = diretorio / MANIFESTO_ATUAL
+        tmp = atual.with_name(f".{atual.name}.tmp")
+        tmp.write_text(json.dumps({**metadados, 'arquivo': caminho.name}, ensure_ascii=False, indent=2),
+                       encoding='utf-8')
+        os.replace(tmp, atual)
+        return caminho
+
+    @classmethod
+    def load(cls, diretorio=DIRETORIO_CRUZAMENTOS, versao: str = None):
+        """Lê as tabelas de ``versao`` (ou as atuais); retorna ``None`` se ainda não foram calculadas."""
+        diretorio = Path(diretorio)
+        if versao is None:
+            atual = current_version(diretorio)
+            if atual is None:
+                return None
+            versao = atual
+        caminho = diretorio / 'versoes' / f"{versao}.npz"
+        if not caminho.exists():
+            return None
+        with np.load(caminho, allow_pickle=False) as dados:
+            metadados = json.loads(str(dados['metadados']))
+            return cls(metadados['dimensoes'], dados['contagens'].astype('int64'), dados['pesos'],
+                       metadados['versao'], metadados['gerado_em'])
+
+
+def chi_square(tabelas: np.ndarray) -> tuple:
+    """χ², graus de liberdade, V de Cramér e esperado de uma ou várias tabelas ``(..., linhas, colunas)``.
+
+    Linhas e colunas sem nenhuma contagem não entram nos graus de liberdade;
+    o V é ``nan`` quando a tabela tem uma linha ou coluna só.
+    """
+    somas_linhas = tabelas.sum(axis=-1)
+    somas_colunas = tabelas.sum(axis=-2)
+    n = somas_linhas.sum(axis=-1)
+    esperado = somas_linhas[..., :, None] * somas_colunas[..., None, :] / np.where(n > 0, n, 1)[..., None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        qui2 = np.where(esperado > 0, (tabelas - esperado) ** 2 / esperado, 0.0).sum(axis=(-2, -1))
+        r = (somas_linhas > 0).sum(axis=-1)
+        c = (somas_colunas > 0).sum(axis=-1)
+        gl = np.maximum(r - 1, 0) * np.maximum(c - 1, 0)
+        menor = np.minimum(r, c) - 1
+        v = np.where((menor > 0) & (n > 0), np.sqrt(qui2 / (n * np.maximum(menor, 1))), np.nan)
+    return qui2, gl, v, esperado
+
+
+def current_version(diretorio=DIRETORIO_CRUZAMENTOS) -> str:
+    """Versão das tabelas publicadas em ``atual.json`` (``None`` se ainda não há)."""
+    caminho = Path(diretorio) / MANIFESTO_ATUAL
+    if not caminho.exists():
+        return None
+    return json.loads(caminho.read_text(encoding='utf-8'))['versao']
+
+
+def layer_version(s3_client, bucket: str, prefix: str = 'gold') -> str:
+    """Versão da Gold: a execução do manifesto ``_current.json`` ou, sem manifesto, o hash das chaves."""
+    from pipeline.s3 import list_parquet_keys, load_layer_manifest
+
+    manifesto = load_layer_manifest(s3_client, bucket, prefix)
+    if manifesto is not None:
+        return manifesto['execucao']
+    chaves = '\n'.join(list_parquet_keys(s3_client, bucket, prefix))
+    return f"chaves_{hashlib.sha256(chaves.encode('utf-8')).hexdigest()[:16]}"
+
+
+def build_from_layer(s3_client, bucket: str, prefix: str = 'gold', diretorio=DIRETORIO_CRUZAMENTOS) -> CrossTabs:
+    """Calcula e publica as tabelas da Gold no S3, a menos que as da versão atual já existam."""
+    from pipeline.camadas import iter_layer_batches
+
+    versao = layer_version(s3_client, bucket, prefix)
+    existentes = CrossTabs.load(diretorio, versao)
+    if existentes is not None:
+        print(f"➡️  Tabelas cruzadas da versão {versao} já calculadas")
+        return existentes
+    cruzamentos = CrossTabs.build(iter_layer_batches(s3_client, bucket, prefix, columns=source_columns()),
+                                  versao=versao)
+    caminho = cruzamentos.save(diretorio)
+    print(f"✅ {len(cruzamentos.dimensoes)} dimensões cruzadas ({cruzamentos.total['todos']} linhas) em {caminho}")
+    return cruzamentos
+
+
+def main():
+    import boto3
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    s3_client = boto3.client(
+        's3',
+        aws_access_key_id=os.getenv('aws_access_key_id'),
+        aws_secret_access_key=os.getenv('aws_secret_access_key'),
+        aws_session_token=os.getenv('aws_session_token'),
+        region_name=os.getenv('region'),
+    )
+    build_from_layer(s3_client, os.getenv('S3_BUCKET_PNAD', 'fiaptechchallengefase3'))
+
+
+if __name__ == '__main__':
+    main()
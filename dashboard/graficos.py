@@ -0,0 +1,119 @@
+"""Renderização dos gráficos de barras do dashboard.
+
+Os gráficos são desenhados em uma ``matplotlib.figure.Figure`` avulsa (sem o
+estado global do ``pyplot``) e devolvidos como bytes PNG/SVG, o que permite
+guardá-los em cache e evita o acúmulo de figuras abertas entre os reruns.
+
+``matplotlib`` e ``seaborn`` (meio segundo de import) só são importados ao
+desenhar: no modo ``artefatos`` e nas páginas só de texto, nunca são carregados.
+"""
+
+from io import BytesIO
+
+COR_BARRAS = 'sienna'
+
+# chave da distribuição -> (título, orientação)
+GRAFICOS = {
+    'sintomas': ('Distribuição dos sintomas mais comuns (em %)', 'vertical'),
+    'testes': ('Resultados positivos por tipo de teste (em %)', 'vertical'),
+    'buscou_auxilio_medico': ('Buscas por auxílio médico (em %)', 'vertical'),
+    'precisou_de_internacao': ('Necessidade de internação (em %)', 'vertical'),
+    'precisou_de_sedacao': ('Necessidade de sedação (em %)', 'vertical'),
+    'isolamento_social': ('Isolamento social dos entrevistados (em %)', 'horizontal'),
+    'trabalha_atualmente': ('Situação empregatícia dos entrevistados (em %)', 'vertical'),
+    'auxilio_emergencial': ('Utilização de auxílio emergencial (em %)', 'vertical'),
+    'faixa_salarial': ('Faixa de renda dos entrevistados (em %)', 'horizontal'),
+    'moradia': ('Situação de moradia dos entrevistados (em %)', 'horizontal'),
+    'faixa_etaria': ('Idade dos entrevistados (em %)', 'vertical'),
+    'sexo': ('Gênero dos entrevistados (em %)', 'vertical'),
+    'cor': ('Cor/Raça dos entrevistados (em %)', 'vertical'),
+    'escolaridade': ('Escolaridade dos entrevistados (em %)', 'horizontal'),
+}
+
+
+def sem_dados(valor) -> bool:
+    """Indica se a série não tem valores para desenhar."""
+    return valor.empty or bool(valor.isna().all())
+
+
+def _grafico_sem_dados(ax, titulo):
+    ax.clear()
+    ax.text(0.5, 0.5, 'Sem dados', ha='center', va='center', fontsize=12)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.set_title(titulo, fontweight='bold', fontsize=12)
+
+
+# Funções de customização de gráficos
+def grafico_vertical(ax, valor, titulo):
+    if sem_dados(valor):
+        _grafico_sem_dados(ax, titulo)
+        return
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    ax.set_ylim(0, valor.max() * 1.1)
+    ax.xaxis.set_ticks_position('none')
+    ax.set_ylabel('', fontsize=10)
+    ax.set_xlabel('', fontsize=10)
+    ax.yaxis.set_ticks([])
+    ax.tick_params(axis='both', which='major', labelsize=10)
+    ax.set_title(titulo, fontweight='bold', fontsize=12)
+
+
+def grafico_horizontal(ax, valor, titulo):
+    if sem_dados(valor):
+        _grafico_sem_dados(ax, titulo)
+        return
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    ax.set_xlim(0, valor.max() * 1.1)
+    ax.yaxis.set_ticks_position('none')
+    ax.set_ylabel('', fontsize=10)
+    ax.set_xlabel('', fontsize=10)
+    ax.xaxis.set_ticks([])
+    ax.tick_params(axis='both', which='major', labelsize=10)
+    ax.set_title(titulo, fontweight='bold', fontsize=12)
+
+
+def build_figure(valor, chave: str):
+    """Desenha o gráfico de barras percentual da distribuição ``chave`` (``valor``: ``pd.Series``)."""
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    titulo, orientacao = GRAFICOS[chave]
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+
+    if orientacao == 'horizontal':
+        if not sem_dados(valor):
+            sns.barplot(x=valor.values, y=valor.index, color=COR_BARRAS, ax=ax)
+        for p in ax.patches:
+            ax.annotate(f'{p.get_width():.1f}%', (p.get_x() + p.get_width(), p.get_y() + p.get_height() / 2), ha='center', va='center', xytext=(25, 0), textcoords='offset points', fontsize=8)
+        grafico_horizontal(ax, valor, titulo)
+    else:
+        if not sem_dados(valor):
+            sns.barplot(x=valor.index, y=valor.values, color=COR_BARRAS, ax=ax)
+        for p in ax.patches:
+            ax.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
+        grafico_vertical(ax, valor, titulo)
+
+    fig.tight_layout()
+    return fig
+
+
+def render_image(valor, chave: str, formato: str = 'png') -> bytes:
+    """Renderiza o gráfico ``chave`` e devolve os bytes da imagem (``png`` ou ``svg``)."""
+    from matplotlib import rc_context
+
+    bio = BytesIO()
+    # Sem data de criação e com ids fixos no SVG, a mesma entrada gera sempre os mesmos bytes
+    metadata = {'Software': None} if formato == 'png' else {'Date': None, 'Creator': None}
+    with rc_context({'svg.hashsalt': 'pnad_covid'}):
+        build_figure(valor, chave).savefig(bio, format=formato, dpi=100, metadata=metadata)
+    return bio.getvalue()
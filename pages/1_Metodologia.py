@@ -1,12 +1,4 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import psycopg2
-from dotenv import load_dotenv
-import os
-from sqlalchemy import create_engine, text
-from PIL import Image
 
 #Header
 with st.container():
@@ -25,8 +17,7 @@ with st.container():
         """
     )
 
-    image = Image.open("./imagens/arquitetura_dos_dados.jpg")
-    st.image(image)
+    st.image("./imagens/arquitetura_dos_dados.jpg")
 
 
 with st.container():
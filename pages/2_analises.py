@@ -1,11 +1,6 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import psycopg2
-from dotenv import load_dotenv
-import os
-from sqlalchemy import create_engine, text
+
+from dashboard.graficos import GRAFICOS
 
 st.title('📊 Desafio')
 st.markdown("""
@@ -18,106 +13,58 @@ st.markdown("""
 A partir dessas condições, trouxemos uma breve análise dessas informações, explicitando o modo como organizamos o banco de dados, o porquê da seleção das melhores perguntas que trariam as melhores respostas e, por fim, as ações mais efetivas que o hospital deverá tomar em caso de um novo surto de COVID-19.
 """)
 
-# Ler variáveis do arquivo .streamlit/secrets.toml
-DB_USER = st.secrets["DB_USER"] # mesmo parametro declarado em secrets no streamlit
-DB_PASS = st.secrets["DB_PASS"] # mesmo parametro declarado em secrets no streamlit
-DB_HOST = st.secrets["DB_HOST"] # mesmo parametro declarado em secrets no streamlit
-DB_NAME = st.secrets["DB_NAME"] # mesmo parametro declarado em secrets no streamlit
-DB_PORT = st.secrets["DB_PORT"] # mesmo parametro declarado em secrets no streamlit
-
-# String de conexão completa
-engine_str = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-@st.cache_resource
-def get_connection():
-    """Cria e retorna uma conexão com o banco."""
-    try:
-        engine = create_engine(engine_str)
-        conn = engine.connect()
-        st.success("✅ Conectado ao banco de dados RDS com sucesso!")
-        return conn
-    except Exception as e:
-        st.error(f"❌ Erro ao conectar ao RDS: {e}") 
-        return None
+# Modo de exibição: 'ao_vivo' consulta o RDS (com cache); 'artefatos' apenas serve
+# os gráficos pré-renderizados por `python -m dashboard.artefatos`; 'local' agrega
+# com DuckDB a cópia da Gold baixada por `python -m dashboard.consulta_local` (com filtros)
+MODO = st.secrets.get("DASHBOARD_MODO", "ao_vivo")
+
+# Cada modo importa só o que usa: no modo 'artefatos' nem pandas nem matplotlib são carregados
+if MODO == 'artefatos':
+    from dashboard.artefatos import artifact_path, load_manifest
+else:
+    from dashboard.cache import cache_por_versao
+    from dashboard.graficos import render_image, sem_dados
+
+    if MODO == 'local':
+        from dashboard.consulta_local import (NOMES_MESES, connect_local, filter_options, load_distributions_local,
+                                              local_data_version)
+
+        @st.cache_resource
+        def get_duckdb():
+            """Conexão DuckDB em memória, compartilhada entre as sessões."""
+            return connect_local()
+
+        @cache_por_versao
+        def load_filter_options(versao):
+            """Estados, regiões e meses presentes na Gold local."""
+            return filter_options(get_duckdb())
+
+        @cache_por_versao
+        def load_data_local(versao, filtros):
+            """Distribuições do recorte ``filtros`` = (estados, regiões, meses), calculadas pelo DuckDB."""
+            estados, regioes, meses = filtros
+            return load_distributions_local(get_duckdb(), estados=estados, regioes=regioes, meses=meses)
+    else:
+        from dashboard.banco import load_data, load_version
+
+    @cache_por_versao
+    def load_chart(versao, chave, filtros=None):
+        """Gráfico ``chave`` renderizado em PNG, compartilhado entre as sessões."""
+        dados = load_data(versao) if filtros is None else load_data_local(versao, filtros)
+        return render_image(dados[chave], chave)
+
+def exibir_grafico(chave):
+    """Exibe o gráfico ``chave`` a partir dos artefatos ou do cache."""
+    if MODO == 'artefatos':
+        vazio = manifesto['graficos'][chave]['sem_dados']
+        imagem = str(artifact_path(manifesto, chave))
+    else:
+        vazio = sem_dados(distribuicoes[chave])
+        imagem = load_chart(versao, chave, filtros)
+    if vazio:
+        st.warning(f"Não há dados suficientes para o gráfico: {GRAFICOS[chave][0]}")
+    st.image(imagem)
 
-conn = get_connection()
-
-def load_data():
-    """Carrega os dados do banco de dados e realiza o pré-processamento."""
-    if conn is None:
-        st.stop()
-    query = "SELECT * FROM questionario_covid where frebre_semana_anterior = 'Sim' or tosse_semana_anterior = 'Sim' or dificuldade_de_respirar_semana_anterior = 'Sim' or perda_olfato_paladar_semana_anterior = 'Sim';"
-    df = pd.read_sql_query(query, con=conn)
-    
-    # Ajusta coluna de 'moradia'
-    df.rename(columns={'a006': 'situacao_escolar', 'modaria':'moradia'}, inplace=True)
-    df['situacao_escolar'] = df['situacao_escolar'].apply(lambda x: 'Sim' if x == 1 else 'Não' if x == 2 else 'Desconhecido')
-    
-    # Ajusta respostas de moradia
-    mapeamento_moradia = {1: 'Própria', 2: 'Própria', 3: 'Aluguel', 4: 'Cedido', 5: 'Cedido', 6: 'Cedido'}
-    df['moradia'] = df['moradia'].map(mapeamento_moradia).fillna('Desconhecido')
-    
-    # Coluna para identificar se teve ao menos 1 sintoma
-    colunas_sintomas = [
-        'frebre_semana_anterior',
-        'tosse_semana_anterior',
-        'dificuldade_de_respirar_semana_anterior',
-        'perda_olfato_paladar_semana_anterior'
-    ]
-    df['sintoma_semana_anterior'] = df[colunas_sintomas].apply(lambda x: 1 if 'Sim' in x.values else 0, axis=1)
-
-    # Filtrando apenas quem teve sintoma
-    df_filtrado = df[df['sintoma_semana_anterior'] == 1].copy()
-
-    return df_filtrado
-
-# Funções de customização de gráficos
-def grafico_vertical(ax, valor, titulo):
-    # Verifica se o valor está vazio ou contém apenas NaN
-    if valor.empty or pd.isna(valor.max()):
-        st.warning(f"Não há dados suficientes para o gráfico: {titulo}")
-        ax.clear()
-        ax.text(0.5, 0.5, 'Sem dados', ha='center', va='center', fontsize=12)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.set_title(titulo, fontweight='bold', fontsize=12)
-        return
-    
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    ax.set_ylim(0, valor.max() * 1.1)
-    ax.xaxis.set_ticks_position('none')
-    ax.set_ylabel('', fontsize=10)
-    ax.set_xlabel('', fontsize=10)
-    ax.yaxis.set_ticks([])
-    ax.tick_params(axis='both', which='major', labelsize=10)
-    ax.set_title(titulo, fontweight='bold', fontsize=12)
-    plt.tight_layout()
-
-def grafico_horizontal(ax, valor, titulo):
-    if valor.empty or pd.isna(valor.max()):
-        st.warning(f"Não há dados suficientes para o gráfico: {titulo}")
-        ax.clear()
-        ax.text(0.5, 0.5, 'Sem dados', ha='center', va='center', fontsize=12)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.set_title(titulo, fontweight='bold', fontsize=12)
-        return
-    
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    ax.set_xlim(0, valor.max() * 1.1)
-    ax.yaxis.set_ticks_position('none')
-    ax.set_ylabel('', fontsize=10)
-    ax.set_xlabel('', fontsize=10)
-    ax.xaxis.set_ticks([])
-    ax.tick_params(axis='both', which='major', labelsize=10)
-    ax.set_title(titulo, fontweight='bold', fontsize=12)
-    plt.tight_layout()
 
 # Configuração da página Streamlit
 st.set_page_config(layout="wide")
@@ -125,13 +72,44 @@ st.title("Análises do Questionário COVID-19")
 st.markdown("---")
 
 # Carregar os dados
-df_filtrado = load_data()
+if MODO == 'artefatos':
+    manifesto = load_manifest()
+    if manifesto is None:
+        st.error("❌ Nenhum gráfico pré-renderizado encontrado. Execute `python -m dashboard.artefatos`.")
+        st.stop()
+    total_linhas = manifesto['total']
+elif MODO == 'local':
+    versao = local_data_version()
+    if versao is None:
+        st.error("❌ Nenhuma cópia local da Gold encontrada. Execute `python -m dashboard.consulta_local`.")
+        st.stop()
+    opcoes = load_filter_options(versao)
+
+    # Filtros na barra lateral: vazio = todos
+    st.sidebar.header("Filtros")
+    estados = st.sidebar.multiselect("Estado", opcoes['estado'])
+    regioes = st.sidebar.multiselect("Região", opcoes['regiao'])
+    meses = st.sidebar.multiselect("Mês da pesquisa", opcoes['mes_pesquisa'],
+                                   format_func=lambda mes: NOMES_MESES.get(mes, str(mes)))
+    filtros = (tuple(estados), tuple(regioes), tuple(meses))
+
+    distribuicoes = load_data_local(versao, filtros)
+    total_linhas = distribuicoes['total']
+else:
+    filtros = None
+    try:
+        versao = load_version()
+    except Exception as e:
+        st.error(f"❌ Erro ao conectar ao RDS: {e}")
+        st.stop()
+    distribuicoes = load_data(versao)
+    total_linhas = distribuicoes['total']
 
 # --- Análise Exploratória ---
 st.header("Análise Exploratória")
 
 st.subheader("Informações do DataFrame filtrado (somente com sintomas)")
-st.write(f"Linhas: {df_filtrado.shape[0]}, Colunas: {df_filtrado.shape[1]}")
+st.write(f"Linhas: {total_linhas}")
 st.markdown("---")
 
 # --- Caracterização dos sintomas clínicos da população ---
@@ -155,66 +133,23 @@ col1, col2 = st.columns(2)
 
 with col1:
     # Gráfico 1: Sintomas mais comuns
-    colunas_sintomas = ['frebre_semana_anterior', 'tosse_semana_anterior', 'dificuldade_de_respirar_semana_anterior', 'perda_olfato_paladar_semana_anterior']
-    nomes_sintomas = {'frebre_semana_anterior': 'Febre', 'tosse_semana_anterior': 'Tosse', 'dificuldade_de_respirar_semana_anterior': 'Dificuldade de respirar', 'perda_olfato_paladar_semana_anterior': 'Perda de olfato/paladar'}
-    contagem_sintomas = df_filtrado[colunas_sintomas].apply(lambda x: (x == 'Sim').sum())
-    total_sintomas_contados = contagem_sintomas.sum()
-    percentual_sintomas = (contagem_sintomas / total_sintomas_contados * 100).sort_values(ascending=False)
-    percentual_sintomas.index = [nomes_sintomas[col] for col in percentual_sintomas.index]
-    fig1, ax1 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=percentual_sintomas.index, y=percentual_sintomas.values, color='sienna', ax=ax1)
-    for p in ax1.patches:
-        ax1.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax1, percentual_sintomas, 'Distribuição dos sintomas mais comuns (em %)')
-    st.pyplot(fig1)
+    exibir_grafico('sintomas')
 
 with col2:
     # Gráfico 2: Resultados positivos por tipo de teste
-    colunas_testes = ['resultado_teste_swab', 'resultado_teste_dedo', 'resultado_teste_veia']
-    nomes_testes = {'resultado_teste_swab': 'Swab', 'resultado_teste_dedo': 'Dedo', 'resultado_teste_veia': 'Veia'}
-    contagem_testes = df_filtrado[colunas_testes].apply(lambda x: (x == 'Positivo').sum())
-    total_testes_positivos = contagem_testes.sum()
-    percentual_testes = (contagem_testes / total_testes_positivos * 100).sort_values(ascending=False)
-    percentual_testes.index = [nomes_testes[col] for col in percentual_testes.index]
-    fig2, ax2 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=percentual_testes.index, y=percentual_testes.values, color='sienna', ax=ax2)
-    for p in ax2.patches:
-        ax2.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax2, percentual_testes, 'Resultados positivos por tipo de teste (em %)')
-    st.pyplot(fig2)
+    exibir_grafico('testes')
 
 col3, col4 = st.columns(2)
 
 with col3:
     # Gráfico 3: Busca por auxílio médico
-    contagem_auxilio = df_filtrado['buscou_auxilio_medico'].value_counts(normalize=True) * 100
-    contagem_auxilio.sort_values(ascending=False, inplace=True)
-    fig3, ax3 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_auxilio.index, y=contagem_auxilio.values, color='sienna', ax=ax3)
-    for p in ax3.patches:
-        ax3.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax3, contagem_auxilio, 'Buscas por auxílio médico (em %)')
-    st.pyplot(fig3)
+    exibir_grafico('buscou_auxilio_medico')
 
 with col4:
     # Gráfico 4: Internação
-    contagem_internacao = df_filtrado['precisou_de_internacao'].value_counts(normalize=True) * 100
-    contagem_internacao.sort_values(ascending=False, inplace=True)
-    fig4, ax4 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_internacao.index, y=contagem_internacao.values, color='sienna', ax=ax4)
-    for p in ax4.patches:
-        ax4.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax4, contagem_internacao, 'Necessidade de internação (em %)')
-    st.pyplot(fig4)
-
-contagem_sedacao = df_filtrado['precisou_de_sedacao'].value_counts(normalize=True) * 100
-contagem_sedacao.sort_values(ascending=False, inplace=True)
-fig5, ax5 = plt.subplots(figsize=(8, 6))  # Aumenta o tamanho para ocupar a linha inteira
-sns.barplot(x=contagem_sedacao.index, y=contagem_sedacao.values, color='sienna', ax=ax5)
-for p in ax5.patches:
-    ax5.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-grafico_vertical(ax5, contagem_sedacao, 'Necessidade de sedação (em %)')
-st.pyplot(fig5)
+    exibir_grafico('precisou_de_internacao')
+
+exibir_grafico('precisou_de_sedacao')
 
 # Macro Tema: Comportamento da População na Pandemia
 
@@ -240,65 +175,30 @@ st.write(
 
 
 # Gráfico 6: Isolamento social
-isolamento_social = df_filtrado['isolamento_social'].value_counts(normalize=True) * 100
-isolamento_social.sort_values(ascending=False, inplace=True)
-fig6, ax6 = plt.subplots(figsize=(8, 6))
-sns.barplot(x=isolamento_social.values, y=isolamento_social.index, color='sienna', ax=ax6)
-for p in ax6.patches:
-    ax6.annotate(f'{p.get_width():.1f}%', (p.get_x() + p.get_width(), p.get_y() + p.get_height() / 2), ha='center', va='center', xytext=(25, 0), textcoords='offset points', fontsize=8)
-grafico_horizontal(ax6, isolamento_social, 'Isolamento social dos entrevistados (em %)')
-st.pyplot(fig6)
+exibir_grafico('isolamento_social')
 
 
 col7, col8 = st.columns(2)
 
 with col7:
     # Gráfico 7: Situação empregatícia
-    trabalha_atualmente = df_filtrado['trabalha_atualmente'].value_counts(normalize=True) * 100
-    trabalha_atualmente.sort_values(ascending=False, inplace=True)
-    fig7, ax7 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=trabalha_atualmente.index, y=trabalha_atualmente.values, color='sienna', ax=ax7)
-    for p in ax7.patches:
-        ax7.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax7, trabalha_atualmente, 'Situação empregatícia dos entrevistados (em %)')
-    st.pyplot(fig7)
+    exibir_grafico('trabalha_atualmente')
 
 
 with col8:
     # Gráfico 8: Auxílio emergencial
-    auxilio_emergencial = df_filtrado['auxilio_emergencial'].value_counts(normalize=True) * 100
-    auxilio_emergencial.sort_values(ascending=False, inplace=True)
-    fig8, ax8 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=auxilio_emergencial.index, y=auxilio_emergencial.values, color='sienna', ax=ax8)
-    for p in ax8.patches:
-        ax8.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax8, auxilio_emergencial, 'Utilização de auxílio emergencial (em %)')
-    st.pyplot(fig8)
+    exibir_grafico('auxilio_emergencial')
 
 
 col9, col10 = st.columns(2)
 
 with col9:
     # Gráfico 9: Faixa de renda
-    faixa_salarial = df_filtrado['faixa_salarial'].value_counts(normalize=True) * 100
-    faixa_salarial.sort_values(ascending=False, inplace=True)
-    fig9, ax9 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=faixa_salarial.values, y=faixa_salarial.index, color='sienna', ax=ax9)
-    for p in ax9.patches:
-        ax9.annotate(f'{p.get_width():.1f}%', (p.get_x() + p.get_width(), p.get_y() + p.get_height() / 2), ha='center', va='center', xytext=(25, 0), textcoords='offset points', fontsize=8)
-    grafico_horizontal(ax9, faixa_salarial, 'Faixa de renda dos entrevistados (em %)')
-    st.pyplot(fig9)
+    exibir_grafico('faixa_salarial')
 
 with col10:
     # Gráfico 10: Moradia
-    moradia = df_filtrado['moradia'].value_counts(normalize=True) * 100
-    moradia.sort_values(ascending=False, inplace=True)
-    fig10, ax10 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=moradia.values, y=moradia.index, color='sienna', ax=ax10)
-    for p in ax10.patches:
-        ax10.annotate(f'{p.get_width():.1f}%', (p.get_x() + p.get_width(), p.get_y() + p.get_height() / 2), ha='center', va='center', xytext=(25, 0), textcoords='offset points', fontsize=8)
-    grafico_horizontal(ax10, moradia, 'Situação de moradia dos entrevistados (em %)')
-    st.pyplot(fig10)
+    exibir_grafico('moradia')
 
 
 st.markdown("---")
@@ -323,52 +223,21 @@ col11, col12 = st.columns(2)
 
 with col11:
     # Gráfico 11: Idade dos entrevistados
-    bins = [0, 10, 20, 30, 40, 50, 60, 70, 120]
-    labels = ['0-10', '11-20', '21-30', '31-40', '41-50', '51-60', '61-70', '71+']
-    df_filtrado['faixa_etaria'] = pd.cut(df_filtrado['idade'], bins=bins, labels=labels, right=True, include_lowest=True)
-    contagem_idade = df_filtrado['faixa_etaria'].value_counts(normalize=True) * 100
-    contagem_idade.sort_values(ascending=False, inplace=True)
-    fig11, ax11 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_idade.index, y=contagem_idade.values, color='sienna', ax=ax11)
-    for p in ax11.patches:
-        ax11.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax11, contagem_idade, 'Idade dos entrevistados (em %)')
-    st.pyplot(fig11)
+    exibir_grafico('faixa_etaria')
 
 with col12:
     # Gráfico 12: Gênero
-    contagem_sexo = df_filtrado['sexo'].value_counts(normalize=True) * 100
-    contagem_sexo.sort_values(ascending=False, inplace=True)
-    fig12, ax12 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_sexo.index, y=contagem_sexo.values, color='sienna', ax=ax12)
-    for p in ax12.patches:
-        ax12.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax12, contagem_sexo, 'Gênero dos entrevistados (em %)')
-    st.pyplot(fig12)
+    exibir_grafico('sexo')
 
 col13, col14 = st.columns(2)
 
 with col13:
     # Gráfico 13: Cor/Raça
-    contagem_cor = df_filtrado['cor'].value_counts(normalize=True) * 100
-    contagem_cor.sort_values(ascending=False, inplace=True)
-    fig13, ax13 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_cor.index, y=contagem_cor.values, color='sienna', ax=ax13)
-    for p in ax13.patches:
-        ax13.annotate(f'{p.get_height():.1f}%', (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=8)
-    grafico_vertical(ax13, contagem_cor, 'Cor/Raça dos entrevistados (em %)')
-    st.pyplot(fig13)
+    exibir_grafico('cor')
 
 with col14:
     # Gráfico 14: Escolaridade
-    contagem_escolaridade = df_filtrado['escolaridade'].value_counts(normalize=True) * 100
-    contagem_escolaridade.sort_values(ascending=False, inplace=True)
-    fig14, ax14 = plt.subplots(figsize=(8, 6))
-    sns.barplot(x=contagem_escolaridade.values, y=contagem_escolaridade.index, color='sienna', ax=ax14)
-    for p in ax14.patches:
-        ax14.annotate(f'{p.get_width():.1f}%', (p.get_x() + p.get_width(), p.get_y() + p.get_height() / 2), ha='center', va='center', xytext=(25, 0), textcoords='offset points', fontsize=8)
-    grafico_horizontal(ax14, contagem_escolaridade, 'Escolaridade dos entrevistados (em %)')
-    st.pyplot(fig14)
+    exibir_grafico('escolaridade')
 
 st.markdown("---")
 
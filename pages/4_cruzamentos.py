@@ -0,0 +1,110 @@
+import streamlit as st
+
+from dashboard.cruzamentos import CrossTabs, current_version
+
+# Medida exibida na tabela -> descrição
+MEDIDAS = {
+    'Contagem': 'Entrevistados em cada combinação (ou população estimada, se ponderado).',
+    '% da linha': 'Distribuição da segunda variável dentro de cada categoria da primeira.',
+    '% da coluna': 'Distribuição da primeira variável dentro de cada categoria da segunda.',
+    'Lift': 'Observado / esperado se as variáveis fossem independentes (acima de 1: mais frequente que o acaso).',
+}
+
+# Rótulo -> recorte das tabelas
+RECORTES = {'Com sintomas': 'com_sintomas', 'Todos os entrevistados': 'todos'}
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_crosstabs(versao):
+    """Tabelas cruzadas da ``versao``, lidas uma vez e compartilhadas entre as sessões."""
+    return CrossTabs.load(versao=versao)
+
+
+def nome_dimensao(dimensao):
+    return dimensao.replace('_', ' ').capitalize()
+
+
+# Configuração da página Streamlit
+st.set_page_config(layout="wide")
+st.title("🔎 Cruzamentos")
+st.markdown("""
+Explore a relação entre duas variáveis do questionário, como sintomas e renda, isolamento e trabalho ou internação
+e comorbidades. Todas as tabelas foram pré-calculadas a partir da Gold (`python -m dashboard.cruzamentos`), então
+trocar de par não consulta o banco.
+""")
+st.markdown("---")
+
+versao = current_version()
+cruzamentos = load_crosstabs(versao) if versao else None
+if cruzamentos is None:
+    st.error("❌ Nenhuma tabela cruzada encontrada. Execute `python -m dashboard.cruzamentos`.")
+    st.stop()
+
+# Opções na barra lateral
+st.sidebar.header("Opções")
+recorte = RECORTES[st.sidebar.radio("Recorte", list(RECORTES))]
+ponderado = st.sidebar.checkbox("Estimativa populacional (peso amostral)")
+incluir_desconhecido = st.sidebar.checkbox("Incluir respostas desconhecidas")
+
+dimensoes = cruzamentos.dimensoes
+col1, col2, col3 = st.columns(3)
+with col1:
+    a = st.selectbox("Variável das linhas", dimensoes, index=dimensoes.index('precisou_de_internacao'),
+                     format_func=nome_dimensao)
+with col2:
+    b = st.selectbox("Variável das colunas", dimensoes, index=dimensoes.index('faixa_etaria'),
+                     format_func=nome_dimensao)
+with col3:
+    medida = st.radio("Medida", list(MEDIDAS), horizontal=True)
+
+if a == b:
+    st.warning("Escolha duas variáveis diferentes.")
+    st.stop()
+
+# --- Tabela do par escolhido ---
+tabela = cruzamentos.table(a, b, recorte, ponderado, incluir_desconhecido)
+if medida == '% da linha':
+    exibida = tabela.div(tabela.sum(axis=1).where(lambda s: s > 0), axis=0) * 100
+elif medida == '% da coluna':
+    exibida = tabela.div(tabela.sum(axis=0).where(lambda s: s > 0), axis=1) * 100
+elif medida == 'Lift':
+    exibida = cruzamentos.lift(a, b, recorte, incluir_desconhecido)
+else:
+    exibida = tabela
+
+estatisticas = cruzamentos.statistics(a, b, recorte, incluir_desconhecido)
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Entrevistados", f"{estatisticas['n']:,}".replace(',', '.'))
+m2.metric("χ²", f"{estatisticas['chi2']:,.1f}".replace(',', '.'))
+m3.metric("Graus de liberdade", estatisticas['gl'])
+m4.metric("V de Cramér", f"{estatisticas['v_cramer']:.3f}")
+
+st.caption(MEDIDAS[medida])
+st.dataframe(exibida.style.format('{:,.0f}' if medida == 'Contagem' else '{:.2f}', na_rep='-'),
+             width='stretch')
+
+if medida in ('% da linha', '% da coluna'):
+    st.bar_chart(exibida if medida == '% da linha' else exibida.T)
+
+st.markdown("---")
+
+# --- Associações mais fortes ---
+st.header("Associações mais fortes")
+st.write(
+    """
+    Todos os pares de variáveis, ordenados pelo V de Cramér (0 = independentes, 1 = uma determina a outra).
+    Com centenas de milhares de entrevistados quase todo χ² é estatisticamente significativo, por isso o V,
+    que não cresce com o tamanho da amostra, é a medida usada para comparar os pares.
+    """
+)
+associacoes = cruzamentos.associations(recorte, incluir_desconhecido)
+associacoes['dimensao_a'] = associacoes['dimensao_a'].map(nome_dimensao)
+associacoes['dimensao_b'] = associacoes['dimensao_b'].map(nome_dimensao)
+st.dataframe(
+    associacoes.head(20).rename(columns={'dimensao_a': 'Variável A', 'dimensao_b': 'Variável B',
+                                         'n': 'Entrevistados', 'chi2': 'χ²', 'gl': 'Graus de liberdade',
+                                         'v_cramer': 'V de Cramér'}),
+    width='stretch', hide_index=True,
+)
+
+st.info(f"Tabelas calculadas em {cruzamentos.gerado_em} (versão da Gold `{cruzamentos.versao}`).")
@@ -0,0 +1 @@
+"""Funções reutilizáveis do ETL PNAD-COVID (Raw -> Bronze -> Silver -> Gold)."""
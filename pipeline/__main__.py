@@ -0,0 +1,5 @@
+"""``python -m pipeline``: executa o pipeline completo (ver ``pipeline.execucao``)."""
+
+from pipeline.execucao import main
+
+main()
@@ -0,0 +1,480 @@
+"""Transformações Raw -> Bronze -> Silver -> Gold em streaming, com memória limitada.
+
+Cada etapa lê a camada anterior em lotes (``record batches``), aplica a
+transformação lote a lote e grava a saída em row groups, abrindo um novo
+arquivo a cada ``ROWS_PER_FILE`` linhas. O pico de memória passa a depender
+do tamanho do lote e de um objeto de entrada, não do tamanho da base.
+
+As funções ``transform_*`` recebem um ``DataFrame`` qualquer (lote ou base
+inteira); o ``tech_challenge.ipynb`` e o ``python -m pipeline`` as executam
+pelo DAG de ``pipeline.execucao``.
+
+As camadas são particionadas por ano e mês no estilo Hive, com o nome que
+as colunas têm em cada camada (``raw/Ano=2020/V1013=9/``,
+``gold/ano=2020/mes_pesquisa=9/``); as colunas de partição continuam
+dentro dos arquivos, então o esquema é o mesmo com ou sem partições. Cada
+gravação vai para uma pasta própria dentro da partição
+(``.../<execucao>/part-0000.parquet``) e só vale depois de publicada no
+manifesto da camada (ver ``pipeline.s3.commit_partitions``): reexecutar uma
+etapa substitui as partições em vez de somar arquivos.
+
+O registro de cada partição no manifesto guarda a versão da partição de
+origem (``origem``) e do código (``codigo``) com que foi gerada; as etapas
+``run_*`` reprocessam só as partições desatualizadas (``stale_partitions``)
+e mantêm as demais.
+"""
+
+import datetime
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from pipeline.mapeamentos import COLUNAS_GOLD, COLUNAS_SILVER
+from pipeline.s3 import (MultipartUpload, add_partition_columns, commit_layer, commit_partitions, delete_keys,
+                         list_parquet_keys, load_layer_manifest)
+from pipeline.transformacoes import encode_gold_codes
+
+# Linhas por lote lido
+BATCH_SIZE = 100_000
+# Linhas por row group gravado (unidade que os leitores pulam pelas estatísticas min/max)
+ROW_GROUP_SIZE = 100_000
+# Linhas por arquivo de saída antes de abrir o próximo
+ROWS_PER_FILE = 1_000_000
+# Acima deste tamanho o arquivo temporário sai da memória e vai para o disco
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Ordem das linhas dentro de cada row group da Gold (nomes da Silver; ver sort_columns)
+ORDENACAO = ('uf', 'v1013')
+# Colunas de alta cardinalidade (identificadores e pesos, com os nomes de todas as camadas), gravadas sem dicionário
+COLUNAS_SEM_DICIONARIO = {'upa', 'estrato', 'v1031', 'v1032', 'peso'}
+
+# Colunas que a Silver cria no merge com a tabela de UFs
+COLUNAS_MERGE_UF = {'estado', 'sigla', 'regiao'}
+
+# Colunas de partição (nomes da Silver; ver sort_columns para o nome em cada camada)
+PARTICOES = ('ano', 'v1013')
+
+
+def partition_id(valores) -> str:
+    """Identificador da partição no manifesto (``ano=2020/v1013=9``), o mesmo em todas as camadas."""
+    return '/'.join(f"{coluna}={int(valor)}" for coluna, valor in zip(PARTICOES, valores))
+
+
+def layer_partitions(s3_client, bucket: str, prefix: str) -> dict:
+    """Partições publicadas no manifesto da camada (``{}`` para camada vazia ou gravada sem partições)."""
+    return (load_layer_manifest(s3_client, bucket, prefix) or {}).get('particoes', {})
+
+
+def stale_partitions(origem: dict, destino: dict, codigo: str = None, completo: bool = False) -> tuple:
+    """Partições de ``origem`` a reprocessar no ``destino`` e partições do ``destino`` a remover.
+
+    Uma partição é reprocessada se não existe no destino, se foi gerada de
+    outra versão da origem (``execucao`` da origem diferente do ``origem``
+    gravado) ou de outro ``codigo``; com ``completo``, todas são. Partições
+    que sumiram da origem são removidas. Devolve ``(ids em ordem, ids a remover)``.
+    """
+    a_processar = [
+        pid for pid in origem
+        if completo or pid not in destino or destino[pid].get('origem') != origem[pid]['execucao']
+        or destino[pid].get('codigo') != codigo
+    ]
+    return sorted(a_processar, key=lambda pid: origem[pid]['valores']), set(destino) - set(origem)
+
+
+def iter_file_batches(s3_client, bucket: str, keys: list, columns=None, batch_size: int = BATCH_SIZE):
+    """Percorre os arquivos ``keys`` devolvendo ``DataFrame``s de até ``batch_size`` linhas.
+
+    Apenas um objeto fica baixado por vez (em arquivo temporário que vai para
+    o disco se passar de ``SPOOL_MAX_BYTES``), e só as ``columns`` pedidas são
+    decodificadas.
+    """
+    for key in keys:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as tmp:
+            s3_client.download_fileobj(bucket, key, tmp)
+            tmp.seek(0)
+            arquivo = pq.ParquetFile(tmp)
+            colunas = None if columns is None else [c for c in columns if c in arquivo.schema_arrow.names]
+            for lote in arquivo.iter_batches(batch_size=batch_size, columns=colunas):
+                yield add_partition_columns(pa.Table.from_batches([lote]), key, columns).to_pandas()
+
+
+def iter_layer_batches(s3_client, bucket: str, prefix: str, columns=None, batch_size: int = BATCH_SIZE):
+    """Percorre os arquivos vigentes de uma camada em lotes (ver ``iter_file_batches``)."""
+    yield from iter_file_batches(s3_client, bucket, list_parquet_keys(s3_client, bucket, prefix), columns, batch_size)
+
+
+def layer_schema(s3_client, bucket: str, prefix: str) -> pa.Schema:
+    """Esquema Arrow da camada, lido só do rodapé do primeiro arquivo (``None`` se a camada está vazia)."""
+    chaves = list_parquet_keys(s3_client, bucket, prefix)
+    if not chaves:
+        return None
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as tmp:
+        s3_client.download_fileobj(bucket, chaves[0], tmp)
+        tmp.seek(0)
+        return pq.ParquetFile(tmp).schema_arrow
+
+
+def layer_columns(s3_client, bucket: str, prefix: str) -> list:
+    """Nomes das colunas da camada, lidos só do rodapé do primeiro arquivo."""
+    schema = layer_schema(s3_client, bucket, prefix)
+    return [] if schema is None else schema.names
+
+
+def sort_columns(colunas: list, ordenar_por=ORDENACAO) -> list:
+    """Colunas de ``ordenar_por`` presentes na camada, com o nome que têm nela (``UF`` na Raw, ``mes_pesquisa`` na Gold)."""
+    por_nome = {coluna.lower(): coluna for coluna in colunas}
+    encontradas = []
+    for coluna in ordenar_por:
+        for nome in (coluna.lower(), COLUNAS_GOLD.get(coluna.lower())):
+            if nome in por_nome:
+                encontradas.append(por_nome[nome])
+                break
+    return encontradas
+
+
+def dictionary_columns(schema: pa.Schema) -> list:
+    """Colunas gravadas com dicionário: todas as de código, exceto identificadores e pesos."""
+    return [nome for nome in schema.names if nome.lower() not in COLUNAS_SEM_DICIONARIO]
+
+
+class LayerWriter:
+    """Grava lotes de uma camada como arquivos Parquet no S3.
+
+    O esquema é fixado pelo primeiro lote; os seguintes são convertidos para
+    ele. Os lotes são juntados em row groups de ``row_group_size`` linhas e
+    cada arquivo é enviado em partes enquanto é escrito
+    (``pipeline.s3.MultipartUpload``); a cada ``rows_per_file`` linhas outro
+    arquivo é aberto; a memória fica em um row group mais as partes em envio.
+    Com ``ordenar_por`` (ex.: ``ORDENACAO``), as linhas de cada row group são
+    ordenadas por essas colunas antes de gravar: as páginas cobrem poucas UFs
+    e meses (estatísticas mais seletivas, dicionários e RLE menores) e, como
+    os microdados já chegam agrupados por UF, cada row group também cobre
+    poucas UFs. A ordenação não muda o limite de memória: ainda é um row group
+    pendente (mais a cópia ordenada dele). Colunas de código são gravadas com
+    dicionário.
+
+    Com ``particionar_por`` (ex.: ``PARTICOES``), cada lote é separado pelos
+    valores dessas colunas e cada arquivo fica dentro de uma partição
+    (``<camada>/ano=2020/v1013=9/<execucao>/``): ao mudar de partição, o
+    arquivo atual é fechado. Lotes que chegam agrupados por partição (como
+    na leitura de uma camada particionada) dão um arquivo por partição.
+
+    Os arquivos vão para ``<camada>/<execucao>/`` e, ao sair do ``with`` sem
+    erro, são publicados como a nova versão da camada (as anteriores são
+    apagadas); com ``incremental``, só as partições gravadas (e as de
+    ``remover``) são substituídas e as demais continuam valendo. ``origens``
+    (``{id: execucao da partição de origem}``) e ``codigo`` vão para o
+    registro de cada partição (ver ``stale_partitions``). Com erro, os
+    arquivos já enviados são apagados e a camada continua como estava. Sem
+    nenhuma linha gravada, nada é publicado e a camada também continua como
+    estava.
+    """
+
+    def __init__(self, s3_client, bucket: str, layer_name: str, rows_per_file: int = ROWS_PER_FILE,
+                 compression: str = 'snappy', row_group_size: int = ROW_GROUP_SIZE, ordenar_por=None,
+                 particionar_por=None, incremental: bool = False, remover=(), origens: dict = None,
+                 codigo: str = None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.layer_name = layer_name
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.ordenar_por = tuple(ordenar_por or ())
+        self.particionar_por = tuple(particionar_por or ())
+        self.incremental = incremental
+        self.remover = set(remover)
+        self.origens = origens or {}
+        self.codigo = codigo
+        self.schema = None
+        self.keys = []
+        self.rows = 0
+        # {partition_id: registro} das partições gravadas, publicado por commit_partitions
+        self.particoes = {}
+        self.execucao = f"{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:8]}"
+        self._upload = None
+        self._writer = None
+        self._pendentes = []
+        self._linhas_pendentes = 0
+        self._linhas_arquivo = 0
+        self._ordenacao = []
+        self._colunas_particao = []
+        self._particao = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def _set_schema(self, df: pd.DataFrame):
+        self.schema = pa.Schema.from_pandas(df, preserve_index=False)
+        self._ordenacao = [(coluna, 'ascending') for coluna in sort_columns(self.schema.names, self.ordenar_por)]
+        self._colunas_particao = sort_columns(self.schema.names, self.particionar_por)
+        if len(self._colunas_particao) != len(self.particionar_por):
+            raise ValueError(f"Colunas de partição {list(self.particionar_por)} ausentes na camada {self.layer_name}")
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self.schema is None:
+            self._set_schema(df)
+        if not self._colunas_particao:
+            self._append(df)
+            return
+        for valores, grupo in df.groupby(self._colunas_particao, sort=False, dropna=False):
+            valores = tuple(int(valor) for valor in valores)
+            if valores != self._particao:
+                self._flush()
+                self._particao = valores
+            self._append(grupo)
+
+    def _append(self, df: pd.DataFrame):
+        tabela = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self._pendentes.append(tabela)
+        self._linhas_pendentes += len(tabela)
+        self._linhas_arquivo += len(tabela)
+        self.rows += len(tabela)
+        if self._linhas_arquivo >= self.rows_per_file:
+            self._flush()
+        elif self._linhas_pendentes >= self.row_group_size:
+            self._write_row_groups(final=False)
+
+    def _write_row_groups(self, final: bool):
+        """Grava as linhas pendentes em row groups completos (e, no fim do arquivo, também o resto)."""
+        if not self._pendentes:
+            return
+        tabela = pa.concat_tables(self._pendentes)
+        linhas = len(tabela) if final else len(tabela) // self.row_group_size * self.row_group_size
+        # No fim do arquivo, as linhas restantes são divididas por igual (sem um row group minúsculo no final)
+        grupos = -(-linhas // self.row_group_size)
+        tamanho = -(-linhas // grupos) if final and grupos else self.row_group_size
+        if self._writer is None:
+            pastas = ''.join(f"{coluna}={valor}/" for coluna, valor in zip(self._colunas_particao, self._particao or ()))
+            s3_key = f"{self.layer_name}/{pastas}{self.execucao}/part-{len(self.keys):04d}.parquet"
+            self._upload = MultipartUpload(self.s3_client, self.bucket, s3_key)
+            self._writer = pq.ParquetWriter(self._upload, self.schema, compression=self.compression,
+                                            use_dictionary=dictionary_columns(self.schema))
+        for inicio in range(0, linhas, tamanho):
+            fim = min(inicio + tamanho, linhas)
+            grupo = tabela.slice(inicio, fim - inicio)
+            if self._ordenacao:
+                grupo = grupo.take(pc.sort_indices(grupo, sort_keys=self._ordenacao))
+            self._writer.write_table(grupo, row_group_size=tamanho)
+        self._pendentes = [tabela.slice(linhas)] if linhas < len(tabela) else []
+        self._linhas_pendentes = len(tabela) - linhas
+
+    def _flush(self):
+        self._write_row_groups(final=True)
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._upload.complete()
+        self.keys.append(self._upload.key)
+        if self._colunas_particao:
+            pid = partition_id(self._particao)
+            registro = self.particoes.setdefault(pid, {
+                'valores': list(self._particao), 'arquivos': [], 'linhas': 0, 'execucao': self.execucao,
+                'origem': self.origens.get(pid), 'codigo': self.codigo})
+            registro['arquivos'].append(self._upload.key)
+            registro['linhas'] += self._linhas_arquivo
+        print(f"✅ Salvo na camada {self.layer_name}: s3://{self.bucket}/{self._upload.key} ({self._linhas_arquivo} linhas)")
+        self._upload, self._writer, self._linhas_arquivo = None, None, 0
+
+    def _discard(self):
+        if self._upload is not None:
+            self._upload.abort()
+        self._upload, self._writer, self._linhas_arquivo = None, None, 0
+        self._pendentes, self._linhas_pendentes = [], 0
+        delete_keys(self.s3_client, self.bucket, self.keys)
+        self.keys, self.particoes = [], {}
+
+    def close(self):
+        """Envia o último arquivo e publica a gravação no manifesto da camada."""
+        self._flush()
+        if not self.keys and not (self.incremental and self.remover):
+            print(f"❌ Nenhum dado gravado na camada {self.layer_name}; versão vigente mantida.")
+            return
+        if not self.particionar_por:
+            commit_layer(self.s3_client, self.bucket, self.layer_name, self.keys, self.execucao, self.rows)
+            return
+        remover = self.remover if self.incremental else layer_partitions(self.s3_client, self.bucket, self.layer_name)
+        commit_partitions(self.s3_client, self.bucket, self.layer_name, self.particoes, self.execucao,
+                          remover=set(remover) - set(self.particoes))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits do conteúdo de cada linha.
+
+    Colunas numéricas são convertidas para ``float64`` antes do hash: o mesmo
+    valor chega como ``int64`` em um lote sem nulos e ``float64`` em outro.
+    """
+    numericas = df.select_dtypes(include='number').columns
+    normalizado = df.astype({col: 'float64' for col in numericas})
+    return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+
+class RowDeduplicator:
+    """Remove linhas repetidas entre lotes guardando só o hash de cada linha já vista.
+
+    Usa 8 bytes por linha distinta (um vetor ordenado de ``uint64``) em vez de
+    manter a base inteira em memória como o ``drop_duplicates``. Cada lote só
+    ordena os próprios hashes e os intercala no vetor (``searchsorted`` +
+    ``insert``), uma cópia linear por lote. A chance de
+    colisão de hashes de 64 bits é desprezível para o volume da PNAD.
+    """
+
+    def __init__(self):
+        self._vistos = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._vistos)
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        hashes = row_hashes(df)
+        # Primeira ocorrência de cada hash dentro do lote
+        unicos, primeiros = np.unique(hashes, return_index=True)
+        manter = np.zeros(len(df), dtype=bool)
+        pos = np.searchsorted(self._vistos, unicos)
+        if len(self._vistos):
+            ja_vistos = self._vistos[np.minimum(pos, len(self._vistos) - 1)] == unicos
+        else:
+            ja_vistos = np.zeros(len(unicos), dtype=bool)
+        manter[primeiros[~ja_vistos]] = True
+        # Intercala os hashes novos (já ordenados) nas posições achadas, sem reordenar os vistos
+        self._vistos = np.insert(self._vistos, pos[~ja_vistos], unicos[~ja_vistos])
+        return df[manter]
+
+
+def transform_bronze(df: pd.DataFrame, deduplicador: RowDeduplicator = None) -> pd.DataFrame:
+    """Limpeza da Bronze: remove duplicadas, trata nulos (-1) e padroniza tipos."""
+    if deduplicador is not None:
+        df_bronze = deduplicador.filter(df)
+    else:
+        df_bronze = df.drop_duplicates()
+
+    # Numéricas em float64: o esquema não varia conforme o lote tenha ou não nulos
+    numericas = df_bronze.select_dtypes(include='number').columns
+    df_bronze = df_bronze.astype({col: 'float64' for col in numericas}).fillna(-1)
+    if 'V1008' in df_bronze.columns:
+        df_bronze['V1008'] = pd.to_numeric(df_bronze['V1008'], errors='coerce').astype('Int64')
+    return df_bronze
+
+
+def silver_source_columns(colunas_bronze: list) -> list:
+    """Colunas da Bronze que a Silver usa (projeção feita já na leitura)."""
+    necessarias = set(COLUNAS_SILVER) - COLUNAS_MERGE_UF
+    return [col for col in colunas_bronze if col.lower() in necessarias]
+
+
+def transform_silver(df: pd.DataFrame, df_uf: pd.DataFrame) -> pd.DataFrame:
+    """Enriquecimento da Silver: merge com as UFs, colunas minúsculas e seleção de colunas."""
+    df_silver = pd.merge(df, df_uf, how='left', left_on='UF', right_on='Código')
+    df_silver = df_silver.drop(columns=["Código"])
+    df_silver = df_silver.rename(columns={"UF_x": "UF", "UF_y": "Estado", "Região": "Regiao"})
+    df_silver.columns = df_silver.columns.str.lower()
+    return df_silver[COLUNAS_SILVER]
+
+
+def transform_gold(df: pd.DataFrame) -> pd.DataFrame:
+    """Gold: colunas renomeadas e códigos compactos."""
+    return encode_gold_codes(df)
+
+
+def _check_source(linhas_entrada: int, bucket: str, origem: str):
+    """Interrompe a etapa quando a camada de origem está vazia ou não existe, sem tocar no destino."""
+    if not linhas_entrada:
+        raise ValueError(f"❌ Nenhum dado para processar. Verifique a camada s3://{bucket}/{origem}.")
+
+
+def _plan(s3_client, bucket: str, origem: str, destino: str, codigo: str, completo: bool) -> tuple:
+    """Partições da origem e o que reprocessar/remover no destino (ver ``stale_partitions``)."""
+    origens = layer_partitions(s3_client, bucket, origem)
+    _check_source(sum(registro['linhas'] for registro in origens.values()), bucket, origem)
+    a_processar, remover = stale_partitions(origens, layer_partitions(s3_client, bucket, destino), codigo, completo)
+    if not a_processar and not remover:
+        print(f"➡️ s3://{bucket}/{destino} já está com as partições vigentes de {origem}. Nada a processar.")
+    return origens, a_processar, remover
+
+
+def _partition_writer(s3_client, bucket: str, destino: str, origens: dict, a_processar: list, remover: set,
+                      codigo: str, ordenar_por=None) -> LayerWriter:
+    return LayerWriter(s3_client, bucket, destino, ordenar_por=ordenar_por, particionar_por=PARTICOES,
+                       incremental=True, remover=remover, codigo=codigo,
+                       origens={pid: origens[pid]['execucao'] for pid in a_processar})
+
+
+def _summary(linhas_entrada: int, writer: LayerWriter = None, a_processar=()) -> dict:
+    return {'linhas_entrada': linhas_entrada, 'linhas_saida': writer.rows if writer else 0,
+            'arquivos': writer.keys if writer else [], 'esquema': writer.schema if writer else None,
+            'particoes': list(a_processar)}
+
+
+def run_bronze(s3_client, bucket: str, origem: str, destino: str, batch_size: int = BATCH_SIZE,
+               codigo: str = None, completo: bool = False) -> dict:
+    """Raw -> Bronze em streaming, só nas partições desatualizadas, com deduplicação por hash em cada partição.
+
+    Linhas repetidas têm o mesmo ano e mês, então deduplicar partição a
+    partição dá o mesmo resultado que na base inteira.
+    """
+    origens, a_processar, remover = _plan(s3_client, bucket, origem, destino, codigo, completo)
+    linhas_entrada = 0
+    if not a_processar and not remover:
+        return _summary(linhas_entrada)
+    with _partition_writer(s3_client, bucket, destino, origens, a_processar, remover, codigo) as writer:
+        for pid in a_processar:
+            deduplicador = RowDeduplicator()
+            for lote in iter_file_batches(s3_client, bucket, origens[pid]['arquivos'], batch_size=batch_size):
+                linhas_entrada += len(lote)
+                writer.write(transform_bronze(lote, deduplicador))
+        writer.remover.update(set(a_processar) - set(writer.particoes))
+    print(f"✅ Bronze: {len(a_processar)} partição(ões), {linhas_entrada} linhas lidas, "
+          f"{linhas_entrada - writer.rows} duplicadas removidas.")
+    return _summary(linhas_entrada, writer, a_processar)
+
+
+def run_silver(s3_client, bucket: str, origem: str, destino: str, df_uf: pd.DataFrame,
+               batch_size: int = BATCH_SIZE, codigo: str = None, completo: bool = False) -> dict:
+    """Bronze -> Silver em streaming, só nas partições desatualizadas, lendo só as colunas usadas."""
+    origens, a_processar, remover = _plan(s3_client, bucket, origem, destino, codigo, completo)
+    linhas_entrada = 0
+    if not a_processar and not remover:
+        return _summary(linhas_entrada)
+    colunas = silver_source_columns(layer_columns(s3_client, bucket, origem))
+    with _partition_writer(s3_client, bucket, destino, origens, a_processar, remover, codigo) as writer:
+        for pid in a_processar:
+            for lote in iter_file_batches(s3_client, bucket, origens[pid]['arquivos'], columns=colunas,
+                                          batch_size=batch_size):
+                linhas_entrada += len(lote)
+                writer.write(transform_silver(lote, df_uf))
+        writer.remover.update(set(a_processar) - set(writer.particoes))
+    print(f"✅ Silver: {len(a_processar)} partição(ões), {writer.rows} linhas gravadas.")
+    return _summary(linhas_entrada, writer, a_processar)
+
+
+def run_gold(s3_client, bucket: str, origem: str, destino: str, batch_size: int = BATCH_SIZE,
+             codigo: str = None, completo: bool = False) -> dict:
+    """Silver -> Gold em streaming, só nas partições desatualizadas, com os row groups ordenados por UF e mês."""
+    origens, a_processar, remover = _plan(s3_client, bucket, origem, destino, codigo, completo)
+    linhas_entrada = 0
+    if not a_processar and not remover:
+        return _summary(linhas_entrada)
+    with _partition_writer(s3_client, bucket, destino, origens, a_processar, remover, codigo,
+                           ordenar_por=ORDENACAO) as writer:
+        for pid in a_processar:
+            for lote in iter_file_batches(s3_client, bucket, origens[pid]['arquivos'], batch_size=batch_size):
+                linhas_entrada += len(lote)
+                writer.write(transform_gold(lote))
+        writer.remover.update(set(a_processar) - set(writer.particoes))
+    print(f"✅ Gold: {len(a_processar)} partição(ões), {writer.rows} linhas gravadas.")
+    return _summary(linhas_entrada, writer, a_processar)
@@ -0,0 +1,192 @@
+"""Registro das camadas no Glue Data Catalog (consulta pelo Athena).
+
+O pipeline já sabe o esquema Parquet e as partições que acabou de gravar,
+então a tabela e as partições são criadas ou atualizadas diretamente pela
+API do Glue, em segundos, sem o crawler varrer o prefixo inteiro. O crawler
+continua disponível como alternativa (``run_crawler_and_wait``), agora com
+espera exponencial em vez de intervalos fixos de 180 s.
+"""
+
+import time
+
+import pyarrow as pa
+from botocore.exceptions import ClientError
+
+# Formato Parquet no Hive/Athena
+INPUT_FORMAT = 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat'
+OUTPUT_FORMAT = 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat'
+SERDE = 'org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe'
+
+# Colunas de partição da Gold (``gold/ano=<a>/mes_pesquisa=<m>/``) e seus tipos no catálogo
+PARTICOES_GLUE = (('ano', 'int'), ('mes_pesquisa', 'int'))
+
+# Limite de partições por chamada do ``batch_create_partition``
+LOTE_PARTICOES = 100
+
+# Espera do crawler: começa curta e dobra a cada consulta, até o teto
+ESPERA_INICIAL = 5
+ESPERA_MAXIMA = 60
+TEMPO_LIMITE_CRAWLER = 1800
+
+
+def glue_type(tipo: pa.DataType) -> str:
+    """Tipo Hive/Athena de um tipo Arrow."""
+    if pa.types.is_dictionary(tipo):
+        return glue_type(tipo.value_type)
+    if pa.types.is_int8(tipo):
+        return 'tinyint'
+    if pa.types.is_int16(tipo):
+        return 'smallint'
+    if pa.types.is_int32(tipo):
+        return 'int'
+    if pa.types.is_int64(tipo):
+        return 'bigint'
+    if pa.types.is_float32(tipo):
+        return 'float'
+    if pa.types.is_floating(tipo):
+        return 'double'
+    if pa.types.is_boolean(tipo):
+        return 'boolean'
+    if pa.types.is_timestamp(tipo):
+        return 'timestamp'
+    if pa.types.is_date(tipo):
+        return 'date'
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return 'string'
+    raise ValueError(f"Tipo Arrow sem equivalente no Glue: {tipo}")
+
+
+def glue_columns(schema: pa.Schema, excluir=()) -> list:
+    """Colunas ``[{'Name', 'Type'}]`` do catálogo a partir do esquema Parquet."""
+    return [{'Name': campo.name, 'Type': glue_type(campo.type)} for campo in schema if campo.name not in excluir]
+
+
+def _storage_descriptor(colunas: list, location: str) -> dict:
+    return {
+        'Columns': colunas,
+        'Location': location,
+        'InputFormat': INPUT_FORMAT,
+        'OutputFormat': OUTPUT_FORMAT,
+        'SerdeInfo': {'SerializationLibrary': SERDE, 'Parameters': {'serialization.format': '1'}},
+    }
+
+
+def table_input(tabela: str, location: str, schema: pa.Schema, particoes=()) -> dict:
+    """``TableInput`` de uma tabela externa Parquet (como a que o crawler criaria)."""
+    chaves = [{'Name': nome, 'Type': tipo} for nome, tipo in particoes]
+    return {
+        'Name': tabela,
+        'TableType': 'EXTERNAL_TABLE',
+        'Parameters': {'classification': 'parquet', 'EXTERNAL': 'TRUE'},
+        'StorageDescriptor': _storage_descriptor(glue_columns(schema, {nome for nome, _ in particoes}), location),
+        'PartitionKeys': chaves,
+    }
+
+
+def register_table(glue_client, database: str, tabela: str, location: str, schema: pa.Schema,
+                   particoes=()) -> str:
+    """Cria a tabela no Glue ou atualiza colunas/local se mudaram.
+
+    Retorna ``'criada'``, ``'atualizada'`` ou ``'inalterada'``.
+    """
+    entrada = table_input(tabela, location, schema, particoes)
+    try:
+        atual = glue_client.get_table(DatabaseName=database, Name=tabela)['Table']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'EntityNotFoundException':
+            raise
+        glue_client.create_table(DatabaseName=database, TableInput=entrada)
+        return 'criada'
+
+    descritor = atual.get('StorageDescriptor', {})
+    if (descritor.get('Columns') == entrada['StorageDescriptor']['Columns']
+            and descritor.get('Location') == location
+            and atual.get('PartitionKeys', []) == entrada['PartitionKeys']):
+        return 'inalterada'
+    glue_client.update_table(DatabaseName=database, TableInput=entrada)
+    return 'atualizada'
+
+
+def register_partitions(glue_client, database: str, tabela: str, location: str, schema: pa.Schema,
+                        valores: list, particoes=PARTICOES_GLUE) -> int:
+    """Registra as partições ``valores`` (ex.: ``[(2020, 9)]``); as já existentes são ignoradas.
+
+    Retorna quantas partições novas foram criadas.
+    """
+    colunas = glue_columns(schema, {nome for nome, _ in particoes})
+    base = location.rstrip('/')
+    entradas = []
+    for valor in valores:
+        pastas = '/'.join(f"{nome}={v}" for (nome, _), v in zip(particoes, valor))
+        entradas.append({
+            'Values': [str(v) for v in valor],
+            'StorageDescriptor': _storage_descriptor(colunas, f"{base}/{pastas}/"),
+        })
+
+    criadas = 0
+    for inicio in range(0, len(entradas), LOTE_PARTICOES):
+        lote = entradas[inicio:inicio + LOTE_PARTICOES]
+        resposta = glue_client.batch_create_partition(
+            DatabaseName=database, TableName=tabela, PartitionInputList=lote)
+        erros = [erro for erro in resposta.get('Errors', [])
+                 if erro['ErrorDetail']['ErrorCode'] != 'AlreadyExistsException']
+        if erros:
+            raise RuntimeError(f"Erro ao registrar partições de '{tabela}': {erros}")
+        criadas += len(lote) - len(resposta.get('Errors', []))
+    return criadas
+
+
+def register_layer(glue_client, database: str, bucket: str, prefix: str, schema: pa.Schema,
+                   valores_particoes: list = None, tabela: str = None) -> dict:
+    """Registra uma camada gravada em ``s3://bucket/prefix/`` (tabela com o nome da pasta, como o crawler).
+
+    Com ``valores_particoes`` a tabela é particionada por ``PARTICOES_GLUE`` e
+    essas partições são registradas; sem, é uma tabela sem partições.
+    """
+    tabela = tabela or prefix.strip('/').split('/')[-1]
+    location = f"s3://{bucket}/{prefix.strip('/')}/"
+    particoes = PARTICOES_GLUE if valores_particoes is not None else ()
+    situacao = register_table(glue_client, database, tabela, location, schema, particoes)
+    novas = 0
+    if valores_particoes:
+        novas = register_partitions(glue_client, database, tabela, location, schema, valores_particoes, particoes)
+    print(f"✅ Tabela '{database}.{tabela}' {situacao} no Glue ({novas} partição(ões) nova(s))")
+    return {'tabela': tabela, 'situacao': situacao, 'particoes_novas': novas}
+
+
+def run_crawler_and_wait(glue_client, crawler_name: str, espera_inicial: float = ESPERA_INICIAL,
+                         espera_maxima: float = ESPERA_MAXIMA, tempo_limite: float = TEMPO_LIMITE_CRAWLER):
+    """Executa o crawler e espera terminar, consultando com intervalo exponencial (5 s, 10 s, 20 s... até 60 s)."""
+    print(f"🚀 Iniciando execução do crawler '{crawler_name}'...")
+    try:
+        glue_client.start_crawler(Name=crawler_name)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'CrawlerRunningException':
+            raise
+        print(f"⚠️ O crawler '{crawler_name}' já estava em execução.")
+
+    inicio = time.monotonic()
+    espera = espera_inicial
+    while True:
+        status = glue_client.get_crawler(Name=crawler_name)['Crawler']['State']
+        if status == 'READY':
+            print(f"✅ Crawler '{crawler_name}' finalizado com sucesso!\n")
+            return
+        if time.monotonic() - inicio > tempo_limite:
+            raise TimeoutError(f"Crawler '{crawler_name}' não terminou em {tempo_limite} s")
+        print(f"⏳ Crawler em execução ({status}), nova consulta em {espera:.0f} s...")
+        time.sleep(espera)
+        espera = min(espera * 2, espera_maxima)
+
+
+def publish_layer(glue_client, database: str, bucket: str, prefix: str, schema: pa.Schema,
+                  valores_particoes: list = None, crawler_name: str = None) -> dict:
+    """Registra a camada direto no catálogo; se a API do Glue falhar e houver ``crawler_name``, usa o crawler."""
+    try:
+        return register_layer(glue_client, database, bucket, prefix, schema, valores_particoes)
+    except ClientError as e:
+        if crawler_name is None:
+            raise
+        print(f"❌ Erro ao registrar no Glue ({e}); usando o crawler '{crawler_name}'")
+        run_crawler_and_wait(glue_client, crawler_name)
+        return {'tabela': None, 'situacao': 'crawler', 'particoes_novas': None}
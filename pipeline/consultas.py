@@ -0,0 +1,143 @@
+"""Agregações do dashboard calculadas no banco.
+
+Ficam no ``pipeline`` (sem Streamlit) porque o ETL também as usa para
+pré-renderizar os gráficos logo após a carga (ver ``pipeline.execucao``).
+
+Em vez de trazer todas as linhas de ``questionario_covid`` para o pandas e
+calcular um ``value_counts`` por gráfico, uma única consulta calcula todas as
+distribuições com ``GROUP BY`` e devolve apenas as tabelas de contagem.
+
+A Gold guarda códigos inteiros; a consulta agrupa por código e os rótulos
+são aplicados aqui, só na hora de exibir.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+
+from pipeline.mapeamentos import (CODIGO_POSITIVO, CODIGO_SIM, COLUNA_COM_SINTOMAS, COLUNAS_SINTOMAS_PRINCIPAIS,
+                                  DESCONHECIDO, MAPEAMENTO_MORADIA, MAPEAMENTOS_GOLD)
+
+TABELA_QUESTIONARIO = 'questionario_covid'
+
+# Sintomas que definem o recorte "com sintomas" do dashboard
+COLUNAS_SINTOMAS = COLUNAS_SINTOMAS_PRINCIPAIS
+NOMES_SINTOMAS = {
+    'frebre_semana_anterior': 'Febre',
+    'tosse_semana_anterior': 'Tosse',
+    'dificuldade_de_respirar_semana_anterior': 'Dificuldade de respirar',
+    'perda_olfato_paladar_semana_anterior': 'Perda de olfato/paladar'
+}
+
+COLUNAS_TESTES = ['resultado_teste_swab', 'resultado_teste_dedo', 'resultado_teste_veia']
+NOMES_TESTES = {'resultado_teste_swab': 'Swab', 'resultado_teste_dedo': 'Dedo', 'resultado_teste_veia': 'Veia'}
+
+# Colunas categóricas exibidas diretamente como distribuição (value_counts)
+DIMENSOES = [
+    'buscou_auxilio_medico',
+    'precisou_de_internacao',
+    'precisou_de_sedacao',
+    'isolamento_social',
+    'trabalha_atualmente',
+    'auxilio_emergencial',
+    'faixa_salarial',
+    'sexo',
+    'cor',
+    'escolaridade'
+]
+
+# Mesmas faixas do pd.cut(bins=[0, 10, ..., 70, 120], right=True, include_lowest=True)
+FAIXAS_ETARIAS = [(0, 10, '0-10'), (11, 20, '11-20'), (21, 30, '21-30'), (31, 40, '31-40'),
+                  (41, 50, '41-50'), (51, 60, '51-60'), (61, 70, '61-70'), (71, 120, '71+')]
+
+
+# Dimensão do gráfico -> {código: rótulo} aplicado no resultado agregado
+ROTULOS = {
+    **{dim: MAPEAMENTOS_GOLD[dim] for dim in DIMENSOES},
+    'moradia': MAPEAMENTO_MORADIA,
+    'sintomas': {i: NOMES_SINTOMAS[col] for i, col in enumerate(COLUNAS_SINTOMAS)},
+    'testes': {i: NOMES_TESTES[col] for i, col in enumerate(COLUNAS_TESTES)},
+    'faixa_etaria': {i: rotulo for i, (_, _, rotulo) in enumerate(FAIXAS_ETARIAS)},
+}
+
+
+def filtro_sintomas() -> str:
+    """Condição SQL que seleciona quem teve ao menos um dos sintomas."""
+    return ' OR '.join(f"{col} = {CODIGO_SIM}" for col in COLUNAS_SINTOMAS)
+
+
+def _expressoes_dimensoes():
+    """Pares (dimensão, expressão SQL do código inteiro) desdobrados por linha."""
+    expressoes = [(col, f"CAST({col} AS INTEGER)") for col in DIMENSOES]
+
+    # Contagens de "Sim" por sintoma e de "Positivo" por tipo de teste (código = posição na lista)
+    for i, col in enumerate(COLUNAS_SINTOMAS):
+        expressoes.append(('sintomas', f"CASE WHEN {col} = {CODIGO_SIM} THEN {i} END"))
+    for i, col in enumerate(COLUNAS_TESTES):
+        expressoes.append(('testes', f"CASE WHEN {col} = {CODIGO_POSITIVO} THEN {i} END"))
+
+    faixas = ' '.join(f"WHEN idade BETWEEN {ini} AND {fim} THEN {i}" for i, (ini, fim, _) in enumerate(FAIXAS_ETARIAS))
+    expressoes.append(('faixa_etaria', f"CASE {faixas} END"))
+
+    expressoes.append(('moradia', "CAST(modaria AS INTEGER)"))
+    return expressoes
+
+
+def build_distribution_query(tabela: str = TABELA_QUESTIONARIO, filtro: str = None) -> str:
+    """Monta a consulta que devolve (dimensao, codigo, total) para todos os gráficos.
+
+    Cada linha do recorte é desdobrada em um par (dimensão, código) por
+    gráfico via ``CROSS JOIN LATERAL (VALUES ...)``; um único ``GROUP BY``
+    produz todas as contagens em uma varredura só. Códigos nulos são
+    descartados, como no ``value_counts`` do pandas.
+    """
+    valores = ',\n            '.join(f"('{dim}', {expr})" for dim, expr in _expressoes_dimensoes())
+    where = filtro or filtro_sintomas()
+    return f"""
+        WITH base AS (
+            SELECT * FROM {tabela} WHERE {where}
+        )
+        SELECT 'total' AS dimensao, 0 AS codigo, COUNT(*) AS total FROM base
+        UNION ALL
+        SELECT d.dimensao, d.codigo, COUNT(*) AS total
+        FROM base
+        CROSS JOIN LATERAL (VALUES
+            {valores}
+        ) AS d(dimensao, codigo)
+        WHERE d.codigo IS NOT NULL
+        GROUP BY d.dimensao, d.codigo
+    """
+
+
+def to_distributions(contagens: pd.DataFrame) -> dict:
+    """Converte o resultado agregado em percentuais por gráfico.
+
+    Recebe as colunas ``(dimensao, codigo, total)`` e retorna um dicionário
+    ``{dimensao: pd.Series}`` com os percentuais por rótulo em ordem
+    decrescente e a chave ``'total'`` com o número de linhas do recorte.
+    """
+    distribuicoes = {'total': 0}
+    for dimensao, grupo in contagens.groupby('dimensao', sort=False):
+        if dimensao == 'total':
+            distribuicoes['total'] = int(grupo['total'].sum())
+            continue
+        # Rótulos aplicados na borda; códigos com o mesmo rótulo (ex.: moradia 1 e 2) são somados
+        rotulos = grupo['codigo'].astype('int64').map(ROTULOS[dimensao]).fillna(DESCONHECIDO)
+        serie = grupo['total'].astype('int64').groupby(rotulos.to_numpy(), sort=False).sum()
+        serie.index.name = None
+        serie.name = dimensao
+        distribuicoes[dimensao] = (serie / serie.sum() * 100).sort_values(ascending=False)
+
+    # Gráficos sem nenhuma linha recebem uma série vazia (tratada em grafico_vertical/horizontal)
+    for dimensao in ROTULOS:
+        distribuicoes.setdefault(dimensao, pd.Series(dtype='float64', name=dimensao))
+    return distribuicoes
+
+
+def load_distributions(conn, tabela: str = TABELA_QUESTIONARIO) -> dict:
+    """Executa a agregação no Postgres em uma ida ao banco e devolve os percentuais.
+
+    O recorte usa a coluna pré-calculada ``has_symptom``, coberta pelo índice
+    parcial da tabela (ver ``pipeline.esquema``).
+    """
+    contagens = pd.read_sql_query(text(build_distribution_query(tabela, COLUNA_COM_SINTOMAS)), con=conn)
+    return to_distributions(contagens)
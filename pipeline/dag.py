@@ -0,0 +1,258 @@
+"""Executor de etapas com dependências (DAG), em paralelo e com retomada.
+
+Cada ``Tarefa`` declara de quais outras depende; as que não dependem umas
+das outras rodam ao mesmo tempo em um pool de threads (as etapas do pipeline
+passam a maior parte do tempo esperando S3, RDS ou Glue).
+
+Cada tarefa tem uma impressão digital: o hash das suas entradas (``chave``,
+ex.: os ``sha`` dos ZIPs de origem) e do código que ela executa
+(``code_version``) combinado com as impressões das dependências. O estado de cada execução (impressão e situação de cada
+tarefa) é gravado a cada tarefa concluída; na próxima execução, tarefas
+concluídas com a mesma impressão são puladas. Assim, depois de uma falha, a
+nova execução recomeça da tarefa que falhou, e uma mudança nas entradas
+refaz só a tarefa afetada e as que dependem dela.
+"""
+
+import ast
+import datetime
+import hashlib
+import inspect
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from pathlib import Path
+
+MAX_WORKERS = 4
+
+OK = 'ok'
+FALHOU = 'falhou'
+
+# Raiz do repositório: só módulos daqui entram na versão do código das tarefas
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+class Tarefa:
+    """Uma etapa do DAG.
+
+    ``funcao(contexto)`` executa a etapa; ``chave(contexto)`` devolve algo
+    serializável em JSON que identifica as entradas (``None``: só as
+    dependências contam). ``modulos`` são os módulos do repositório que a
+    etapa executa (ex.: ``'pipeline.camadas'``); eles e os que importam
+    entram na versão do código da tarefa (ver ``code_version``).
+    """
+
+    def __init__(self, nome: str, funcao, depende_de=(), chave=None, modulos=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.depende_de = tuple(depende_de)
+        self.chave = chave
+        self.modulos = tuple(modulos)
+
+    def __repr__(self):
+        return f"Tarefa({self.nome!r}, depende_de={self.depende_de})"
+
+
+def _agora() -> str:
+    return datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+
+
+def _module_file(nome: str):
+    """Arquivo de um módulo do repositório (``None`` para módulos de fora, como ``pandas``)."""
+    base = RAIZ.joinpath(*nome.split('.'))
+    for caminho in (base.with_suffix('.py'), base / '__init__.py'):
+        if caminho.is_file():
+            return caminho
+    return None
+
+
+def _imported_modules(caminho: Path) -> set:
+    """Módulos importados pelo arquivo, inclusive os importados dentro de funções."""
+    nomes = set()
+    for no in ast.walk(ast.parse(caminho.read_text(encoding='utf-8'))):
+        if isinstance(no, ast.Import):
+            nomes.update(alias.name for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            nomes.add(no.module)
+            # ``from pipeline import camadas`` importa o módulo ``pipeline.camadas``
+            nomes.update(f"{no.module}.{alias.name}" for alias in no.names)
+    return nomes
+
+
+def source_files(modulos) -> list:
+    """Arquivos de ``modulos`` e de todos os módulos do repositório que eles importam, em ordem."""
+    arquivos, pendentes = set(), list(modulos)
+    while pendentes:
+        caminho = _module_file(pendentes.pop())
+        if caminho is None or caminho in arquivos:
+            continue
+        arquivos.add(caminho)
+        pendentes.extend(_imported_modules(caminho))
+    return sorted(arquivos)
+
+
+def code_version(tarefa: Tarefa) -> str:
+    """Hash do código da tarefa: a própria ``funcao`` e os arquivos de ``tarefa.modulos`` (com o que importam).
+
+    Mudar uma regra refaz só as tarefas que executam o módulo alterado.
+    """
+    try:
+        fonte = inspect.getsource(tarefa.funcao)
+    except (OSError, TypeError):
+        # Função sem código-fonte disponível (embutida ou criada dinamicamente)
+        fonte = f"{getattr(tarefa.funcao, '__module__', '')}.{getattr(tarefa.funcao, '__qualname__', repr(tarefa.funcao))}"
+    h = hashlib.sha256(fonte.encode('utf-8'))
+    for caminho in source_files(tarefa.modulos):
+        h.update(caminho.relative_to(RAIZ).as_posix().encode())
+        h.update(caminho.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def topological_order(tarefas: list) -> list:
+    """Tarefas em uma ordem que respeita as dependências; erro para dependência desconhecida ou ciclo."""
+    por_nome = {tarefa.nome: tarefa for tarefa in tarefas}
+    for tarefa in tarefas:
+        desconhecidas = [dep for dep in tarefa.depende_de if dep not in por_nome]
+        if desconhecidas:
+            raise ValueError(f"Tarefa '{tarefa.nome}' depende de tarefas inexistentes: {desconhecidas}")
+
+    ordem, visitando, visitadas = [], set(), set()
+
+    def visitar(nome):
+        if nome in visitadas:
+            return
+        if nome in visitando:
+            raise ValueError(f"Ciclo de dependências passando por '{nome}'")
+        visitando.add(nome)
+        for dep in por_nome[nome].depende_de:
+            visitar(dep)
+        visitando.discard(nome)
+        visitadas.add(nome)
+        ordem.append(por_nome[nome])
+
+    for tarefa in tarefas:
+        visitar(tarefa.nome)
+    return ordem
+
+
+def select(tarefas: list, nomes) -> list:
+    """Subconjunto com as tarefas ``nomes`` e tudo de que elas dependem."""
+    por_nome = {tarefa.nome: tarefa for tarefa in tarefas}
+    escolhidas = set()
+    pendentes = list(nomes)
+    while pendentes:
+        nome = pendentes.pop()
+        if nome not in por_nome:
+            raise ValueError(f"Tarefa desconhecida: {nome}")
+        if nome not in escolhidas:
+            escolhidas.add(nome)
+            pendentes.extend(por_nome[nome].depende_de)
+    return [tarefa for tarefa in tarefas if tarefa.nome in escolhidas]
+
+
+def fingerprints(tarefas: list, contexto, versao: str = None) -> dict:
+    """Impressão digital de cada tarefa: hash da sua ``chave``, do seu código, das impressões das dependências e de ``versao``."""
+    impressoes = {}
+    for tarefa in topological_order(tarefas):
+        entrada = {
+            'tarefa': tarefa.nome,
+            'versao': versao,
+            'codigo': code_version(tarefa),
+            'chave': tarefa.chave(contexto) if tarefa.chave else None,
+            'dependencias': {dep: impressoes[dep] for dep in tarefa.depende_de},
+        }
+        impressoes[tarefa.nome] = hashlib.sha256(
+            json.dumps(entrada, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return impressoes
+
+
+def run_dag(tarefas: list, contexto, estado: dict = None, salvar_estado=None, max_workers: int = MAX_WORKERS,
+            forcar=(), versao: str = None, relatorio=None) -> dict:
+    """Executa as tarefas respeitando as dependências e devolve o estado atualizado.
+
+    ``estado`` é o da execução anterior (``{'tarefas': {nome: {...}}}``);
+    ``salvar_estado(estado)`` é chamado a cada tarefa concluída ou com falha.
+    Tarefas em ``forcar`` (e as que dependem delas) rodam mesmo sem mudança;
+    ``versao`` entra em todas as impressões (o código de cada tarefa já entra
+    pela ``code_version`` dela).
+    Se alguma tarefa falhar, as que já estão rodando terminam, nenhuma nova
+    começa e a primeira exceção é relançada. Com ``relatorio``
+    (``pipeline.metricas.RunReport``), cada tarefa executada é medida como
+    uma etapa; se a ``funcao`` devolver um dicionário com ``linhas_entrada``/
+    ``linhas_saida``, elas vão para a etapa.
+    """
+    ordem = topological_order(tarefas)
+    impressoes = fingerprints(ordem, contexto, versao)
+    estado = estado or {}
+    anteriores = estado.get('tarefas', {})
+    estado = {'tarefas': dict(anteriores), 'inicio': _agora()}
+    forcar = set(forcar)
+
+    # Tarefas que vão rodar: forçadas, com impressão nova, sem sucesso anterior ou dependentes de uma delas
+    executar = set()
+    for tarefa in ordem:
+        anterior = anteriores.get(tarefa.nome, {})
+        if (tarefa.nome in forcar or anterior.get('situacao') != OK
+                or anterior.get('impressao') != impressoes[tarefa.nome]
+                or any(dep in executar for dep in tarefa.depende_de)):
+            executar.add(tarefa.nome)
+    for tarefa in ordem:
+        if tarefa.nome not in executar:
+            print(f"➡️ {tarefa.nome}: entradas inalteradas desde {anteriores[tarefa.nome].get('fim')}, pulada")
+
+    lock = threading.Lock()
+    concluidas = {tarefa.nome for tarefa in ordem if tarefa.nome not in executar}
+    pendentes = [tarefa for tarefa in ordem if tarefa.nome in executar]
+    erro = None
+
+    def registrar(nome: str, registro: dict):
+        with lock:
+            estado['tarefas'][nome] = registro
+            if salvar_estado is not None:
+                salvar_estado(estado)
+
+    def executar_tarefa(tarefa: Tarefa):
+        print(f"🚀 {tarefa.nome}: iniciando")
+        inicio = time.perf_counter()
+        registro = {'impressao': impressoes[tarefa.nome], 'inicio': _agora()}
+        try:
+            with relatorio.etapa(tarefa.nome) if relatorio is not None else nullcontext() as etapa:
+                resultado = tarefa.funcao(contexto)
+                if etapa is not None and isinstance(resultado, dict):
+                    etapa.linhas_entrada = resultado.get('linhas_entrada')
+                    etapa.linhas_saida = resultado.get('linhas_saida')
+        except BaseException as e:
+            registro.update(situacao=FALHOU, fim=_agora(), duracao_s=round(time.perf_counter() - inicio, 3),
+                            erro=f"{type(e).__name__}: {e}")
+            registrar(tarefa.nome, registro)
+            print(f"❌ {tarefa.nome}: {registro['erro']}")
+            raise
+        registro.update(situacao=OK, fim=_agora(), duracao_s=round(time.perf_counter() - inicio, 3))
+        registrar(tarefa.nome, registro)
+        print(f"✅ {tarefa.nome}: concluída em {registro['duracao_s']:.1f} s")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        em_execucao = {}
+        while pendentes or em_execucao:
+            if erro is None:
+                prontas = [tarefa for tarefa in pendentes if all(dep in concluidas for dep in tarefa.depende_de)]
+                for tarefa in prontas:
+                    pendentes.remove(tarefa)
+                    em_execucao[pool.submit(executar_tarefa, tarefa)] = tarefa
+            if not em_execucao:
+                break
+            feitas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in feitas:
+                tarefa = em_execucao.pop(futuro)
+                if futuro.exception() is None:
+                    concluidas.add(tarefa.nome)
+                elif erro is None:
+                    erro = futuro.exception()
+
+    estado['fim'] = _agora()
+    if salvar_estado is not None:
+        salvar_estado(estado)
+    if erro is not None:
+        raise erro
+    return estado
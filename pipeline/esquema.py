@@ -0,0 +1,104 @@
+"""Esquema gerenciado da tabela de consumo ``questionario_covid``.
+
+Em vez do esquema inferido pelo ``to_sql``, a tabela é criada com tipos
+explícitos, chave primária, a coluna ``has_symptom`` calculada pelo próprio
+Postgres e índices pensados para as consultas do dashboard:
+
+- ``(mes_pesquisa, uf) WHERE has_symptom``: índice parcial, só com as linhas
+  do recorte "com sintomas" (uma fração da tabela), usado por bitmap scan;
+- ``(uf)`` e ``(mes_pesquisa)``: filtros por estado e mês.
+
+Antes de cada carga as colunas e tipos da Gold são conferidos com o esquema,
+para uma mudança na Gold não gerar uma tabela diferente sem aviso.
+"""
+
+import pandas as pd
+from sqlalchemy import inspect
+
+from pipeline.mapeamentos import (CODIGO_SIM, COLUNA_COM_SINTOMAS, COLUNA_PESO, COLUNAS_GOLD, COLUNAS_SILVER,
+                                  COLUNAS_SINTOMAS_PRINCIPAIS, COLUNAS_TEXTO_GOLD)
+from pipeline.rds import bulk_load
+
+# Colunas da Gold na ordem da Silver, com os nomes já renomeados
+COLUNAS_QUESTIONARIO = [COLUNAS_GOLD.get(col, col) for col in COLUNAS_SILVER]
+
+# Colunas que não cabem em SMALLINT (desenho amostral)
+TIPOS_ESPECIAIS = {
+    COLUNA_PESO: 'DOUBLE PRECISION NOT NULL',
+    'upa': 'BIGINT NOT NULL',
+    'estrato': 'INTEGER NOT NULL',
+}
+
+# Códigos (-1 = Desconhecido) nunca são nulos; texto pode ser (UF fora da tabela de códigos)
+TIPOS_QUESTIONARIO = {
+    col: TIPOS_ESPECIAIS.get(col, 'TEXT' if col in COLUNAS_TEXTO_GOLD else 'SMALLINT NOT NULL')
+    for col in COLUNAS_QUESTIONARIO
+}
+
+# Nome do índice -> definição (após "ON <tabela>")
+INDICES_QUESTIONARIO = {
+    'com_sintomas': f"(mes_pesquisa, uf) WHERE {COLUNA_COM_SINTOMAS}",
+    'uf': "(uf)",
+    'mes_pesquisa': "(mes_pesquisa)",
+}
+
+
+def create_questionario_sql(tabela: str) -> str:
+    """``CREATE TABLE`` da ``questionario_covid``."""
+    colunas = ',\n            '.join(f"{col} {tipo}" for col, tipo in TIPOS_QUESTIONARIO.items())
+    com_sintomas = ' OR '.join(f"{col} = {CODIGO_SIM}" for col in COLUNAS_SINTOMAS_PRINCIPAIS)
+    return f"""
+        CREATE TABLE {tabela} (
+            id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            {colunas},
+            {COLUNA_COM_SINTOMAS} BOOLEAN GENERATED ALWAYS AS ({com_sintomas}) STORED
+        )
+    """
+
+
+def check_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Confere colunas e tipos da Gold com o esquema e devolve ``df`` na ordem da tabela.
+
+    Levanta ``ValueError`` listando colunas faltando, sobrando ou com tipo
+    incompatível (ex.: código que virou ``float`` por causa de nulos).
+    """
+    faltando = [col for col in COLUNAS_QUESTIONARIO if col not in df.columns]
+    sobrando = [col for col in df.columns if col not in TIPOS_QUESTIONARIO]
+    tipos_errados = [
+        f"{col} ({df[col].dtype})" for col in COLUNAS_QUESTIONARIO
+        if col in df.columns and col not in COLUNAS_TEXTO_GOLD
+        and not (pd.api.types.is_float_dtype(df[col]) if col == COLUNA_PESO else pd.api.types.is_integer_dtype(df[col]))
+    ]
+    problemas = []
+    if faltando:
+        problemas.append(f"colunas faltando: {faltando}")
+    if sobrando:
+        problemas.append(f"colunas não previstas: {sobrando}")
+    if tipos_errados:
+        problemas.append(f"colunas com tipo incompatível: {tipos_errados}")
+    if problemas:
+        raise ValueError("Gold diferente do esquema da questionario_covid: " + '; '.join(problemas))
+    return df[COLUNAS_QUESTIONARIO]
+
+
+def check_table_schema(conn, tabela: str):
+    """Confere se a tabela existente no banco tem as colunas do esquema atual (antes de acrescentar linhas)."""
+    existentes = {col['name'] for col in inspect(conn).get_columns(tabela)}
+    esperadas = set(COLUNAS_QUESTIONARIO) | {'id', COLUNA_COM_SINTOMAS}
+    if existentes != esperadas:
+        raise ValueError(
+            f"Tabela '{tabela}' fora do esquema atual: faltando {sorted(esperadas - existentes)}, "
+            f"sobrando {sorted(existentes - esperadas)}. Refaça a carga completa."
+        )
+
+
+def load_questionario(engine, dados, tabela: str = 'questionario_covid') -> int:
+    """Carga completa da ``questionario_covid`` (via ``COPY``) com o esquema gerenciado.
+
+    ``dados`` é um ``DataFrame`` ou um iterável de lotes da Gold.
+    """
+    lotes = [dados] if isinstance(dados, pd.DataFrame) else dados
+    return bulk_load(
+        engine, tabela, (check_schema(lote) for lote in lotes),
+        indices=INDICES_QUESTIONARIO, create_sql=create_questionario_sql,
+    )
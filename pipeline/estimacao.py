@@ -0,0 +1,125 @@
+"""Estimativas ponderadas pelo desenho amostral da PNAD-COVID.
+
+As contagens da Gold são da amostra; para falar da população cada pessoa
+conta pelo seu peso de expansão (``peso``, a V1032 dos microdados). A
+variância segue o desenho (estratos e UPAs, com reposição no primeiro
+estágio) pelo método do conglomerado último / linearização de Taylor: as
+contribuições de cada UPA são somadas em um ``groupby`` e a variância de
+todas as categorias, de todas as variáveis e de todos os grupos sai de
+somas por estrato, sem laço por categoria.
+
+Os arquivos públicos da PNAD-COVID não trazem pesos replicados; por isso a
+variância é por linearização. A calibração pelo ``posest`` é ignorada no
+cálculo do erro padrão, o que tende a superestimá-lo (intervalos conservadores).
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from pipeline.mapeamentos import COLUNA_PESO
+from pipeline.transformacoes import build_label_dimension
+
+COLUNA_UPA = 'upa'
+COLUNA_ESTRATO = 'estrato'
+
+# Chave usada quando não há agrupamento (``por`` vazio)
+_TODOS = '_todos'
+
+
+def _strata_sizes(df: pd.DataFrame, upa: str, estrato: str) -> pd.Series:
+    """UPAs na amostra de cada estrato (``n_h``), contadas na amostra inteira e não só no domínio."""
+    return df.groupby(estrato, observed=True)[upa].nunique().rename('n_h')
+
+
+def _estimate_column(df: pd.DataFrame, coluna: str, por: list, n_h: pd.Series,
+                     peso: str, upa: str, estrato: str) -> pd.DataFrame:
+    """Totais e proporções (com variâncias) das categorias de ``coluna`` em cada grupo de ``por``."""
+    conglomerado = [estrato, upa]
+
+    # S_ik: peso da categoria k na UPA i (dentro do grupo); S_iD: peso do grupo na UPA i
+    por_upa = df.groupby(conglomerado + por + [coluna], observed=True).agg(
+        total=(peso, 'sum'), n=(peso, 'size')).reset_index()
+    por_upa['total_upa'] = por_upa.groupby(conglomerado + por, observed=True)['total'].transform('sum')
+
+    # Estimativas pontuais: Y_k, Y_D e p = Y_k / Y_D
+    pontual = por_upa.groupby(por + [coluna], observed=True).agg(total=('total', 'sum'), n=('n', 'sum')).reset_index()
+    pontual['total_grupo'] = pontual.groupby(por, observed=True)['total'].transform('sum')
+    pontual['proporcao'] = pontual['total'] / pontual['total_grupo']
+
+    # Somas por estrato e categoria: A = ΣS_ik², a = ΣS_ik, B = ΣS_ik·S_iD
+    por_upa['A'] = por_upa['total'] ** 2
+    por_upa['B'] = por_upa['total'] * por_upa['total_upa']
+    categoria = por_upa.groupby([estrato] + por + [coluna], observed=True).agg(
+        A=('A', 'sum'), a=('total', 'sum'), B=('B', 'sum')).reset_index()
+
+    # Somas por estrato e grupo, incluindo UPAs do grupo sem a categoria: C = ΣS_iD², c = ΣS_iD
+    upas_grupo = por_upa.drop_duplicates(conglomerado + por)[[estrato] + por + ['total_upa']]
+    upas_grupo = upas_grupo.assign(C=upas_grupo['total_upa'] ** 2)
+    grupo = upas_grupo.groupby([estrato] + por, observed=True).agg(
+        C=('C', 'sum'), c=('total_upa', 'sum')).reset_index()
+
+    # Base: todo (estrato, grupo) combinado com todas as categorias observadas no grupo
+    base = grupo.merge(pontual[por + [coluna, 'proporcao', 'total_grupo']], on=por)
+    base = base.merge(categoria, on=[estrato] + por + [coluna], how='left').fillna({'A': 0.0, 'a': 0.0, 'B': 0.0})
+    base = base.merge(n_h, left_on=estrato, right_index=True)
+
+    n = base['n_h'].to_numpy(dtype='float64')
+    # Estratos com uma única UPA não têm variância estimável e contribuem com zero
+    fator = np.where(n > 1, n / np.maximum(n - 1, 1), 0.0)
+    p = base['proporcao'].to_numpy()
+    y_d = base['total_grupo'].to_numpy()
+    soma_z2 = (base['A'] - 2 * p * base['B'] + p ** 2 * base['C']).to_numpy() / y_d ** 2
+    soma_z = (base['a'] - p * base['c']).to_numpy() / y_d
+    base['var_proporcao'] = fator * (soma_z2 - soma_z ** 2 / n)
+    base['var_total'] = fator * (base['A'] - base['a'] ** 2 / n).to_numpy()
+
+    variancias = base.groupby(por + [coluna], observed=True)[['var_total', 'var_proporcao']].sum().reset_index()
+    resultado = pontual.merge(variancias, on=por + [coluna], how='left')
+    resultado = resultado.rename(columns={coluna: 'codigo'}).assign(dimensao=coluna)
+    return resultado
+
+
+def weighted_estimates(df: pd.DataFrame, colunas: list, por: list = None, peso: str = COLUNA_PESO,
+                       upa: str = COLUNA_UPA, estrato: str = COLUNA_ESTRATO, nivel: float = 0.95) -> pd.DataFrame:
+    """Total e proporção populacionais de cada categoria de ``colunas``, com erro padrão e intervalo.
+
+    ``por`` (ex.: ``['uf']`` ou ``['mes_pesquisa']``) define os domínios: as
+    proporções somam 1 dentro de cada grupo. Linhas sem peso válido
+    (``peso <= 0``, o ``-1`` de ausente da Bronze) ficam de fora. Devolve um
+    ``DataFrame`` longo com ``por + [dimensao, codigo, n, total, total_ep,
+    total_li, total_ls, proporcao, proporcao_ep, proporcao_li, proporcao_ls]``.
+    """
+    por = list(por or [])
+    dados = df[df[peso] > 0]
+    if not por:
+        dados = dados.assign(**{_TODOS: 0})
+    chaves = por or [_TODOS]
+    n_h = _strata_sizes(dados, upa, estrato)
+
+    # Uma coluna de agrupamento teria proporção 1 em cada grupo: não entra nas estimativas
+    partes = [_estimate_column(dados, coluna, chaves, n_h, peso, upa, estrato)
+              for coluna in colunas if coluna not in por]
+    resultado = pd.concat(partes, ignore_index=True)
+
+    z = NormalDist().inv_cdf(0.5 + nivel / 2)
+    resultado['total_ep'] = np.sqrt(resultado['var_total'].clip(lower=0))
+    resultado['proporcao_ep'] = np.sqrt(resultado['var_proporcao'].clip(lower=0))
+    resultado['total_li'] = (resultado['total'] - z * resultado['total_ep']).clip(lower=0)
+    resultado['total_ls'] = resultado['total'] + z * resultado['total_ep']
+    resultado['proporcao_li'] = (resultado['proporcao'] - z * resultado['proporcao_ep']).clip(lower=0)
+    resultado['proporcao_ls'] = (resultado['proporcao'] + z * resultado['proporcao_ep']).clip(upper=1)
+
+    colunas_saida = por + ['dimensao', 'codigo', 'n', 'total', 'total_ep', 'total_li', 'total_ls',
+                           'proporcao', 'proporcao_ep', 'proporcao_li', 'proporcao_ls']
+    return resultado[colunas_saida].sort_values(por + ['dimensao', 'codigo'], ignore_index=True)
+
+
+def with_labels(estimativas: pd.DataFrame, dimensao_rotulos: pd.DataFrame = None) -> pd.DataFrame:
+    """Acrescenta a coluna ``rotulo`` (tradução "na borda" dos códigos, como no restante do projeto)."""
+    dimensao_rotulos = build_label_dimension() if dimensao_rotulos is None else dimensao_rotulos
+    rotulos = dimensao_rotulos.rename(columns={'coluna': 'dimensao'})
+    resultado = estimativas.merge(rotulos, on=['dimensao', 'codigo'], how='left')
+    resultado['rotulo'] = resultado['rotulo'].fillna(resultado['codigo'].astype(str))
+    return resultado
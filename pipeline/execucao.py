@@ -0,0 +1,404 @@
+"""Pipeline completo como DAG de etapas (no terminal ou pelo ``tech_challenge.ipynb``).
+
+Etapas e dependências declaradas::
+
+    bucket ── ingestao ── rds_para_raw ── bronze ── silver ── gold ── rds_questionario ── artefatos
+    codigo_uf ───────────────────────────────────────┘        ├── cruzamentos
+    banco_glue ───────────────────────────────────────────── glue_tabela
+
+Etapas independentes (validação do bucket, criação do banco no Glue e carga
+da ``codigo_uf``) rodam em paralelo. Uma etapa cujas entradas não mudaram
+desde a última execução bem-sucedida é pulada; depois de uma falha, a
+próxima execução recomeça da etapa que falhou (ver ``pipeline.dag``).
+
+As cargas são incrementais (ver ``pipeline.incremental``): a ingestão só
+baixa os ZIPs novos ou alterados e substitui no RDS os meses deles, e cada
+etapa seguinte reprocessa só as partições (ano, mês) cuja origem mudou.
+``--completo`` refaz tudo do zero.
+
+Uso (variáveis de conexão do ``.env``, como no notebook)::
+
+    python -m pipeline                   # executa o que mudou
+    python -m pipeline --listar          # etapas, dependências e situação
+    python -m pipeline --etapas silver   # só a silver (e o que ela precisar)
+    python -m pipeline --forcar bronze   # refaz a bronze e tudo depois dela
+    python -m pipeline --completo        # recarrega todas as fontes e regrava todas as camadas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+from pyarrow import csv
+
+from pipeline import camadas, catalogo, dag, fontes, incremental, metricas
+from pipeline.rds import bulk_load, copy_query_to_file
+
+ESTADO_PADRAO = Path('.pipeline') / 'estado.json'
+CAMINHO_CODIGO_UF = Path('covid') / 'codigo_uf.csv'
+
+CONFIG_PADRAO = {
+    'bucket': 'fiaptechchallengefase3',
+    'camadas': ('raw', 'bronze', 'silver', 'gold'),
+    'meses': (7, 8, 9),
+    'diretorio_microdados': None,
+    'codigo_uf': str(CAMINHO_CODIGO_UF),
+    'tabela_inicial': 'pnad_covid',
+    'tabela_questionario': 'questionario_covid',
+    'tabela_codigo_uf': 'codigo_uf',
+    'tabela_rotulos': 'dim_rotulos',
+    'glue_database': 'db_fiap_challenge_glue',
+    'crawler_name': 'pnad_covid_crawler',
+    # Recarga completa em vez de só as fontes e partições alteradas
+    'completo': False,
+}
+
+
+class Contexto:
+    """Configuração e conexões compartilhadas pelas etapas.
+
+    Clientes e ``engine`` não informados são criados a partir do ``.env`` na
+    primeira vez que uma etapa os usa.
+    """
+
+    def __init__(self, config: dict = None, s3_client=None, glue_client=None, engine=None,
+                 relatorio: metricas.RunReport = None):
+        self.config = {**CONFIG_PADRAO, **(config or {})}
+        self.relatorio = relatorio
+        if relatorio is not None and s3_client is not None:
+            relatorio.instrument_s3(s3_client)
+        self._lock = threading.Lock()
+        self._cache = {nome: valor for nome, valor in (('s3', s3_client), ('glue', glue_client), ('engine', engine))
+                       if valor is not None}
+
+    def _get(self, nome: str, criar):
+        with self._lock:
+            if nome not in self._cache:
+                self._cache[nome] = criar()
+            return self._cache[nome]
+
+    def _aws_client(self, servico: str):
+        import boto3
+
+        return boto3.client(
+            servico,
+            aws_access_key_id=os.getenv('aws_access_key_id'),
+            aws_secret_access_key=os.getenv('aws_secret_access_key'),
+            aws_session_token=os.getenv('aws_session_token'),
+            region_name=os.getenv('region'),
+        )
+
+    @property
+    def s3_client(self):
+        def criar():
+            s3_client = self._aws_client('s3')
+            return s3_client if self.relatorio is None else self.relatorio.instrument_s3(s3_client)
+        return self._get('s3', criar)
+
+    @property
+    def glue_client(self):
+        return self._get('glue', lambda: self._aws_client('glue'))
+
+    @property
+    def engine(self):
+        from sqlalchemy import create_engine
+
+        def criar():
+            return create_engine(
+                f"postgresql+psycopg2://{os.getenv('POSTGRES_USER_PNAD')}:{os.getenv('POSTGRES_PASSWORD_PNAD')}"
+                f"@{os.getenv('POSTGRES_HOST_PNAD')}:{os.getenv('POSTGRES_PORT_PNAD')}/{os.getenv('POSTGRES_DB_PNAD')}"
+            )
+        return self._get('engine', criar)
+
+    def source_files(self) -> list:
+        """ZIPs de origem (API do GitHub ou ``diretorio_microdados`` local), listados uma vez por execução."""
+        diretorio = self.config['diretorio_microdados']
+        return self._get('fontes', lambda: fontes.list_local_files(diretorio) if diretorio
+                         else fontes.list_source_files())
+
+    def uf_table(self) -> pd.DataFrame:
+        return self._get('df_uf', lambda: pd.read_csv(self.config['codigo_uf'], sep=","))
+
+
+def check_bucket(ctx: Contexto):
+    """Cria o bucket e as "pastas" das camadas se ainda não existirem."""
+    from botocore.exceptions import ClientError
+
+    s3_client, bucket = ctx.s3_client, ctx.config['bucket']
+    try:
+        s3_client.head_bucket(Bucket=bucket)
+        print(f"➡️ Bucket '{bucket}' já existe")
+    except ClientError as e:
+        if e.response['Error']['Code'] != '404':
+            raise
+        regiao = s3_client.meta.region_name
+        if regiao == 'us-east-1':
+            s3_client.create_bucket(Bucket=bucket)
+        else:
+            s3_client.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': regiao})
+        print(f"✅ Bucket '{bucket}' criado com sucesso!")
+    for camada in ctx.config['camadas']:
+        s3_client.put_object(Bucket=bucket, Key=f"{camada}/", Body=b'')
+
+
+def create_glue_database(ctx: Contexto):
+    """Cria o banco do Glue consumido pelo Athena, se ainda não existir."""
+    glue_client, nome = ctx.glue_client, ctx.config['glue_database']
+    if nome in {db['Name'] for db in glue_client.get_databases()['DatabaseList']}:
+        print(f"➡️ O banco de dados '{nome}' já existe no Glue.")
+        return
+    glue_client.create_database(DatabaseInput={
+        'Name': nome, 'Description': 'Este é um banco de dados para o Athena consumir os dados da gold do s3.'})
+    print(f"✅ Banco de dados '{nome}' criado com sucesso!")
+
+
+def load_uf_codes(ctx: Contexto):
+    bulk_load(ctx.engine, ctx.config['tabela_codigo_uf'], ctx.uf_table())
+
+
+def task_code(nome: str, *regras) -> str:
+    """Versão das regras da etapa ``nome`` (código dela e ``regras`` extras, ex.: tabela de UFs).
+
+    Gravada em cada partição gerada pela etapa. Diferente da impressão
+    digital do DAG, não depende dos dados de entrada: uma partição só é
+    refeita se a origem dela mudou ou se esta versão mudou.
+    """
+    tarefa = next(tarefa for tarefa in build_tasks() if tarefa.nome == nome)
+    entrada = [dag.code_version(tarefa), *regras]
+    return hashlib.sha256(json.dumps(entrada, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def ingest_sources(ctx: Contexto):
+    """ZIPs de origem -> ``pnad_covid`` no RDS: só os arquivos novos ou alterados e só os ``meses`` escolhidos.
+
+    Um ZIP por vez, lido em blocos de CSV que vão direto para o ``COPY``: a
+    memória fica em um bloco, não no conjunto de arquivos.
+    """
+    incremental.ingest_sources(ctx.engine, ctx.s3_client, ctx.config['bucket'], ctx.source_files(),
+                               list(ctx.config['meses']), ctx.config['tabela_inicial'],
+                               completo=ctx.config['completo'], codigo=task_code('ingestao'))
+
+
+def export_raw(ctx: Contexto):
+    """``pnad_covid`` (RDS) -> Raw (S3), só nos meses alterados pela ingestão.
+
+    Cada partição sai por um ``COPY (SELECT ... WHERE ano/mês) TO STDOUT``
+    lido em lotes com os tipos do dicionário.
+    """
+    s3_client, bucket, raw = ctx.s3_client, ctx.config['bucket'], ctx.config['camadas'][0]
+    codigo = task_code('rds_para_raw')
+    origens = incremental.load_manifest(s3_client, bucket).get('particoes', {})
+    a_processar, remover = camadas.stale_partitions(origens, camadas.layer_partitions(s3_client, bucket, raw),
+                                                    codigo, ctx.config['completo'])
+    if not a_processar and not remover:
+        print(f"➡️ s3://{bucket}/{raw} já está com as partições vigentes do RDS. Nada a processar.")
+        return
+    schema = fontes.load_dictionary_schema()
+    coluna_ano, coluna_mes = (incremental.COLUNAS_ORIGEM_PARTICAO[p] for p in camadas.PARTICOES)
+    with camadas.LayerWriter(s3_client, bucket, raw, particionar_por=camadas.PARTICOES, incremental=True,
+                             remover=remover, codigo=codigo,
+                             origens={pid: origens[pid]['execucao'] for pid in a_processar}) as writer:
+        for pid in a_processar:
+            ano, mes = origens[pid]['valores']
+            consulta = (f'SELECT * FROM {ctx.config["tabela_inicial"]} '
+                        f'WHERE "{coluna_ano}" = {int(ano)} AND "{coluna_mes}" = {int(mes)}')
+            with tempfile.TemporaryFile() as tmp:
+                copy_query_to_file(ctx.engine, consulta, tmp)
+                tmp.seek(0)
+                leitor = csv.open_csv(
+                    tmp,
+                    read_options=csv.ReadOptions(block_size=fontes.BLOCO_CSV),
+                    convert_options=csv.ConvertOptions(column_types=schema),
+                )
+                for lote in leitor:
+                    writer.write(lote.to_pandas(types_mapper=fontes.TIPOS_PANDAS.get))
+        writer.remover.update(set(a_processar) - set(writer.particoes))
+
+
+def run_bronze(ctx: Contexto):
+    raw, bronze = ctx.config['camadas'][:2]
+    return camadas.run_bronze(ctx.s3_client, ctx.config['bucket'], raw, bronze,
+                       codigo=task_code('bronze'), completo=ctx.config['completo'])
+
+
+def run_silver(ctx: Contexto):
+    bronze, silver = ctx.config['camadas'][1:3]
+    return camadas.run_silver(ctx.s3_client, ctx.config['bucket'], bronze, silver, ctx.uf_table(),
+                       codigo=task_code('silver', _file_sha256(ctx.config['codigo_uf'])),
+                       completo=ctx.config['completo'])
+
+
+def run_gold(ctx: Contexto):
+    silver, gold = ctx.config['camadas'][2:4]
+    return camadas.run_gold(ctx.s3_client, ctx.config['bucket'], silver, gold,
+                     codigo=task_code('gold'), completo=ctx.config['completo'])
+
+
+def load_questionario(ctx: Contexto):
+    """Gold -> ``questionario_covid`` (só os meses alterados) + ``dim_rotulos`` e nova versão dos dados.
+
+    A versão nova invalida o cache do dashboard; sem partição alterada, a
+    versão vigente é mantida.
+    """
+    from pipeline.transformacoes import build_label_dimension
+    from pipeline.versao import write_data_version
+
+    tabela = ctx.config['tabela_questionario']
+    linhas, atualizadas = incremental.load_questionario_partitions(
+        ctx.engine, ctx.s3_client, ctx.config['bucket'], ctx.config['camadas'][3], tabela,
+        codigo=task_code('rds_questionario'), completo=ctx.config['completo'])
+    bulk_load(ctx.engine, ctx.config['tabela_rotulos'], build_label_dimension())
+    if atualizadas:
+        print(f"✅ Versão dos dados registrada: {write_data_version(ctx.engine, linhas, tabela)}")
+
+
+def render_charts(ctx: Contexto):
+    """Pré-renderiza os gráficos do dashboard para a versão recém-carregada."""
+    from dashboard.artefatos import render_artifacts
+    from pipeline.consultas import load_distributions
+    from pipeline.versao import read_data_version
+
+    tabela = ctx.config['tabela_questionario']
+    with ctx.engine.connect() as conn:
+        render_artifacts(load_distributions(conn, tabela), read_data_version(conn, tabela))
+
+
+def build_crosstabs(ctx: Contexto):
+    """Tabelas cruzadas da Gold para a página de cruzamentos do dashboard."""
+    from dashboard.cruzamentos import build_from_layer
+
+    build_from_layer(ctx.s3_client, ctx.config['bucket'], ctx.config['camadas'][3])
+
+
+def register_gold(ctx: Contexto):
+    """Registra a tabela da Gold e suas partições no Glue a partir do esquema gravado (crawler como plano B)."""
+    gold = ctx.config['camadas'][3]
+    schema = camadas.layer_schema(ctx.s3_client, ctx.config['bucket'], gold)
+    particoes = camadas.layer_partitions(ctx.s3_client, ctx.config['bucket'], gold)
+    catalogo.publish_layer(ctx.glue_client, ctx.config['glue_database'], ctx.config['bucket'], gold, schema,
+                           valores_particoes=[registro['valores'] for registro in particoes.values()],
+                           crawler_name=ctx.config['crawler_name'])
+
+
+def _file_sha256(caminho: str) -> str:
+    return fontes.file_sha256(caminho) if Path(caminho).exists() else caminho
+
+
+def build_tasks() -> list:
+    """As etapas do pipeline com dependências e chaves de entrada."""
+    Tarefa = dag.Tarefa
+    return [
+        Tarefa('bucket', check_bucket, chave=lambda ctx: [ctx.config['bucket'], list(ctx.config['camadas'])]),
+        Tarefa('banco_glue', create_glue_database, chave=lambda ctx: ctx.config['glue_database']),
+        Tarefa('codigo_uf', load_uf_codes, modulos=('pipeline.rds',),
+               chave=lambda ctx: [_file_sha256(ctx.config['codigo_uf']), ctx.config['tabela_codigo_uf']]),
+        Tarefa('ingestao', ingest_sources, depende_de=('bucket',), modulos=('pipeline.incremental',),
+               chave=lambda ctx: [sorted((arq['name'], arq['sha']) for arq in ctx.source_files()),
+                                  sorted(ctx.config['meses']), ctx.config['tabela_inicial']]),
+        Tarefa('rds_para_raw', export_raw, depende_de=('ingestao', 'bucket'),
+               modulos=('pipeline.incremental', 'pipeline.camadas', 'pipeline.fontes', 'pipeline.rds')),
+        Tarefa('bronze', run_bronze, depende_de=('rds_para_raw',), modulos=('pipeline.camadas',)),
+        Tarefa('silver', run_silver, depende_de=('bronze', 'codigo_uf'), modulos=('pipeline.camadas',),
+               chave=lambda ctx: _file_sha256(ctx.config['codigo_uf'])),
+        Tarefa('gold', run_gold, depende_de=('silver',), modulos=('pipeline.camadas',)),
+        Tarefa('rds_questionario', load_questionario, depende_de=('gold',),
+               modulos=('pipeline.incremental', 'pipeline.transformacoes', 'pipeline.versao'),
+               chave=lambda ctx: ctx.config['tabela_questionario']),
+        Tarefa('artefatos', render_charts, depende_de=('rds_questionario',),
+               modulos=('dashboard.artefatos', 'pipeline.consultas', 'pipeline.versao')),
+        Tarefa('cruzamentos', build_crosstabs, depende_de=('gold',), modulos=('dashboard.cruzamentos',)),
+        Tarefa('glue_tabela', register_gold, depende_de=('gold', 'banco_glue'),
+               modulos=('pipeline.catalogo', 'pipeline.camadas'),
+               chave=lambda ctx: ctx.config['crawler_name']),
+    ]
+
+
+def load_state(caminho=ESTADO_PADRAO) -> dict:
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return {}
+    return json.loads(caminho.read_text(encoding='utf-8'))
+
+
+def save_state(estado: dict, caminho=ESTADO_PADRAO):
+    """Grava o estado de forma atômica (arquivo temporário + ``os.replace``)."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_name(f".{caminho.name}.tmp")
+    tmp.write_text(json.dumps(estado, ensure_ascii=False, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, caminho)
+
+
+def run_pipeline(config: dict = None, etapas=None, forcar=(), max_workers: int = dag.MAX_WORKERS,
+                 estado_path=ESTADO_PADRAO, contexto: Contexto = None, relatorio: metricas.RunReport = None) -> dict:
+    """Executa o pipeline (ou só ``etapas`` e suas dependências) e devolve o estado final.
+
+    Com ``relatorio``, cada etapa executada é medida (tempo, memória, chamadas
+    e bytes do S3; ver ``pipeline.metricas``).
+    """
+    contexto = contexto or Contexto(config, relatorio=relatorio)
+    tarefas = build_tasks()
+    if etapas:
+        tarefas = dag.select(tarefas, etapas)
+    return dag.run_dag(
+        tarefas, contexto, estado=load_state(estado_path),
+        salvar_estado=lambda estado: save_state(estado, estado_path),
+        max_workers=max_workers, forcar=forcar, relatorio=relatorio,
+    )
+
+
+def print_tasks(estado_path=ESTADO_PADRAO):
+    estado = load_state(estado_path).get('tarefas', {})
+    for tarefa in dag.topological_order(build_tasks()):
+        registro = estado.get(tarefa.nome, {})
+        situacao = registro.get('situacao', 'nunca executada')
+        depende = ', '.join(tarefa.depende_de) or '-'
+        print(f"{tarefa.nome:<18} depende de: {depende:<28} {situacao} {registro.get('fim', '')}")
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    nomes = [tarefa.nome for tarefa in build_tasks()]
+    parser = argparse.ArgumentParser(prog='python -m pipeline', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--etapas', nargs='+', choices=nomes, metavar='ETAPA',
+                        help='executa só estas etapas (e suas dependências)')
+    parser.add_argument('--forcar', nargs='+', choices=nomes, default=(), metavar='ETAPA',
+                        help='refaz estas etapas (e as seguintes) mesmo sem mudança nas entradas')
+    parser.add_argument('--meses', nargs='+', type=int, default=list(CONFIG_PADRAO['meses']))
+    parser.add_argument('--completo', action='store_true',
+                        help='recarrega todas as fontes e regrava todas as camadas (não só as partições alteradas)')
+    parser.add_argument('--microdados', help='pasta local com os ZIPs (padrão: pasta do repositório no GitHub)')
+    parser.add_argument('--max-workers', type=int, default=dag.MAX_WORKERS, help='etapas independentes ao mesmo tempo')
+    parser.add_argument('--estado', default=str(ESTADO_PADRAO), help='arquivo de estado para pular/retomar etapas')
+    parser.add_argument('--listar', action='store_true', help='mostra as etapas e a situação da última execução')
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        print_tasks(args.estado)
+        return
+
+    load_dotenv()
+    config = {
+        'bucket': os.getenv('S3_BUCKET_PNAD', CONFIG_PADRAO['bucket']),
+        'meses': tuple(args.meses),
+        'diretorio_microdados': args.microdados,
+        'completo': args.completo,
+    }
+    forcar = [*args.forcar, 'ingestao'] if args.completo else args.forcar
+    relatorio = metricas.RunReport('pipeline')
+    try:
+        run_pipeline(config, args.etapas, forcar, args.max_workers, args.estado, relatorio=relatorio)
+    finally:
+        # Também depois de uma falha: o relatório mostra até onde a execução foi
+        relatorio.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Arquivos de origem da PNAD-COVID (ZIPs com os microdados em CSV).
+
+Os ZIPs podem vir da pasta do repositório no GitHub ou de uma cópia local
+(``covid/microdados`` ou outro espelho em disco). Vários arquivos são lidos ao
+mesmo tempo por um pool de threads; cada CSV é lido pelo leitor do Arrow com
+um esquema explícito (inteiros de 8/16 bits quando o tamanho da variável no
+dicionário permite) e só com as colunas que o pipeline usa.
+"""
+
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from zipfile import ZipFile
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+import requests
+
+from pipeline.mapeamentos import COLUNAS_SILVER
+
+# Pasta do repositório com os ZIPs dos microdados
+API_MICRODADOS = "https://api.github.com/repos/geoferreira1/fiap_tech_challenge_fase_3_novo/contents/covid/microdados"
+DIRETORIO_MICRODADOS = Path('covid') / 'microdados'
+DIRETORIO_DICIONARIOS = Path('covid') / 'documentacao'
+
+# Arquivos lidos ao mesmo tempo
+MAX_WORKERS = 4
+# ZIP baixado fica em memória até este tamanho; acima disso vai para o disco
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+# Bytes de CSV convertidos por lote na leitura em streaming
+BLOCO_CSV = 16 * 1024 * 1024
+
+# Pesos amostrais: únicas variáveis com casas decimais
+COLUNAS_DECIMAIS = {'V1031', 'V1032'}
+
+# Identificação da pessoa (mantida para a deduplicação da Bronze não juntar pessoas diferentes)
+COLUNAS_IDENTIFICACAO = ['UPA', 'V1008', 'V1012', 'V1013', 'A001']
+
+# Variáveis cujo nome nos microdados não é o nome da Silver em maiúsculas
+NOMES_ORIGEM = {'ano': 'Ano', 'estrato': 'Estrato', 'posest': 'posest'}
+
+# Colunas lidas dos CSVs: identificação + o que a Silver usa (estado/sigla/regiao vêm da tabela de UFs)
+COLUNAS_INGESTAO = list(dict.fromkeys(
+    COLUNAS_IDENTIFICACAO
+    + [NOMES_ORIGEM.get(col, col.upper()) for col in COLUNAS_SILVER if col not in ('estado', 'sigla', 'regiao')]
+))
+
+# Tipos pandas (nulos preservados) usados na conversão do Arrow
+TIPOS_PANDAS = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+}
+
+
+def integer_type(tamanho: int) -> pa.DataType:
+    """Menor inteiro que comporta uma variável de ``tamanho`` dígitos."""
+    if tamanho <= 2:
+        return pa.int8()
+    if tamanho <= 4:
+        return pa.int16()
+    if tamanho <= 9:
+        return pa.int32()
+    return pa.int64()
+
+
+@lru_cache(maxsize=None)
+def _dictionary_widths(caminho: str) -> dict:
+    """``{variável: tamanho}`` de um ``Dicionario_PNAD_COVID_*.xls`` (colunas 'Tamanho' e 'Código da variável')."""
+    dicionario = pd.read_excel(caminho, header=None, skiprows=4, usecols=[0, 1])
+    variaveis = dicionario.dropna(subset=[1])
+    return {str(nome).strip(): int(tamanho) for tamanho, nome in variaveis.itertuples(index=False)}
+
+
+def load_dictionary_schema(diretorio=DIRETORIO_DICIONARIOS) -> dict:
+    """Esquema ``{variável: tipo Arrow}`` de todos os dicionários mensais.
+
+    Quando uma variável muda de tamanho entre os meses, vale o maior tamanho.
+    """
+    tamanhos = {}
+    for caminho in sorted(Path(diretorio).glob('Dicionario_PNAD_COVID_*.xls')):
+        for nome, tamanho in _dictionary_widths(str(caminho)).items():
+            tamanhos[nome] = max(tamanho, tamanhos.get(nome, 0))
+    return {nome: pa.float64() if nome in COLUNAS_DECIMAIS else integer_type(tamanho)
+            for nome, tamanho in tamanhos.items()}
+
+
+def list_source_files(api_url: str = API_MICRODADOS) -> list:
+    """Lista os ZIPs da pasta via API do GitHub: ``[{'name', 'sha', 'download_url'}, ...]``.
+
+    O ``sha`` é o hash do conteúdo do arquivo no git: muda sempre que o
+    arquivo muda, sem precisar baixá-lo.
+    """
+    response = requests.get(api_url)
+    if response.status_code != 200:
+        raise Exception(f"Erro ao acessar a API: {response.status_code}")
+    return [
+        {'name': arquivo['name'], 'sha': arquivo['sha'], 'download_url': arquivo['download_url']}
+        for arquivo in response.json()
+        if arquivo['name'].endswith('.zip')
+    ]
+
+
+def file_sha256(caminho) -> str:
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def list_local_files(diretorio=DIRETORIO_MICRODADOS) -> list:
+    """Lista os ZIPs de uma pasta local (cópia dos microdados): ``[{'name', 'sha', 'path'}, ...]``."""
+    return [
+        {'name': caminho.name, 'sha': file_sha256(caminho), 'path': str(caminho)}
+        for caminho in sorted(Path(diretorio).glob('*.zip'))
+    ]
+
+
+def _convert_options(schema: dict = None, columns: list = None) -> csv.ConvertOptions:
+    return csv.ConvertOptions(
+        column_types=schema or {},
+        include_columns=columns,
+        include_missing_columns=columns is not None,
+    )
+
+
+def read_zip_csvs(arquivo_zip, schema: dict = None, columns: list = None) -> pd.DataFrame:
+    """Lê e concatena os CSVs de um ZIP (caminho ou objeto de arquivo) com o leitor do Arrow.
+
+    ``schema`` fixa o tipo de cada variável e ``columns`` restringe as
+    colunas convertidas; colunas pedidas que não existem no mês vêm nulas,
+    para todos os meses terem o mesmo esquema.
+    """
+    opcoes = _convert_options(schema, columns)
+    tabelas = []
+    with ZipFile(arquivo_zip) as zip_file:
+        for csv_name in zip_file.namelist():
+            if csv_name.endswith('.csv'):
+                with zip_file.open(csv_name) as f:
+                    tabelas.append(csv.read_csv(f, convert_options=opcoes))
+    if not tabelas:
+        return pd.DataFrame()
+    tabela = pa.concat_tables(tabelas, promote_options='default')
+    return tabela.to_pandas(types_mapper=TIPOS_PANDAS.get)
+
+
+def iter_zip_batches(arquivo_zip, schema: dict = None, columns: list = None, block_size: int = BLOCO_CSV):
+    """Como ``read_zip_csvs``, mas devolve um ``DataFrame`` a cada ``block_size`` bytes de CSV.
+
+    Cada CSV é lido em streaming (``csv.open_csv``) direto do ZIP: só um bloco
+    fica convertido em memória por vez.
+    """
+    opcoes = _convert_options(schema, columns)
+    with ZipFile(arquivo_zip) as zip_file:
+        for csv_name in zip_file.namelist():
+            if csv_name.endswith('.csv'):
+                with zip_file.open(csv_name) as f:
+                    leitor = csv.open_csv(f, read_options=csv.ReadOptions(block_size=block_size),
+                                          convert_options=opcoes)
+                    for lote in leitor:
+                        yield pa.Table.from_batches([lote]).to_pandas(types_mapper=TIPOS_PANDAS.get)
+
+
+def _open_source(arquivo: dict):
+    """Abre o ZIP local, ou baixa em streaming para um arquivo temporário."""
+    if 'path' in arquivo:
+        return open(arquivo['path'], 'rb')
+    tmp = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with requests.get(arquivo['download_url'], stream=True) as r:
+        if r.status_code != 200:
+            raise Exception(f"Erro ao baixar {arquivo['name']}: {r.status_code}")
+        for bloco in r.iter_content(chunk_size=1024 * 1024):
+            tmp.write(bloco)
+    tmp.seek(0)
+    return tmp
+
+
+def download_source(arquivo: dict, schema: dict = None, columns: list = COLUNAS_INGESTAO) -> pd.DataFrame:
+    """Lê um ZIP listado por ``list_source_files``/``list_local_files`` e devolve seus microdados.
+
+    Sem ``schema``, usa o esquema dos dicionários em ``covid/documentacao``.
+    ``columns=None`` lê todas as colunas.
+    """
+    schema = load_dictionary_schema() if schema is None else schema
+    with _open_source(arquivo) as f:
+        df = read_zip_csvs(f, schema, columns)
+    print(f"✅ Lido {arquivo['name']} ({len(df)} linhas)")
+    return df
+
+
+def iter_source_batches(arquivo: dict, schema: dict = None, columns: list = COLUNAS_INGESTAO,
+                        block_size: int = BLOCO_CSV):
+    """Microdados de um ZIP em lotes (ver ``iter_zip_batches``), sem montar o arquivo inteiro em memória."""
+    schema = load_dictionary_schema() if schema is None else schema
+    linhas = 0
+    with _open_source(arquivo) as f:
+        for lote in iter_zip_batches(f, schema, columns, block_size):
+            linhas += len(lote)
+            yield lote
+    print(f"✅ Lido {arquivo['name']} ({linhas} linhas)")
+
+
+def load_sources(arquivos: list, schema: dict = None, columns: list = COLUNAS_INGESTAO,
+                 max_workers: int = MAX_WORKERS) -> dict:
+    """Lê vários ZIPs em paralelo e devolve ``{nome: DataFrame}`` na ordem de ``arquivos``."""
+    schema = load_dictionary_schema() if schema is None else schema
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        dfs = pool.map(lambda arq: download_source(arq, schema, columns), arquivos)
+        return {arq['name']: df for arq, df in zip(arquivos, dfs)}
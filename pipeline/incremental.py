@@ -0,0 +1,301 @@
+"""Ingestão e cargas incrementais, particionadas por mês.
+
+As camadas no S3 ficam particionadas no estilo Hive (ver ``pipeline.camadas``)
+e um manifesto (``_manifesto/fontes.json``) guarda, para cada ZIP de origem
+já carregado no RDS, o hash do arquivo, as partições dele já gravadas e as
+deixadas de fora por ``meses``, além da versão de cada partição da
+``pnad_covid``. A cada execução só os ZIPs novos ou alterados são baixados e
+só as partições afetadas são substituídas no RDS (``DELETE`` do mês +
+``COPY``, na mesma transação).
+
+Cada camada guarda no próprio manifesto a versão da partição de origem de
+que foi gerada (``origem``) e a versão do código (``codigo``); as etapas
+seguintes reprocessam só as partições desatualizadas (ver
+``camadas.stale_partitions``), e a ``questionario_covid`` recebe um upsert
+por partição da Gold.
+"""
+
+import datetime
+import json
+import uuid
+
+import pandas as pd
+from botocore.exceptions import ClientError
+from sqlalchemy import inspect, text
+
+from pipeline import camadas, esquema, fontes
+from pipeline.camadas import PARTICOES, partition_id
+from pipeline.rds import bulk_load, copy_frame
+
+# Nomes das colunas de partição nos microdados e na Gold
+COLUNAS_ORIGEM_PARTICAO = {'ano': 'Ano', 'v1013': 'V1013'}
+COLUNAS_GOLD_PARTICAO = {'ano': 'ano', 'v1013': 'mes_pesquisa'}
+
+# Manifestos fora dos prefixos das camadas (não são lidos pelo crawler)
+MANIFESTO_FONTES = '_manifesto/fontes.json'
+MANIFESTO_RDS = '_manifesto/rds_{tabela}.json'
+
+
+def _new_execution() -> str:
+    return f"{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:8]}"
+
+
+def split_partitions(df: pd.DataFrame, colunas=COLUNAS_ORIGEM_PARTICAO) -> dict:
+    """Separa os microdados em ``{(ano, mes): DataFrame}``."""
+    chaves = [colunas[p] for p in PARTICOES]
+    return {(int(ano), int(mes)): grupo for (ano, mes), grupo in df.groupby(chaves, sort=True)}
+
+
+def load_manifest(s3_client, bucket: str, key: str = MANIFESTO_FONTES) -> dict:
+    """Lê um manifesto de cargas (vazio na primeira execução)."""
+    try:
+        obj = s3_client.get_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return {}
+        raise
+    return json.loads(obj['Body'].read())
+
+
+def save_manifest(s3_client, bucket: str, manifesto: dict, key: str = MANIFESTO_FONTES):
+    corpo = json.dumps(manifesto, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    s3_client.put_object(Bucket=bucket, Key=key, Body=corpo, ContentType='application/json')
+
+
+def _in_months(particao, meses) -> bool:
+    return meses is None or particao[1] in meses
+
+
+def pending_sources(arquivos: list, manifesto: dict, meses: list = None) -> list:
+    """Arquivos de origem novos, cujo hash mudou ou com partições de ``meses`` ainda não gravadas.
+
+    Partições deixadas de fora por ``meses`` ficam como ``ignoradas`` no
+    manifesto e só tornam o arquivo pendente de novo se entrarem em ``meses``.
+    """
+    processados = manifesto.get('arquivos', {})
+    pendentes = []
+    for arq in arquivos:
+        anterior = processados.get(arq['name'], {})
+        if anterior.get('sha') != arq['sha'] or any(_in_months(p, meses) for p in anterior.get('ignoradas', [])):
+            pendentes.append(arq)
+    return pendentes
+
+
+def _recorded_partitions(arq: dict, manifesto: dict) -> set:
+    """Partições de ``arq`` já gravadas que continuam valendo (nenhuma se o hash mudou)."""
+    anterior = manifesto.get('arquivos', {}).get(arq['name'], {})
+    return set() if anterior.get('sha') != arq['sha'] else {tuple(p) for p in anterior.get('particoes', [])}
+
+
+def _iter_partitions(arq: dict, schema: dict, vistas: set):
+    """Lotes de ``arq`` separados por partição, ``((ano, mes), DataFrame)``, anotando em ``vistas`` as encontradas."""
+    for lote in fontes.iter_source_batches(arq, schema):
+        for particao, grupo in split_partitions(lote).items():
+            vistas.add(particao)
+            yield particao, grupo
+
+
+def _full_ingestion(engine, arquivos: list, meses, tabela: str, schema: dict) -> tuple:
+    """Recarrega ``tabela`` com todos os ``arquivos`` (``bulk_load``); devolve as partições vistas e as linhas."""
+    vistas = {arq['name']: set() for arq in arquivos}
+    linhas = {}
+
+    def lotes():
+        for arq in arquivos:
+            for particao, grupo in _iter_partitions(arq, schema, vistas[arq['name']]):
+                if _in_months(particao, meses):
+                    linhas[particao] = linhas.get(particao, 0) + len(grupo)
+                    yield grupo
+
+    bulk_load(engine, tabela, lotes())
+    return vistas, linhas
+
+
+def _incremental_ingestion(engine, arquivos: list, pendentes: list, manifesto: dict, meses, tabela: str,
+                           schema: dict) -> tuple:
+    """Substitui em ``tabela`` só as partições dos arquivos ``pendentes``, em uma única transação.
+
+    Cada partição é apagada na primeira vez que aparece (ou logo no início,
+    se era de um arquivo que mudou); depois, os arquivos inalterados que têm
+    linhas de uma partição apagada são lidos de novo para repô-las.
+    """
+    vistas = {arq['name']: set() for arq in pendentes}
+    linhas = {}
+    apagadas = set()
+    coluna_ano, coluna_mes = (COLUNAS_ORIGEM_PARTICAO[p] for p in PARTICOES)
+    with engine.begin() as conn, conn.connection.cursor() as cursor:
+        def apagar(particao):
+            if particao not in apagadas:
+                conn.execute(text(f'DELETE FROM {tabela} WHERE "{coluna_ano}" = :ano AND "{coluna_mes}" = :mes'),
+                             {'ano': particao[0], 'mes': particao[1]})
+                apagadas.add(particao)
+                linhas[particao] = 0
+
+        def copiar(particao, grupo):
+            copy_frame(cursor, tabela, grupo)
+            linhas[particao] += len(grupo)
+
+        # Partições antigas de arquivos alterados saem mesmo que não apareçam mais no arquivo
+        for arq in pendentes:
+            anterior = manifesto.get('arquivos', {}).get(arq['name'], {})
+            if anterior.get('sha') != arq['sha']:
+                for particao in anterior.get('particoes', []):
+                    apagar(tuple(particao))
+
+        gravadas = {arq['name']: _recorded_partitions(arq, manifesto) for arq in arquivos}
+        for arq in pendentes:
+            for particao, grupo in _iter_partitions(arq, schema, vistas[arq['name']]):
+                if _in_months(particao, meses) and particao not in gravadas[arq['name']]:
+                    apagar(particao)
+                    copiar(particao, grupo)
+
+        # Linhas de partições apagadas que vêm de arquivos não relidos acima
+        relacionados = [arq for arq in arquivos if gravadas[arq['name']] & apagadas]
+        if relacionados:
+            print(f"Relendo arquivos com linhas das partições substituídas: {[arq['name'] for arq in relacionados]}")
+        for arq in relacionados:
+            repor = gravadas[arq['name']] & apagadas
+            for particao, grupo in _iter_partitions(arq, schema, set()):
+                if particao in repor:
+                    copiar(particao, grupo)
+    return vistas, linhas
+
+
+def ingest_sources(engine, s3_client, bucket: str, arquivos: list, meses: list = None, tabela: str = 'pnad_covid',
+                   completo: bool = False, codigo: str = None, schema: dict = None,
+                   manifest_key: str = MANIFESTO_FONTES) -> list:
+    """ZIPs de origem -> ``tabela`` no RDS, só com o que mudou; devolve as partições ``(ano, mes)`` substituídas.
+
+    ``meses`` restringe os meses carregados (ex.: ``[7, 8, 9]``); as demais
+    partições de cada arquivo ficam como ``ignoradas`` no manifesto e o
+    arquivo só volta a ser baixado se uma delas entrar em ``meses``. Cada ZIP
+    é lido em blocos de CSV que vão direto para o ``COPY``.
+
+    A carga é completa (``bulk_load`` de todos os arquivos) com ``completo``,
+    se a tabela não existir, se o manifesto for de outra versão do código
+    (``codigo``) ou de outra ``tabela``. O manifesto só é gravado depois do
+    ``COMMIT``, então uma execução interrompida é refeita na próxima vez.
+    """
+    schema = fontes.load_dictionary_schema() if schema is None else schema
+    manifesto = load_manifest(s3_client, bucket, manifest_key)
+    with engine.connect() as conn:
+        existe = inspect(conn).has_table(tabela)
+    completo = (completo or not existe or manifesto.get('codigo') != codigo
+                or manifesto.get('tabela') != tabela or 'particoes' not in manifesto)
+
+    if completo:
+        print(f"Carga completa de {len(arquivos)} arquivo(s) em '{tabela}'")
+        manifesto = {'arquivos': {}, 'particoes': {}}
+        pendentes = list(arquivos)
+        vistas, linhas = _full_ingestion(engine, arquivos, meses, tabela, schema)
+    else:
+        pendentes = pending_sources(arquivos, manifesto, meses)
+        if not pendentes:
+            print("➡️ Nenhum arquivo novo ou alterado. Nada a processar.")
+            return []
+        print(f"Arquivos novos ou alterados: {[arq['name'] for arq in pendentes]}")
+        vistas, linhas = _incremental_ingestion(engine, arquivos, pendentes, manifesto, meses, tabela, schema)
+
+    execucao = _new_execution()
+    processado_em = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+    for arq in pendentes:
+        gravadas = _recorded_partitions(arq, manifesto) | {p for p in vistas[arq['name']] if _in_months(p, meses)}
+        manifesto['arquivos'][arq['name']] = {
+            'sha': arq['sha'],
+            'particoes': [list(p) for p in sorted(gravadas)],
+            'ignoradas': [list(p) for p in sorted(vistas[arq['name']] - gravadas)],
+            'processado_em': processado_em,
+        }
+    # Versão nova para cada partição substituída; as que ficaram sem linhas deixam de existir
+    for particao, total in linhas.items():
+        pid = partition_id(particao)
+        if total:
+            manifesto['particoes'][pid] = {'valores': list(particao), 'linhas': total, 'execucao': execucao}
+        else:
+            manifesto['particoes'].pop(pid, None)
+    manifesto.update(codigo=codigo, tabela=tabela)
+    save_manifest(s3_client, bucket, manifesto, manifest_key)
+
+    atualizadas = sorted(linhas)
+    print(f"✅ {len(atualizadas)} partição(ões) atualizada(s) em '{tabela}': {atualizadas}")
+    return atualizadas
+
+
+def upsert_partition(engine, tabela: str, dados, ano: int, mes: int, coluna_ano: str, coluna_mes: str,
+                     create_sql=None, indices: dict = None, check_table=None) -> int:
+    """Substitui no RDS as linhas do mês ``(ano, mes)`` pelas de ``dados`` em uma única transação (via ``COPY``).
+
+    ``dados`` é um ``DataFrame`` ou um iterável de lotes (vazio: a partição
+    só é apagada). Se a tabela não existir, é criada com ``create_sql``/
+    ``indices`` (como em ``rds.bulk_load``); se existir,
+    ``check_table(conn, tabela)`` pode validar o esquema antes de alterar
+    qualquer linha. Devolve o número de linhas gravadas.
+    """
+    lotes = iter([dados] if isinstance(dados, pd.DataFrame) else dados)
+    primeiro = next(lotes, None)
+    with engine.begin() as conn:
+        if inspect(conn).has_table(tabela):
+            if check_table is not None:
+                check_table(conn, tabela)
+            conn.execute(
+                text(f'DELETE FROM {tabela} WHERE "{coluna_ano}" = :ano AND "{coluna_mes}" = :mes'),
+                {'ano': ano, 'mes': mes},
+            )
+        elif primeiro is None:
+            return 0
+        else:
+            ddl = pd.io.sql.get_schema(primeiro.head(0), tabela, con=conn) if create_sql is None else create_sql(tabela)
+            conn.execute(text(ddl))
+            for nome, definicao in (indices or {}).items():
+                conn.execute(text(f"CREATE INDEX {tabela}_{nome}_idx ON {tabela} {definicao}"))
+        if primeiro is None:
+            return 0
+        with conn.connection.cursor() as cursor:
+            linhas = copy_frame(cursor, tabela, primeiro)
+            for lote in lotes:
+                linhas += copy_frame(cursor, tabela, lote)
+    return linhas
+
+
+def load_questionario_partitions(engine, s3_client, bucket: str, gold: str, tabela: str = 'questionario_covid',
+                                 codigo: str = None, completo: bool = False, manifest_key: str = None) -> tuple:
+    """Gold -> ``tabela``, com upsert só das partições da Gold que mudaram desde a última carga.
+
+    A carga é completa (``esquema.load_questionario``) com ``completo``, se a
+    tabela não existir ou se ainda não houver registro das partições
+    carregadas. Devolve ``(linhas da tabela, partições atualizadas)``.
+    """
+    manifest_key = manifest_key or MANIFESTO_RDS.format(tabela=tabela)
+    origens = camadas.layer_partitions(s3_client, bucket, gold)
+    if not origens:
+        raise ValueError(f"❌ Nenhum dado para processar. Verifique a camada s3://{bucket}/{gold}.")
+    carregadas = load_manifest(s3_client, bucket, manifest_key).get('particoes')
+    with engine.connect() as conn:
+        existe = inspect(conn).has_table(tabela)
+    linhas = sum(registro['linhas'] for registro in origens.values())
+
+    if completo or not existe or carregadas is None:
+        esquema.load_questionario(engine, camadas.iter_layer_batches(s3_client, bucket, gold), tabela)
+        a_processar, carregadas = sorted(origens, key=lambda pid: origens[pid]['valores']), {}
+    else:
+        a_processar, remover = camadas.stale_partitions(origens, carregadas, codigo)
+        if not a_processar and not remover:
+            print(f"➡️ '{tabela}' já está com as partições vigentes da Gold. Nada a processar.")
+            return linhas, []
+        coluna_ano, coluna_mes = (COLUNAS_GOLD_PARTICAO[p] for p in PARTICOES)
+        for pid in sorted(remover, key=lambda pid: carregadas[pid]['valores']):
+            ano, mes = carregadas.pop(pid)['valores']
+            upsert_partition(engine, tabela, (), ano, mes, coluna_ano, coluna_mes,
+                             check_table=esquema.check_table_schema)
+        for pid in a_processar:
+            ano, mes = origens[pid]['valores']
+            lotes = camadas.iter_file_batches(s3_client, bucket, origens[pid]['arquivos'])
+            gravadas = upsert_partition(engine, tabela, (esquema.check_schema(lote) for lote in lotes), ano, mes,
+                                        coluna_ano, coluna_mes, check_table=esquema.check_table_schema)
+            print(f"✅ Partição {pid}: {gravadas} linhas substituídas em '{tabela}'")
+
+    for pid in a_processar:
+        carregadas[pid] = {'valores': origens[pid]['valores'], 'linhas': origens[pid]['linhas'],
+                           'origem': origens[pid]['execucao'], 'codigo': codigo}
+    save_manifest(s3_client, bucket, {'tabela': tabela, 'particoes': carregadas}, manifest_key)
+    return linhas, a_processar
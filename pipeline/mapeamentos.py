@@ -0,0 +1,106 @@
+"""Seleção de colunas, renomeação e dicionários de códigos da camada Gold."""
+
+# Colunas mantidas na camada Silver (nomes já normalizados em minúsculas)
+COLUNAS_SILVER = [
+    'ano','v1013','v1012','uf','capital','rm_ride','estado','sigla','regiao','a002','a003','a004','a005',
+    'a006','b002','b005','b006','b007','b008','b009b','b009d','b009f','b0011','b0012','b0013','b0014','b0015',
+    'b0016','b0017','b0018','b0019','b00110','b00111','b00112','b00113','b0101','b0102','b0103','b0104','b0105','b0106','c007b','f001','b011','d0051', 'c01011',
+    # Desenho amostral: peso de expansão (V1032), UPA, estrato e domínio de pós-estratificação
+    'v1032','upa','estrato','posest',
+]
+
+# Dicionário de renomeação de colunas (Silver -> Gold)
+COLUNAS_GOLD = {
+    'v1013': 'mes_pesquisa', 'v1012': 'semana_mes',
+    'a002': 'idade', 'a003': 'sexo', 'a004': 'cor', 'a005': 'escolaridade',
+    'b002': 'buscou_auxilio_medico', 'b005': 'precisou_de_internacao', 'b006': 'precisou_de_sedacao',
+    'b007': 'plano_de_saude', 'b008': 'realizou_teste_covid', 'b009b': 'resultado_teste_swab',
+    'b009d': 'resultado_teste_dedo', 'b009f': 'resultado_teste_veia', 'b0011': 'frebre_semana_anterior',
+    'b0012': 'tosse_semana_anterior', 'b0013': 'dor_de_garganta_semana_anterior',
+    'b0014': 'dificuldade_de_respirar_semana_anterior', 'b0015': 'dor_de_cabeca_semana_anterior',
+    'b0016': 'dor_no_peito_semana_anterior', 'b0017': 'nausea_semana_anterior',
+    'b0018': 'nariz_constipado_semana_anterior', 'b0019': 'fadiga_semana_anterior',
+    'b00110': 'dor_nos_olhos_semana_anterior', 'b00111': 'perda_olfato_paladar_semana_anterior',
+    'b00112': 'dor_muscular_semana_anterior', 'b00113': 'diarreia_semana_anterior',
+    'b0101': 'diabetes', 'b0102': 'hipertensao', 'b0103': 'doenca_respiratoria',
+    'b0104': 'doencas_cardiacas', 'b0105': 'depressao', 'b0106': 'cancer',
+    'c007b': 'trabalha_atualmente', 'f001': 'modaria','b011':'isolamento_social','d0051': 'auxilio_emergencial','c01011':'faixa_salarial',
+    'v1032': 'peso',
+}
+
+# Rótulo (e código na Gold) usado para valores ausentes ou fora do dicionário
+DESCONHECIDO = 'Desconhecido'
+CODIGO_DESCONHECIDO = -1
+
+# Dicionários de mapeamento
+MAPEAMENTO_SEXO = {1: 'Masculino', 2: 'Feminino'}
+MAPEAMENTO_RACA_COR = {1: 'Branca', 2: 'Preta', 3: 'Amarela', 4: 'Parda', 5: 'Indígena'}
+MAPEAMENTO_ESCOLARIDADE = {1: 'Sem instrução', 2: 'Ensino Fundamental incompleto', 3: 'Ensino Fundamental completo', 4: 'Ensino Médio incompleto', 5: 'Ensino Médio completo', 6: 'Ensino Superior incompleto', 7: 'Ensino Superior completo', 8: 'Pós graduação, mestrado ou doutorado'}
+MAPEAMENTO_TIPO_INSTITUICAO = {1: 'Pública', 2: 'Privada'}
+MAPEAMENTO_SIM_NAO = {1: 'Sim', 2: 'Não'}
+MAPEAMENTO_TESTE_RESULTADO = {1: 'Positivo', 2: 'Negativo', 3: 'Inconclusivo', 4: 'Aguardando resultado'}
+MAPEAMENTO_TRABALHA_ATUALMENTE = {1: 'Sim, carteira assinada', 2: 'Sim, servidor público', 3: 'Não'}
+MAPEAMENTO_MORADIA = {1: 'Própria', 2: 'Própria', 3: 'Aluguel', 4: 'Cedido', 5: 'Cedido', 6: 'Cedido'}
+MAPEAMENTO_ISOLAMENTO = {1: 'Não fez restrição, levou vida normal como antes da pandemia', 2: 'Reduziu o contato com as pessoas, mas continuou saindo de casa para trabalho ou atividades não essenciais e/ou recebendo visitas', 3: 'Ficou em casa e só saiu em caso de necessidade básica', 4: 'Ficou rigorosamente em casa'}
+MAPEAMENTO_AUXILIO_SOCIAL = {1: 'Sim', 2: 'Não'}
+MAPEAMENTO_FAIXA_SALARIAL = {0:'0-100', 1: '101 - 300', 2: '301 - 600', 3: '601 - 800', 4: '801 - 1.600', 5: '1.601 - 3.000', 6: '3.001 - 10.000', 7:'Acima de 10.000',8:'Acima de 10.000',9:'Acima de 10.000'}
+
+# Códigos usados nos filtros sobre a Gold codificada
+CODIGO_SIM = 1
+CODIGO_POSITIVO = 1
+
+COLUNAS_SINTOMAS_GOLD = [
+    'frebre_semana_anterior', 'tosse_semana_anterior', 'dor_de_garganta_semana_anterior',
+    'dificuldade_de_respirar_semana_anterior', 'dor_de_cabeca_semana_anterior', 'dor_no_peito_semana_anterior',
+    'nausea_semana_anterior', 'nariz_constipado_semana_anterior', 'fadiga_semana_anterior',
+    'dor_nos_olhos_semana_anterior', 'perda_olfato_paladar_semana_anterior', 'dor_muscular_semana_anterior',
+    'diarreia_semana_anterior',
+]
+# Sintomas que definem o recorte "com sintomas" (coluna has_symptom da questionario_covid)
+COLUNAS_SINTOMAS_PRINCIPAIS = [
+    'frebre_semana_anterior', 'tosse_semana_anterior', 'dificuldade_de_respirar_semana_anterior',
+    'perda_olfato_paladar_semana_anterior',
+]
+# Coluna booleana da questionario_covid calculada pelo Postgres a partir desses sintomas
+COLUNA_COM_SINTOMAS = 'has_symptom'
+COLUNAS_COMORBIDADES = ['diabetes', 'hipertensao', 'doenca_respiratoria', 'doencas_cardiacas', 'depressao', 'cancer']
+
+# Colunas numéricas da Gold e o menor tipo inteiro que comporta o domínio de cada uma
+# (tipos fixos: lotes processados separadamente geram sempre o mesmo esquema)
+TIPOS_INTEIROS_GOLD = {
+    'ano': 'int16', 'mes_pesquisa': 'int8', 'semana_mes': 'int8', 'uf': 'int8', 'capital': 'int8',
+    'rm_ride': 'int8', 'idade': 'int16', 'a006': 'int8', 'modaria': 'int8',
+    'upa': 'int64', 'estrato': 'int32', 'posest': 'int16',
+}
+# Peso amostral (V1032): número de pessoas da população que cada linha representa
+COLUNA_PESO = 'peso'
+TIPOS_DECIMAIS_GOLD = {COLUNA_PESO: 'float64'}
+# Colunas de texto repetitivo guardadas como categoria (dicionário no Parquet)
+COLUNAS_TEXTO_GOLD = ['estado', 'sigla', 'regiao']
+
+# Coluna Gold -> dicionário aplicado na tradução de códigos para texto
+MAPEAMENTOS_GOLD = {
+    'sexo': MAPEAMENTO_SEXO,
+    'cor': MAPEAMENTO_RACA_COR,
+    'escolaridade': MAPEAMENTO_ESCOLARIDADE,
+    'buscou_auxilio_medico': MAPEAMENTO_SIM_NAO,
+    'precisou_de_internacao': MAPEAMENTO_SIM_NAO,
+    'precisou_de_sedacao': MAPEAMENTO_SIM_NAO,
+    'plano_de_saude': MAPEAMENTO_SIM_NAO,
+    'realizou_teste_covid': MAPEAMENTO_SIM_NAO,
+    'resultado_teste_swab': MAPEAMENTO_TESTE_RESULTADO,
+    'resultado_teste_dedo': MAPEAMENTO_TESTE_RESULTADO,
+    'resultado_teste_veia': MAPEAMENTO_TESTE_RESULTADO,
+    **{col: MAPEAMENTO_SIM_NAO for col in COLUNAS_SINTOMAS_GOLD},
+    **{col: MAPEAMENTO_SIM_NAO for col in COLUNAS_COMORBIDADES},
+    'trabalha_atualmente': MAPEAMENTO_TRABALHA_ATUALMENTE,
+    'isolamento_social': MAPEAMENTO_ISOLAMENTO,
+    'auxilio_emergencial': MAPEAMENTO_AUXILIO_SOCIAL,
+    'faixa_salarial': MAPEAMENTO_FAIXA_SALARIAL,
+}
+
+# Colunas codificadas que não passam pela tradução da Gold, mas têm rótulo para exibição
+ROTULOS_EXTRAS = {
+    'modaria': MAPEAMENTO_MORADIA,
+    'a006': MAPEAMENTO_SIM_NAO,
+}
@@ -0,0 +1,243 @@
+"""Instrumentação das etapas do pipeline e relatório JSON da execução.
+
+Cada etapa (``with relatorio.etapa('bronze') as etapa:``) registra tempo de
+relógio, linhas de entrada/saída, bytes lidos e gravados no S3, chamadas ao
+S3 por operação e o pico de memória residente (RSS) do processo durante a
+etapa. As chamadas ao S3 são contadas por eventos do botocore no cliente
+instrumentado (``relatorio.instrument_s3(s3_client)``), sem mudar o código
+das etapas. Ao final, ``relatorio.save()`` grava o relatório em JSON para
+comparar execuções. O ``pipeline.dag.run_dag`` abre uma etapa por tarefa.
+
+Perfil opcional por etapa (``perfil=`` ou variável ``PIPELINE_PERFIL``):
+
+- ``'cprofile'``: um ``.prof`` por etapa (abrir com ``snakeviz`` ou ``pstats``);
+- ``'py-spy'``: um flame graph ``.svg`` por etapa (precisa do ``py-spy`` no PATH).
+"""
+
+import contextvars
+import cProfile
+import datetime
+import json
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import psutil
+from botocore.utils import determine_content_length
+
+DIRETORIO_RELATORIOS = Path('relatorios')
+PREFIXO_RELATORIOS_S3 = '_relatorios'
+
+# Intervalo de amostragem da memória durante uma etapa (segundos)
+INTERVALO_MEMORIA = 0.05
+
+PERFIS = ('cprofile', 'py-spy')
+
+MB = 1024 * 1024
+
+
+class Etapa:
+    """Métricas de uma etapa; ``linhas_entrada``/``linhas_saida`` são preenchidas por quem executa a etapa."""
+
+    def __init__(self, nome: str, linhas_entrada: int = None):
+        self.nome = nome
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.bytes_lidos = 0
+        self.bytes_gravados = 0
+        self.chamadas_s3 = Counter()
+        self.inicio = None
+        self.duracao_s = None
+        self.pico_rss_mb = None
+        self.perfil = None
+        self.erro = None
+
+    def to_dict(self) -> dict:
+        return {
+            'nome': self.nome,
+            'inicio': self.inicio,
+            'duracao_s': self.duracao_s,
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'bytes_lidos': self.bytes_lidos,
+            'bytes_gravados': self.bytes_gravados,
+            'chamadas_s3': dict(self.chamadas_s3),
+            'pico_rss_mb': self.pico_rss_mb,
+            'perfil': self.perfil,
+            'erro': self.erro,
+        }
+
+
+class _MemorySampler:
+    """Thread que amostra o RSS do processo e guarda o maior valor visto."""
+
+    def __init__(self, intervalo: float = INTERVALO_MEMORIA):
+        self.intervalo = intervalo
+        self.processo = psutil.Process()
+        self.pico = self.processo.memory_info().rss
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, self.processo.memory_info().rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, self.processo.memory_info().rss)
+
+
+class RunReport:
+    """Relatório de uma execução do pipeline: uma entrada por etapa, na ordem em que terminaram.
+
+    Etapas podem rodar ao mesmo tempo em threads diferentes (como as tarefas
+    independentes do DAG): cada chamada ao S3 vai para a etapa aberta no
+    contexto (``contextvars``) da thread que a fez, e os pools internos de
+    ``pipeline.s3`` repassam esse contexto às suas threads. O pico de memória
+    é do processo, então etapas simultâneas veem o mesmo pico.
+    """
+
+    def __init__(self, nome: str = 'pipeline', perfil: str = None, diretorio=DIRETORIO_RELATORIOS,
+                 intervalo_memoria: float = INTERVALO_MEMORIA):
+        perfil = perfil or os.getenv('PIPELINE_PERFIL') or None
+        if perfil not in (None,) + PERFIS:
+            raise ValueError(f"Perfil desconhecido: {perfil!r} (use {PERFIS})")
+        self.nome = nome
+        self.perfil = perfil
+        self.diretorio = Path(diretorio)
+        self.intervalo_memoria = intervalo_memoria
+        self.execucao = f"{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:8]}"
+        self.inicio = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        self.etapas = []
+        # Etapa em andamento no contexto de quem chama (uma por thread de tarefa)
+        self._atual = contextvars.ContextVar(f'etapa_{self.execucao}', default=None)
+        self._lock = threading.Lock()
+        self._inicio_relogio = time.perf_counter()
+
+    def instrument_s3(self, s3_client):
+        """Passa a contar chamadas e bytes do ``s3_client`` na etapa em andamento."""
+        eventos = s3_client.meta.events
+        eventos.register('before-call.s3', self._on_send, unique_id=f'metricas-envio-{self.execucao}')
+        eventos.register('after-call.s3', self._on_call, unique_id=f'metricas-chamada-{self.execucao}')
+        return s3_client
+
+    def _on_send(self, params, **kwargs):
+        if params.get('method') not in ('PUT', 'POST') or not params.get('body'):
+            return
+        tamanho = determine_content_length(params['body']) or 0
+        etapa = self._atual.get()
+        if etapa is not None:
+            with self._lock:
+                etapa.bytes_gravados += tamanho
+
+    def _on_call(self, event_name, parsed=None, **kwargs):
+        operacao = event_name.rsplit('.', 1)[-1]
+        etapa = self._atual.get()
+        if etapa is None:
+            return
+        with self._lock:
+            etapa.chamadas_s3[operacao] += 1
+            if operacao == 'GetObject' and parsed:
+                etapa.bytes_lidos += int(parsed.get('ContentLength', 0) or 0)
+
+    def _profile_path(self, etapa: Etapa, extensao: str) -> Path:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        return self.diretorio / f"{self.nome}_{self.execucao}_{etapa.nome}.{extensao}"
+
+    @contextmanager
+    def _profile(self, etapa: Etapa):
+        if self.perfil == 'cprofile':
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+            try:
+                yield
+            finally:
+                perfilador.disable()
+                caminho = self._profile_path(etapa, 'prof')
+                perfilador.dump_stats(caminho)
+                etapa.perfil = str(caminho)
+        elif self.perfil == 'py-spy' and shutil.which('py-spy'):
+            caminho = self._profile_path(etapa, 'svg')
+            processo = subprocess.Popen(
+                ['py-spy', 'record', '--pid', str(os.getpid()), '--output', str(caminho), '--format', 'flamegraph'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                yield
+            finally:
+                # O py-spy grava o flame graph ao receber SIGINT
+                processo.send_signal(signal.SIGINT)
+                processo.wait()
+                etapa.perfil = str(caminho)
+        else:
+            if self.perfil == 'py-spy':
+                print("⚠️ py-spy não encontrado no PATH; etapa executada sem perfil.")
+            yield
+
+    @contextmanager
+    def etapa(self, nome: str, linhas_entrada: int = None):
+        """Mede a etapa ``nome``; o bloco pode preencher ``linhas_entrada``/``linhas_saida`` do objeto recebido."""
+        etapa = Etapa(nome, linhas_entrada)
+        etapa.inicio = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        token = self._atual.set(etapa)
+        inicio = time.perf_counter()
+        try:
+            with _MemorySampler(self.intervalo_memoria) as memoria, self._profile(etapa):
+                yield etapa
+        except BaseException as e:
+            etapa.erro = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            etapa.duracao_s = round(time.perf_counter() - inicio, 3)
+            etapa.pico_rss_mb = round(memoria.pico / MB, 1)
+            self._atual.reset(token)
+            with self._lock:
+                self.etapas.append(etapa)
+            print(f"⏱️ {nome}: {etapa.duracao_s:.2f} s, pico de memória {etapa.pico_rss_mb:.0f} MB")
+
+    def to_dict(self) -> dict:
+        return {
+            'nome': self.nome,
+            'execucao': self.execucao,
+            'inicio': self.inicio,
+            'duracao_s': round(time.perf_counter() - self._inicio_relogio, 3),
+            'pico_rss_mb': max((etapa.pico_rss_mb for etapa in self.etapas), default=None),
+            'etapas': [etapa.to_dict() for etapa in self.etapas],
+        }
+
+    def save(self, caminho=None) -> Path:
+        """Grava o relatório em ``relatorios/<nome>_<execucao>.json`` (ou em ``caminho``)."""
+        caminho = Path(caminho) if caminho else self.diretorio / f"{self.nome}_{self.execucao}.json"
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"✅ Relatório da execução salvo em {caminho}")
+        return caminho
+
+    def save_to_s3(self, s3_client, bucket: str, prefix: str = PREFIXO_RELATORIOS_S3) -> str:
+        """Grava o relatório em ``s3://bucket/_relatorios/`` (fora dos prefixos das camadas)."""
+        s3_key = f"{prefix}/{self.nome}_{self.execucao}.json"
+        corpo = json.dumps(self.to_dict(), ensure_ascii=False, indent=2).encode('utf-8')
+        s3_client.put_object(Bucket=bucket, Key=s3_key, Body=corpo, ContentType='application/json')
+        print(f"✅ Relatório da execução salvo em s3://{bucket}/{s3_key}")
+        return s3_key
+
+    def summary(self):
+        """Tabela das etapas (``DataFrame``), da mais lenta para a mais rápida."""
+        import pandas as pd
+
+        linhas = [{**etapa.to_dict(), 'chamadas_s3': sum(etapa.chamadas_s3.values())} for etapa in self.etapas]
+        colunas = ['nome', 'duracao_s', 'linhas_entrada', 'linhas_saida', 'bytes_lidos', 'bytes_gravados',
+                   'chamadas_s3', 'pico_rss_mb', 'erro']
+        return pd.DataFrame(linhas, columns=colunas).sort_values('duracao_s', ascending=False, ignore_index=True)
@@ -0,0 +1,115 @@
+"""Carga em massa no Postgres (RDS) via ``COPY FROM STDIN`` (e extração via ``COPY TO STDOUT``).
+
+O ``DataFrame.to_sql`` padrão envia as linhas em ``INSERT``s; aqui os dados
+vão em CSV pelo ``COPY`` do psycopg2 (``copy_expert``) para uma tabela de
+carga, os índices são criados só depois dos dados, e a tabela de carga
+substitui a definitiva. Tudo acontece em uma única transação: quem consulta a
+tabela vê a versão antiga até o ``COMMIT`` e a nova logo depois, nunca uma
+tabela vazia ou pela metade.
+"""
+
+import io
+
+import pandas as pd
+
+# Linhas por bloco de CSV enviado ao COPY (limita a memória do buffer)
+COPY_CHUNK_ROWS = 100_000
+
+SUFIXO_CARGA = '_carga'
+
+
+def _quote(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def copy_frame(cursor, tabela: str, df: pd.DataFrame, chunk_rows: int = COPY_CHUNK_ROWS) -> int:
+    """Envia ``df`` para ``tabela`` com ``COPY ... FROM STDIN`` em blocos de ``chunk_rows`` linhas."""
+    comando = f"COPY {tabela} ({', '.join(_quote(col) for col in df.columns)}) FROM STDIN WITH (FORMAT csv)"
+    for inicio in range(0, len(df), chunk_rows):
+        buffer = io.StringIO()
+        df.iloc[inicio:inicio + chunk_rows].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(comando, buffer)
+    return len(df)
+
+
+def copy_query_to_file(engine, consulta: str, arquivo) -> int:
+    """Grava o resultado de ``consulta`` em ``arquivo`` (binário) como CSV com cabeçalho, via ``COPY TO STDOUT``.
+
+    Devolve o número de bytes gravados.
+    """
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            inicio = arquivo.tell()
+            cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv, HEADER)", arquivo)
+            return arquivo.tell() - inicio
+    finally:
+        conn.close()
+
+
+def _rename_dependents(cursor, carga: str, tabela: str):
+    """Dá aos índices (inclusive o da chave primária) e sequências da tabela o prefixo definitivo."""
+    cursor.execute(
+        """
+        SELECT c.relkind, c.relname
+        FROM pg_class c
+        LEFT JOIN pg_index i ON i.indexrelid = c.oid
+        LEFT JOIN pg_depend d ON d.objid = c.oid AND c.relkind = 'S'
+        WHERE (i.indrelid = %(tabela)s::regclass OR d.refobjid = %(tabela)s::regclass)
+          AND c.relname LIKE %(prefixo)s
+        """,
+        {'tabela': tabela, 'prefixo': f"{carga}%"},
+    )
+    for tipo, nome in cursor.fetchall():
+        objeto = 'SEQUENCE' if tipo == 'S' else 'INDEX'
+        cursor.execute(f"ALTER {objeto} {nome} RENAME TO {tabela}{nome[len(carga):]}")
+
+
+def bulk_load(engine, tabela: str, dados, indices: dict = None, create_sql=None,
+              chunk_rows: int = COPY_CHUNK_ROWS) -> int:
+    """Substitui ``tabela`` pelo conteúdo de ``dados`` e devolve o número de linhas carregadas.
+
+    ``dados`` é um ``DataFrame`` ou um iterável de ``DataFrame``s com as
+    mesmas colunas e tipos (ex.: lotes de ``camadas.iter_layer_batches``), consumido
+    um lote por vez. Sem ``create_sql`` (função ``tabela -> CREATE TABLE``), o
+    esquema é o mesmo que o ``to_sql`` criaria para o primeiro lote.
+    ``indices`` (``{nome: "(colunas) [WHERE ...]"}``) são criados depois da carga.
+    """
+    lotes = iter([dados] if isinstance(dados, pd.DataFrame) else dados)
+    primeiro = next(lotes, None)
+    if primeiro is None:
+        raise ValueError(f"Nenhum dado para carregar em '{tabela}'")
+
+    carga = f"{tabela}{SUFIXO_CARGA}"
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {carga}")
+            if create_sql is None:
+                cursor.execute(pd.io.sql.get_schema(primeiro.head(0), carga, con=engine))
+            else:
+                cursor.execute(create_sql(carga))
+
+            linhas = copy_frame(cursor, carga, primeiro, chunk_rows)
+            for lote in lotes:
+                linhas += copy_frame(cursor, carga, lote, chunk_rows)
+
+            # Índices só depois dos dados: uma ordenação por índice em vez de uma atualização por linha
+            for nome, definicao in (indices or {}).items():
+                cursor.execute(f"CREATE INDEX {carga}_{nome}_idx ON {carga} {definicao}")
+            cursor.execute(f"ANALYZE {carga}")
+
+            # Troca: a tabela antiga some e a de carga assume o nome (índices e sequências também)
+            cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+            cursor.execute(f"ALTER TABLE {carga} RENAME TO {tabela}")
+            _rename_dependents(cursor, carga, tabela)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"✅ {linhas} linhas carregadas na tabela '{tabela}' via COPY")
+    return linhas
@@ -0,0 +1,411 @@
+"""Leitura e gravação das camadas Parquet no S3.
+
+A listagem é paginada (``list_objects_v2`` devolve no máximo 1000 chaves por
+chamada) e os objetos são baixados em paralelo por um pool de threads de
+tamanho fixo. Cada arquivo é lido já com a projeção de colunas e os filtros
+aplicados, e as tabelas são concatenadas no Arrow antes de virar pandas. Na
+gravação, ``MultipartUpload`` envia cada arquivo em partes, em paralelo,
+enquanto ele é escrito.
+
+Cada camada tem um manifesto (``<camada>/_current.json``) com a lista dos
+arquivos da gravação vigente. Uma gravação nova vai para arquivos próprios e
+só passa a valer quando o manifesto é substituído (um único ``PUT``, atômico
+no S3); os objetos que deixaram de valer são apagados em seguida. Os
+leitores usam o manifesto quando ele existe, então nunca veem uma gravação
+pela metade nem arquivos de execuções anteriores. O nome começa com ``_``
+para o Athena e o ``pyarrow.dataset`` o ignorarem.
+
+Camadas particionadas (``<camada>/ano=2020/v1013=9/...``) guardam no mesmo
+manifesto um registro por partição (``particoes``); ``commit_partitions``
+substitui só as partições regravadas e mantém as demais.
+"""
+
+import contextvars
+import datetime
+import json
+import operator
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+from pyarrow import fs
+
+# Downloads simultâneos por leitura (o pool padrão do boto3 tem 10 conexões)
+MAX_WORKERS = 8
+
+# Partes do upload multipart: mínimo de 5 MB no S3 (exceto a última)
+TAMANHO_PARTE = 8 * 1024 * 1024
+# Partes enviadas ao mesmo tempo por arquivo; a memória do envio fica em ~(2 x isto) partes
+PARTES_SIMULTANEAS = 4
+
+# Manifesto da gravação vigente de cada camada
+MANIFESTO_CAMADA = '_current.json'
+# Limite de chaves por chamada do delete_objects
+CHAVES_POR_EXCLUSAO = 1000
+
+
+def _layer_prefix(prefix: str) -> str:
+    """Garante a barra final, para 'raw' não casar também com 'raw_backup/'."""
+    return prefix.rstrip('/') + '/' if prefix else ''
+
+
+def _list_keys(s3_client, bucket: str, prefix: str) -> list:
+    """Lista (com paginação) todas as chaves sob ``prefix``."""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    return [obj['Key'] for pagina in paginator.paginate(Bucket=bucket, Prefix=_layer_prefix(prefix))
+            for obj in pagina.get('Contents', [])]
+
+
+def layer_root(prefix: str) -> str:
+    """Raiz da camada de um prefixo de partição (``gold/ano=2020/v1013=9/`` -> ``gold``), onde fica o manifesto."""
+    segmentos = prefix.strip('/').split('/')
+    while len(segmentos) > 1 and '=' in segmentos[-1]:
+        segmentos.pop()
+    return '/'.join(segmentos)
+
+
+def manifest_key(prefix: str) -> str:
+    return f"{_layer_prefix(prefix)}{MANIFESTO_CAMADA}"
+
+
+def load_layer_manifest(s3_client, bucket: str, prefix: str) -> dict:
+    """Manifesto da gravação vigente da camada (``None`` se a camada ainda não tem um)."""
+    try:
+        obj = s3_client.get_object(Bucket=bucket, Key=manifest_key(prefix))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(obj['Body'].read())
+
+
+def list_parquet_keys(s3_client, bucket: str, prefix: str) -> list:
+    """Chaves ``.parquet`` vigentes sob ``prefix``.
+
+    Se a camada tem manifesto, são os arquivos listados nele que estão sob
+    ``prefix`` (que pode ser uma partição da camada); senão, a listagem
+    paginada do prefixo.
+    """
+    raiz = _layer_prefix(prefix)
+    manifesto = load_layer_manifest(s3_client, bucket, layer_root(prefix))
+    if manifesto is not None:
+        return [chave for chave in manifesto['arquivos'] if chave.startswith(raiz)]
+    return [chave for chave in _list_keys(s3_client, bucket, prefix) if chave.endswith('.parquet')]
+
+
+def delete_keys(s3_client, bucket: str, chaves: list):
+    """Apaga ``chaves`` em lotes de até 1000 por chamada."""
+    chaves = list(chaves)
+    for inicio in range(0, len(chaves), CHAVES_POR_EXCLUSAO):
+        lote = chaves[inicio:inicio + CHAVES_POR_EXCLUSAO]
+        s3_client.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': chave} for chave in lote], 'Quiet': True})
+
+
+def commit_layer(s3_client, bucket: str, prefix: str, arquivos: list, execucao: str, linhas: int = None,
+                 limpar: bool = True, particoes: dict = None) -> dict:
+    """Publica ``arquivos`` como a gravação vigente da camada substituindo o manifesto.
+
+    Com ``limpar``, apaga depois todos os objetos da camada que não estão no
+    manifesto novo (gravações anteriores, arquivos de execuções que falharam
+    e arquivos do formato antigo, sem manifesto). Uma lista vazia é recusada:
+    publicá-la apagaria a camada inteira. ``particoes`` (ver
+    ``commit_partitions``) vai junto no manifesto.
+    """
+    if not arquivos:
+        raise ValueError(f"Nenhum arquivo para publicar em s3://{bucket}/{_layer_prefix(prefix)}; camada mantida")
+    manifesto = {
+        'execucao': execucao,
+        'arquivos': list(arquivos),
+        'linhas': linhas,
+        'publicado_em': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+    }
+    if particoes is not None:
+        manifesto['particoes'] = particoes
+    corpo = json.dumps(manifesto, ensure_ascii=False, indent=2).encode('utf-8')
+    s3_client.put_object(Bucket=bucket, Key=manifest_key(prefix), Body=corpo, ContentType='application/json')
+    if limpar:
+        manter = set(manifesto['arquivos']) | {manifest_key(prefix), _layer_prefix(prefix)}
+        antigos = [chave for chave in _list_keys(s3_client, bucket, prefix) if chave not in manter]
+        delete_keys(s3_client, bucket, antigos)
+        if antigos:
+            print(f"➡️ {len(antigos)} objeto(s) de gravações anteriores removido(s) de s3://{bucket}/{_layer_prefix(prefix)}")
+    return manifesto
+
+
+def commit_partitions(s3_client, bucket: str, prefix: str, novas: dict, execucao: str, remover=(),
+                      limpar: bool = True) -> dict:
+    """Publica as partições ``novas`` e tira ``remover`` do manifesto, mantendo as demais partições.
+
+    ``novas`` é ``{id: registro}``, com os ``arquivos`` e as ``linhas`` de
+    cada partição (mais o que quem grava quiser guardar, como a versão de
+    origem). Um manifesto sem ``particoes`` (camada gravada inteira, sem
+    partições) é substituído por completo.
+    """
+    atual = load_layer_manifest(s3_client, bucket, prefix) or {}
+    particoes = {pid: registro for pid, registro in atual.get('particoes', {}).items() if pid not in remover}
+    particoes.update(novas)
+    ordem = sorted(particoes, key=lambda pid: particoes[pid]['valores'])
+    arquivos = [chave for pid in ordem for chave in particoes[pid]['arquivos']]
+    linhas = sum(particoes[pid]['linhas'] for pid in ordem)
+    return commit_layer(s3_client, bucket, prefix, arquivos, execucao, linhas, limpar,
+                        {pid: particoes[pid] for pid in ordem})
+
+
+class MultipartUpload:
+    """Arquivo de escrita que envia o conteúdo ao S3 em partes, enquanto é escrito.
+
+    Cada ``tamanho_parte`` bytes viram um ``UploadPart`` em um pool de
+    ``partes_simultaneas`` threads; quando há partes demais em envio, a
+    escrita espera uma terminar. A memória usada é constante, sem o arquivo
+    inteiro em ``BytesIO`` nem em disco. ``complete()`` envia o resto e fecha
+    o upload (um ``PutObject`` simples se o arquivo coube em uma parte);
+    ``abort()`` descarta as partes já enviadas.
+    """
+
+    def __init__(self, s3_client, bucket: str, key: str, tamanho_parte: int = TAMANHO_PARTE,
+                 partes_simultaneas: int = PARTES_SIMULTANEAS):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.tamanho_parte = tamanho_parte
+        self.partes_simultaneas = partes_simultaneas
+        self.closed = False
+        self._buffer = bytearray()
+        self._posicao = 0
+        self._upload_id = None
+        self._pool = None
+        self._envios = {}
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._posicao
+
+    def write(self, dados) -> int:
+        self._buffer += dados
+        self._posicao += len(dados)
+        while len(self._buffer) >= self.tamanho_parte:
+            parte = bytes(self._buffer[:self.tamanho_parte])
+            del self._buffer[:self.tamanho_parte]
+            self._send_part(parte)
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        # Chamado pelo ParquetWriter ao gravar o rodapé; o upload só termina em complete()
+        self.closed = True
+
+    def _collect(self, envios):
+        for envio in envios:
+            self._partes.append(envio.result())
+            del self._envios[envio]
+
+    def _send_part(self, parte: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket, Key=self.key)['UploadId']
+            self._pool = ThreadPoolExecutor(max_workers=self.partes_simultaneas)
+        if len(self._envios) >= self.partes_simultaneas:
+            feitos, _ = wait(self._envios, return_when=FIRST_COMPLETED)
+            self._collect(feitos)
+        numero = len(self._partes) + len(self._envios) + 1
+        # copy_context: as métricas da etapa (pipeline.metricas) seguem para a thread do envio
+        envio = self._pool.submit(contextvars.copy_context().run, self._upload_part, numero, parte)
+        self._envios[envio] = numero
+
+    def _upload_part(self, numero: int, parte: bytes) -> dict:
+        resposta = self.s3_client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                              PartNumber=numero, Body=parte)
+        return {'PartNumber': numero, 'ETag': resposta['ETag']}
+
+    def complete(self):
+        """Envia o que falta e conclui o upload."""
+        if self._upload_id is None:
+            self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            self._buffer = bytearray()
+            return
+        try:
+            if self._buffer:
+                self._send_part(bytes(self._buffer))
+                self._buffer = bytearray()
+            self._collect(list(self._envios))
+            partes = sorted(self._partes, key=lambda parte: parte['PartNumber'])
+            self.s3_client.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                                     MultipartUpload={'Parts': partes})
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._pool.shutdown()
+
+    def abort(self):
+        """Descarta o upload (nenhum objeto é criado)."""
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        self._pool.shutdown(cancel_futures=True)
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        self._upload_id = None
+
+
+def partition_values(key: str) -> dict:
+    """Valores de partição no estilo Hive (``.../ano=2020/v1013=9/arquivo.parquet``) presentes na chave."""
+    valores = {}
+    for segmento in key.split('/')[:-1]:
+        coluna, sep, valor = segmento.partition('=')
+        if sep:
+            valores[coluna] = int(valor) if valor.lstrip('-').isdigit() else valor
+    return valores
+
+
+def add_partition_columns(tabela: pa.Table, key: str, columns=None) -> pa.Table:
+    """Recoloca as colunas de partição que não estão dentro do arquivo (as gravadas nele são mantidas)."""
+    for coluna, valor in partition_values(key).items():
+        if coluna in tabela.column_names or (columns is not None and coluna not in columns):
+            continue
+        tipo = pa.int32() if isinstance(valor, int) else pa.string()
+        tabela = tabela.append_column(coluna, pa.array([valor] * tabela.num_rows, type=tipo))
+    return tabela
+
+
+# Operadores dos filtros do ``pyarrow.parquet``, avaliados nos valores de partição da chave
+OPERADORES_FILTRO = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+    'in': lambda valor, opcoes: valor in opcoes, 'not in': lambda valor, opcoes: valor not in opcoes,
+}
+
+
+def split_partition_filters(particoes: dict, filters=None) -> tuple:
+    """Avalia nos valores de partição da chave os predicados sobre colunas de partição.
+
+    ``filters`` está no formato do ``pyarrow.parquet``: uma lista de tuplas
+    (E) ou uma lista de listas (OU de Es). Retorna ``(atende, restantes)``:
+    ``atende`` é falso quando nenhuma conjunção pode valer para esta partição
+    (o objeto nem precisa ser baixado); ``restantes`` são os predicados sobre
+    colunas do arquivo, no formato OU de Es (``None`` se não sobra nenhum).
+    """
+    if not filters:
+        return True, None
+    conjuncoes = filters if isinstance(filters[0], list) else [filters]
+    restantes = []
+    for conjuncao in conjuncoes:
+        if not all(OPERADORES_FILTRO[op](particoes[coluna], valor)
+                   for coluna, op, valor in conjuncao if coluna in particoes):
+            continue
+        resto = [(coluna, op, valor) for coluna, op, valor in conjuncao if coluna not in particoes]
+        if not resto:
+            # Conjunção atendida só pela partição: todas as linhas do arquivo entram
+            return True, None
+        restantes.append(resto)
+    return bool(restantes), restantes or None
+
+
+def _read_object(s3_client, bucket: str, key: str, columns=None, filters=None) -> pa.Table:
+    """Lê um objeto com a projeção e os ``filters`` (só colunas do arquivo) empurrados para o ``pyarrow``."""
+    particoes = partition_values(key)
+    obj_data = s3_client.get_object(Bucket=bucket, Key=key)
+    conteudo = BytesIO(obj_data['Body'].read())
+    colunas_arquivo = columns
+    if particoes and columns is not None:
+        # Colunas de partição que não estão dentro do arquivo vêm da chave
+        nomes = set(pq.read_schema(conteudo).names)
+        colunas_arquivo = [c for c in columns if c in nomes or c not in particoes]
+    tabela = pq.read_table(conteudo, columns=colunas_arquivo, filters=filters)
+    return add_partition_columns(tabela, key, columns) if particoes else tabela
+
+
+def read_tables_from_s3(s3_client, bucket: str, keys: list, columns=None, filters=None,
+                        max_workers: int = MAX_WORKERS) -> pa.Table:
+    """Baixa e lê ``keys`` em paralelo, mantendo a ordem da listagem.
+
+    ``columns`` projeta as colunas e ``filters`` (formato do ``pyarrow.parquet``,
+    ex.: ``[('v1013', 'in', [7, 8, 9])]``) é aplicado em duas fases: os
+    predicados sobre colunas de partição (``ano=``/``v1013=`` na chave)
+    descartam objetos antes do download; os demais vão para o
+    ``pq.read_table``, que pula row groups pelas estatísticas e filtra as
+    linhas na leitura.
+    """
+    planos = []
+    for key in keys:
+        atende, restantes = split_partition_filters(partition_values(key), filters)
+        if atende:
+            planos.append((key, restantes))
+    if not planos:
+        return pa.table({})
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        leituras = [pool.submit(contextvars.copy_context().run, _read_object, s3_client, bucket, key, columns, restantes)
+                    for key, restantes in planos]
+        tabelas = [leitura.result() for leitura in leituras]
+    # promote_options: arquivos em que uma coluna veio toda nula (tipo null) são unificados
+    return pa.concat_tables(tabelas, promote_options='default')
+
+
+def read_parquet_from_s3(s3_client, bucket: str, prefix: str, columns=None, filters=None,
+                         max_workers: int = MAX_WORKERS, as_table: bool = False):
+    """Lê todos os arquivos Parquet de um prefixo S3.
+
+    Retorna um ``DataFrame`` (ou ``pyarrow.Table`` com ``as_table=True``),
+    vazio só quando o prefixo não tem arquivos. Erros de leitura (permissão,
+    throttling, arquivo corrompido) são propagados: não podem ser confundidos
+    com uma camada sem dados.
+    """
+    chaves = list_parquet_keys(s3_client, bucket, prefix)
+    if not chaves:
+        print(f"❌ Nenhum arquivo encontrado em s3://{bucket}/{prefix}")
+        return pa.table({}) if as_table else pd.DataFrame()
+
+    print(f"Lendo {len(chaves)} arquivo(s) de s3://{bucket}/{_layer_prefix(prefix)} com {max_workers} downloads simultâneos")
+    tabela = read_tables_from_s3(s3_client, bucket, chaves, columns, filters, max_workers)
+    return tabela if as_table else tabela.to_pandas()
+
+
+def open_dataset(bucket: str, prefix: str, filesystem=None, partitioning=None, s3_client=None) -> ds.Dataset:
+    """Abre a camada como ``pyarrow.dataset`` sem baixar nada.
+
+    A projeção (``dataset.to_table(columns=...)``) e os filtros
+    (``filter=ds.field('uf') == 35``) são empurrados para a leitura: só os
+    row groups e colunas necessários são buscados no S3, por requisições de
+    intervalo. ``filesystem`` pode ser um ``pyarrow.fs.S3FileSystem`` com as
+    credenciais da sessão (ou apontando para um MinIO/moto local). Com
+    ``s3_client``, o dataset tem só os arquivos do manifesto da camada. As
+    camadas do pipeline gravam as colunas de partição dentro dos arquivos,
+    por isso ``partitioning`` (ex.: ``'hive'``) só é preciso para pastas
+    gravadas de outra forma.
+    """
+    caminho = f"{bucket}/{_layer_prefix(prefix)}"
+    if s3_client is not None:
+        if filesystem is None:
+            filesystem, _ = fs.FileSystem.from_uri(f"s3://{caminho}")
+        chaves = list_parquet_keys(s3_client, bucket, prefix)
+        return ds.dataset([f"{bucket}/{chave}" for chave in chaves], format='parquet', filesystem=filesystem,
+                          partitioning=partitioning, partition_base_dir=caminho)
+    if filesystem is None:
+        caminho = f"s3://{caminho}"
+    return ds.dataset(caminho, format='parquet', filesystem=filesystem, partitioning=partitioning)
+
+
+def s3_filesystem(aws_access_key_id=None, aws_secret_access_key=None, aws_session_token=None,
+                  region_name=None, endpoint_url=None) -> fs.S3FileSystem:
+    """``S3FileSystem`` do Arrow com os mesmos parâmetros usados no ``boto3.client``.
+
+    ``endpoint_url`` permite apontar para um MinIO/moto local.
+    """
+    opcoes = {
+        'access_key': aws_access_key_id,
+        'secret_key': aws_secret_access_key,
+        'session_token': aws_session_token,
+        'region': region_name,
+    }
+    if endpoint_url:
+        esquema, _, endereco = endpoint_url.partition('://')
+        opcoes.update(endpoint_override=endereco, scheme=esquema)
+    return fs.S3FileSystem(**{chave: valor for chave, valor in opcoes.items() if valor is not None})
@@ -0,0 +1,139 @@
+"""Recodificações vetorizadas (sem ``apply`` linha a linha).
+
+Os dicionários de códigos são convertidos em tabelas de consulta NumPy e o
+resultado sai como ``pd.Categorical``: um inteiro pequeno por linha mais a
+lista de rótulos, em vez de uma string Python por célula.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pipeline.mapeamentos import (CODIGO_DESCONHECIDO, COLUNAS_GOLD, COLUNAS_TEXTO_GOLD, DESCONHECIDO,
+                                  MAPEAMENTOS_GOLD, ROTULOS_EXTRAS, TIPOS_DECIMAIS_GOLD, TIPOS_INTEIROS_GOLD)
+
+
+def categories_for(mapeamento: dict, padrao=DESCONHECIDO) -> list:
+    """Rótulos distintos do dicionário (na ordem dos códigos) seguidos do rótulo padrão."""
+    categorias = list(dict.fromkeys(mapeamento.values()))
+    if padrao is not None and padrao not in categorias:
+        categorias.append(padrao)
+    return categorias
+
+
+def map_codes(valores: pd.Series, mapeamento: dict, padrao=DESCONHECIDO) -> pd.Series:
+    """Equivalente vetorizado de ``valores.map(mapeamento).fillna(padrao)``.
+
+    Os códigos numéricos indexam diretamente uma tabela de consulta; valores
+    nulos, não inteiros ou fora do dicionário recebem ``padrao``.
+    """
+    categorias = categories_for(mapeamento, padrao)
+    codigo_padrao = categorias.index(padrao) if padrao is not None else -1
+
+    chaves = np.fromiter(mapeamento.keys(), dtype=np.int64, count=len(mapeamento))
+    minimo = int(chaves.min())
+    tabela = np.full(int(chaves.max()) - minimo + 1, codigo_padrao, dtype=np.int16)
+    tabela[chaves - minimo] = [categorias.index(rotulo) for rotulo in mapeamento.values()]
+
+    numeros = pd.to_numeric(valores, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    validos = np.isfinite(numeros) & (numeros >= minimo) & (numeros < minimo + len(tabela)) & (numeros == np.trunc(numeros))
+
+    codigos = np.full(len(numeros), codigo_padrao, dtype=np.int16)
+    codigos[validos] = tabela[numeros[validos].astype(np.int64) - minimo]
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias), index=valores.index, name=valores.name)
+
+
+def equals_mask(valores: pd.Series, valor) -> np.ndarray:
+    """Máscara booleana ``valores == valor``; em categóricas compara só os códigos inteiros."""
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        if valor not in valores.cat.categories:
+            return np.zeros(len(valores), dtype=bool)
+        return valores.cat.codes.to_numpy() == valores.cat.categories.get_loc(valor)
+    return np.asarray(valores.to_numpy() == valor, dtype=bool)
+
+
+def any_equals(df: pd.DataFrame, colunas: list, valor) -> np.ndarray:
+    """Máscara das linhas em que ao menos uma das ``colunas`` vale ``valor``.
+
+    Substitui ``df[colunas].apply(lambda x: 1 if valor in x.values else 0, axis=1)``.
+    """
+    if not colunas:
+        return np.zeros(len(df), dtype=bool)
+    return np.logical_or.reduce([equals_mask(df[col], valor) for col in colunas])
+
+
+def count_equals(df: pd.DataFrame, colunas: list, valor) -> pd.Series:
+    """Quantidade de ocorrências de ``valor`` por coluna.
+
+    Substitui ``df[colunas].apply(lambda x: (x == valor).sum())``.
+    """
+    return pd.Series({col: int(np.count_nonzero(equals_mask(df[col], valor))) for col in colunas}, dtype='int64')
+
+
+def apply_gold_mappings(df: pd.DataFrame, mapeamentos: dict = None, padrao=DESCONHECIDO) -> pd.DataFrame:
+    """Renomeia as colunas Silver e traduz os códigos de todas as colunas mapeadas da Gold.
+
+    Como a Gold guarda apenas os códigos, esta é a tradução "na borda":
+    aplicada só em quem exibe os dados (notebook de análise, relatórios).
+    """
+    mapeamentos = MAPEAMENTOS_GOLD if mapeamentos is None else mapeamentos
+    df_gold = df.rename(columns=COLUNAS_GOLD)
+    for coluna, mapeamento in mapeamentos.items():
+        if coluna in df_gold.columns:
+            df_gold[coluna] = map_codes(df_gold[coluna], mapeamento, padrao)
+    return df_gold
+
+
+def _valid_codes(numeros: np.ndarray, codigos) -> np.ndarray:
+    """Máscara dos valores numéricos que pertencem ao conjunto ``codigos``."""
+    return np.isin(numeros, np.fromiter(codigos, dtype='float64'))
+
+
+def encode_codes(valores: pd.Series, mapeamento: dict, padrao: int = CODIGO_DESCONHECIDO) -> pd.Series:
+    """Normaliza os códigos de ``valores`` para ``int8``.
+
+    Códigos presentes no dicionário são mantidos; nulos e códigos fora dele
+    viram ``padrao`` (exibido como ``Desconhecido``).
+    """
+    numeros = pd.to_numeric(valores, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    codigos = np.where(_valid_codes(numeros, mapeamento.keys()), numeros, padrao).astype(np.int8)
+    return pd.Series(codigos, index=valores.index, name=valores.name)
+
+
+def downcast_integers(valores: pd.Series, dtype: str, padrao: int = CODIGO_DESCONHECIDO) -> pd.Series:
+    """Converte uma coluna numérica inteira para ``dtype`` (nulos viram ``padrao``)."""
+    return pd.to_numeric(valores, errors='coerce').fillna(padrao).astype(dtype)
+
+
+def encode_gold_codes(df: pd.DataFrame, mapeamentos: dict = None) -> pd.DataFrame:
+    """Monta a Gold compacta: colunas renomeadas, códigos inteiros pequenos e texto como categoria.
+
+    Os rótulos ficam na dimensão ``dim_rotulos`` (ver ``build_label_dimension``)
+    e são aplicados apenas na exibição.
+    """
+    mapeamentos = MAPEAMENTOS_GOLD if mapeamentos is None else mapeamentos
+    df_gold = df.rename(columns=COLUNAS_GOLD)
+    for coluna, mapeamento in mapeamentos.items():
+        if coluna in df_gold.columns:
+            df_gold[coluna] = encode_codes(df_gold[coluna], mapeamento)
+    for coluna, dtype in TIPOS_INTEIROS_GOLD.items():
+        if coluna in df_gold.columns:
+            df_gold[coluna] = downcast_integers(df_gold[coluna], dtype)
+    for coluna, dtype in TIPOS_DECIMAIS_GOLD.items():
+        if coluna in df_gold.columns:
+            df_gold[coluna] = pd.to_numeric(df_gold[coluna], errors='coerce').astype(dtype)
+    for coluna in COLUNAS_TEXTO_GOLD:
+        if coluna in df_gold.columns:
+            df_gold[coluna] = df_gold[coluna].astype('category')
+    return df_gold
+
+
+def build_label_dimension(mapeamentos: dict = None) -> pd.DataFrame:
+    """Dimensão de rótulos ``(coluna, codigo, rotulo)`` de todas as colunas codificadas da Gold."""
+    mapeamentos = {**MAPEAMENTOS_GOLD, **ROTULOS_EXTRAS} if mapeamentos is None else mapeamentos
+    linhas = []
+    for coluna, mapeamento in mapeamentos.items():
+        linhas.extend((coluna, codigo, rotulo) for codigo, rotulo in mapeamento.items())
+        linhas.append((coluna, CODIGO_DESCONHECIDO, DESCONHECIDO))
+    dim = pd.DataFrame(linhas, columns=['coluna', 'codigo', 'rotulo'])
+    dim['codigo'] = dim['codigo'].astype('int16')
+    return dim
@@ -0,0 +1,57 @@
+"""Versão dos dados carregados no RDS.
+
+A carga Gold -> RDS grava em ``questionario_covid_versao`` uma versão nova a
+cada carga. O dashboard usa essa versão como parte da chave do cache (ver
+``dashboard.cache``): quando o ETL carrega dados novos, a chave muda e o
+cache é invalidado sozinho.
+"""
+
+import datetime
+import uuid
+
+from sqlalchemy import text
+
+from pipeline.consultas import TABELA_QUESTIONARIO
+
+TABELA_VERSAO = 'questionario_covid_versao'
+
+
+def write_data_version(engine, linhas: int, tabela: str = TABELA_QUESTIONARIO) -> str:
+    """Registra uma nova versão para ``tabela``; chamado pelo ETL após a carga."""
+    versao = f"{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:8]}"
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {TABELA_VERSAO} (
+                tabela TEXT PRIMARY KEY,
+                versao TEXT NOT NULL,
+                linhas BIGINT,
+                carregado_em TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """))
+        conn.execute(text(f"""
+            INSERT INTO {TABELA_VERSAO} (tabela, versao, linhas, carregado_em)
+            VALUES (:tabela, :versao, :linhas, now())
+            ON CONFLICT (tabela) DO UPDATE
+            SET versao = EXCLUDED.versao, linhas = EXCLUDED.linhas, carregado_em = EXCLUDED.carregado_em
+        """), {'tabela': tabela, 'versao': versao, 'linhas': int(linhas)})
+    return versao
+
+
+def read_data_version(conn, tabela: str = TABELA_QUESTIONARIO) -> str:
+    """Retorna a versão atual de ``tabela``.
+
+    Se a tabela de versões ainda não existir (carga antiga, anterior a este
+    controle), usa a contagem de linhas como impressão digital.
+    """
+    try:
+        resultado = conn.execute(
+            text(f"SELECT versao FROM {TABELA_VERSAO} WHERE tabela = :tabela"), {'tabela': tabela}
+        ).fetchone()
+        if resultado is not None:
+            return resultado[0]
+    except Exception:
+        # Transação abortada pelo erro precisa ser desfeita antes da próxima consulta
+        conn.rollback()
+
+    linhas = conn.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+    return f"linhas_{linhas}"
@@ -0,0 +1,71 @@
+
+import os
+
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+from moto import mock_aws
+
+from pipeline.mapeamentos import MAPEAMENTOS_GOLD
+
+BUCKET = 'bkt-teste'
+TABELA_TESTE = 'pnad_covid_teste'
+
+
+@pytest.fixture(autouse=True)
+def _credenciais_falsas(monkeypatch):
+    """Garante que nenhum teste use credenciais reais da AWS."""
+    for variavel in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(variavel, 'teste')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        cliente = boto3.client('s3', region_name='us-east-1')
+        cliente.create_bucket(Bucket=BUCKET)
+        yield cliente
+
+
+def listar(s3_client, prefixo: str) -> list:
+    """Todas as chaves sob ``prefixo`` (com paginação)."""
+    paginas = s3_client.get_paginator('list_objects_v2').paginate(Bucket=BUCKET, Prefix=prefixo)
+    return sorted(obj['Key'] for pagina in paginas for obj in pagina.get('Contents', []))
+
+
+def microdados(linhas: int = 10, inicio: int = 0) -> pd.DataFrame:
+    """Lote pequeno no formato da Raw (ano, UF, mês e um valor por linha)."""
+    return pd.DataFrame({
+        'Ano': [2020] * linhas,
+        'UF': [35] * linhas,
+        'V1013': [9] * linhas,
+        'valor': range(inicio, inicio + linhas),
+    })
+
+
+def respostas(linhas: int = 300, semente: int = 0) -> pd.DataFrame:
+    """Questionário com os nomes da Gold e os códigos como vêm da Silver: ``float`` com nulos e códigos fora do dicionário (9)."""
+    rng = np.random.default_rng(semente)
+    colunas = {coluna: list(mapeamento) for coluna, mapeamento in MAPEAMENTOS_GOLD.items()}
+    colunas['modaria'] = [1, 2, 3, 4, 5, 6]
+    dados = {coluna: rng.choice(np.array(codigos + [9, np.nan], dtype='float64'), linhas)
+             for coluna, codigos in colunas.items()}
+    dados['idade'] = rng.choice(np.r_[np.arange(0, 100), np.nan], linhas)
+    return pd.DataFrame(dados)
+
+
+@pytest.fixture
+def engine():
+    """Postgres de teste (``TESTE_POSTGRES_URL``); sem ele, os testes que precisam de ``COPY`` são pulados."""
+    from sqlalchemy import create_engine, text
+
+    url = os.getenv('TESTE_POSTGRES_URL')
+    if not url:
+        pytest.skip('TESTE_POSTGRES_URL não definida')
+    motor = create_engine(url)
+    yield motor
+    with motor.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABELA_TESTE}"))
+    motor.dispose()
@@ -0,0 +1,125 @@
+from io import BytesIO
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from pipeline import camadas
+from pipeline.s3 import commit_layer, load_layer_manifest, read_parquet_from_s3
+from tests.conftest import BUCKET, listar, microdados
+
+
+def test_camada_vazia_nao_apaga_destino(s3_client):
+    with camadas.LayerWriter(s3_client, BUCKET, 'bronze') as writer:
+        writer.write(microdados())
+    vigente = load_layer_manifest(s3_client, BUCKET, 'bronze')
+    objetos = listar(s3_client, 'bronze/')
+
+    # Raw inexistente: a etapa falha e a Bronze publicada continua intacta
+    with pytest.raises(ValueError, match='Nenhum dado para processar'):
+        camadas.run_bronze(s3_client, BUCKET, 'raw', 'bronze')
+
+    assert load_layer_manifest(s3_client, BUCKET, 'bronze') == vigente
+    assert listar(s3_client, 'bronze/') == objetos
+
+
+def test_writer_sem_linhas_nao_publica(s3_client):
+    with camadas.LayerWriter(s3_client, BUCKET, 'gold') as writer:
+        writer.write(microdados())
+    vigente = load_layer_manifest(s3_client, BUCKET, 'gold')
+
+    with camadas.LayerWriter(s3_client, BUCKET, 'gold') as writer:
+        writer.write(microdados(0))
+
+    assert writer.keys == []
+    assert load_layer_manifest(s3_client, BUCKET, 'gold') == vigente
+
+
+def test_commit_layer_recusa_lista_vazia(s3_client):
+    with pytest.raises(ValueError):
+        commit_layer(s3_client, BUCKET, 'silver', [], 'execucao')
+    assert load_layer_manifest(s3_client, BUCKET, 'silver') is None
+
+
+def test_ordenacao_por_row_group_sem_acumular_o_arquivo(s3_client):
+    # UFs em ordem decrescente, em lotes de 30 linhas
+    lotes = [microdados(30, inicio=30 * i).assign(UF=lambda df: 50 - df['valor'] // 10) for i in range(4)]
+    with camadas.LayerWriter(s3_client, BUCKET, 'gold', rows_per_file=1000, row_group_size=40,
+                             ordenar_por=camadas.ORDENACAO) as writer:
+        for lote in lotes:
+            writer.write(lote)
+            # Nunca mais de um row group pendente (mais o lote que acabou de chegar)
+            assert writer._linhas_pendentes < writer.row_group_size
+
+    chave, = load_layer_manifest(s3_client, BUCKET, 'gold')['arquivos']
+    arquivo = pq.ParquetFile(BytesIO(s3_client.get_object(Bucket=BUCKET, Key=chave)['Body'].read()))
+    assert [arquivo.metadata.row_group(i).num_rows for i in range(arquivo.num_row_groups)] == [40, 40, 40]
+    for i in range(arquivo.num_row_groups):
+        ufs = arquivo.read_row_group(i, columns=['UF'])['UF'].to_pylist()
+        assert ufs == sorted(ufs)
+
+
+def test_camada_particionada_mantem_colunas_de_particao(s3_client):
+    lote = pd.concat([microdados(3).assign(V1013=7), microdados(2, inicio=3)], ignore_index=True)
+    with camadas.LayerWriter(s3_client, BUCKET, 'raw', particionar_por=camadas.PARTICOES) as writer:
+        writer.write(lote)
+
+    manifesto = load_layer_manifest(s3_client, BUCKET, 'raw')
+    assert manifesto['arquivos'] == [
+        f"raw/Ano=2020/V1013=7/{writer.execucao}/part-0000.parquet",
+        f"raw/Ano=2020/V1013=9/{writer.execucao}/part-0001.parquet",
+    ]
+    assert {pid: (registro['valores'], registro['linhas']) for pid, registro in manifesto['particoes'].items()} == {
+        'ano=2020/v1013=7': ([2020, 7], 3), 'ano=2020/v1013=9': ([2020, 9], 2)}
+
+    # As colunas de partição continuam dentro dos arquivos, com o tipo original
+    lido = read_parquet_from_s3(s3_client, BUCKET, 'raw')
+    pd.testing.assert_frame_equal(lido, lote)
+
+
+def test_gravacao_incremental_e_completa_no_mesmo_manifesto(s3_client):
+    def gravar(meses, **opcoes):
+        with camadas.LayerWriter(s3_client, BUCKET, 'gold', particionar_por=camadas.PARTICOES, **opcoes) as writer:
+            for mes in meses:
+                writer.write(microdados(2, inicio=10 * mes).assign(V1013=mes))
+        return writer
+
+    gravar([7, 9])
+    julho = camadas.layer_partitions(s3_client, BUCKET, 'gold')['ano=2020/v1013=7']
+
+    # Incremental: só setembro é substituído; julho continua com os mesmos arquivos
+    setembro = gravar([9], incremental=True)
+    particoes = camadas.layer_partitions(s3_client, BUCKET, 'gold')
+    assert particoes['ano=2020/v1013=7'] == julho
+    assert particoes['ano=2020/v1013=9']['arquivos'] == setembro.keys
+    assert listar(s3_client, 'gold/') == sorted(julho['arquivos'] + setembro.keys + ['gold/_current.json'])
+
+    # Completa: substitui a camada inteira
+    agosto = gravar([8])
+    assert list(camadas.layer_partitions(s3_client, BUCKET, 'gold')) == ['ano=2020/v1013=8']
+    assert listar(s3_client, 'gold/') == agosto.keys + ['gold/_current.json']
+
+
+def test_etapa_reprocessa_so_particoes_alteradas(s3_client):
+    def gravar_raw(meses, **opcoes):
+        with camadas.LayerWriter(s3_client, BUCKET, 'raw', particionar_por=camadas.PARTICOES, **opcoes) as writer:
+            for mes in meses:
+                lote = microdados(4, inicio=10 * mes).assign(V1013=mes)
+                writer.write(pd.concat([lote, lote.head(1)]))
+
+    gravar_raw([7, 9])
+    resumo = camadas.run_bronze(s3_client, BUCKET, 'raw', 'bronze', codigo='v1')
+    assert resumo['particoes'] == ['ano=2020/v1013=7', 'ano=2020/v1013=9']
+    assert resumo['linhas_saida'] == 8
+    julho = camadas.layer_partitions(s3_client, BUCKET, 'bronze')['ano=2020/v1013=7']
+
+    # Nada mudou na Raw: a Bronze fica como está
+    assert camadas.run_bronze(s3_client, BUCKET, 'raw', 'bronze', codigo='v1')['particoes'] == []
+
+    # Só setembro regravado na Raw: só setembro é refeito
+    gravar_raw([9], incremental=True)
+    assert camadas.run_bronze(s3_client, BUCKET, 'raw', 'bronze', codigo='v1')['particoes'] == ['ano=2020/v1013=9']
+    assert camadas.layer_partitions(s3_client, BUCKET, 'bronze')['ano=2020/v1013=7'] == julho
+
+    # Código novo refaz todas as partições
+    assert len(camadas.run_bronze(s3_client, BUCKET, 'raw', 'bronze', codigo='v2')['particoes']) == 2
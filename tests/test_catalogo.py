@@ -0,0 +1,117 @@
+import boto3
+import pyarrow as pa
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from pipeline import catalogo
+
+DATABASE = 'pnad_covid'
+ESQUEMA = pa.schema([('uf', pa.int8()), ('peso', pa.float64()), ('sexo', pa.dictionary(pa.int8(), pa.string()))])
+
+
+@pytest.fixture
+def glue_client():
+    with mock_aws():
+        cliente = boto3.client('glue', region_name='us-east-1')
+        cliente.create_database(DatabaseInput={'Name': DATABASE})
+        cliente.create_crawler(Name='crawler_gold', Role='role', DatabaseName=DATABASE,
+                               Targets={'S3Targets': [{'Path': 's3://bkt-teste/gold/'}]})
+        yield cliente
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio falso: ``time.sleep`` só avança ``time.monotonic`` e registra as esperas."""
+    agora, esperas = [0.0], []
+
+    def dormir(segundos):
+        esperas.append(segundos)
+        agora[0] += segundos
+
+    monkeypatch.setattr(catalogo.time, 'sleep', dormir)
+    monkeypatch.setattr(catalogo.time, 'monotonic', lambda: agora[0])
+    return esperas
+
+
+def particoes(glue_client, tabela):
+    paginas = glue_client.get_paginator('get_partitions').paginate(DatabaseName=DATABASE, TableName=tabela)
+    return sorted((p['Values'], p['StorageDescriptor']['Location']) for pagina in paginas for p in pagina['Partitions'])
+
+
+def test_registra_tabela_e_particoes(glue_client):
+    resultado = catalogo.register_layer(glue_client, DATABASE, 'bkt-teste', 'gold/', ESQUEMA,
+                                        valores_particoes=[(2020, 9), (2020, 7)])
+    assert resultado == {'tabela': 'gold', 'situacao': 'criada', 'particoes_novas': 2}
+
+    tabela = glue_client.get_table(DatabaseName=DATABASE, Name='gold')['Table']
+    assert tabela['StorageDescriptor']['Location'] == 's3://bkt-teste/gold/'
+    assert tabela['StorageDescriptor']['Columns'] == [
+        {'Name': 'uf', 'Type': 'tinyint'}, {'Name': 'peso', 'Type': 'double'}, {'Name': 'sexo', 'Type': 'string'}]
+    assert [chave['Name'] for chave in tabela['PartitionKeys']] == ['ano', 'mes_pesquisa']
+    assert particoes(glue_client, 'gold') == [
+        (['2020', '7'], 's3://bkt-teste/gold/ano=2020/mes_pesquisa=7/'),
+        (['2020', '9'], 's3://bkt-teste/gold/ano=2020/mes_pesquisa=9/'),
+    ]
+
+    # Repetir não duplica nada; só a partição nova é criada
+    resultado = catalogo.register_layer(glue_client, DATABASE, 'bkt-teste', 'gold/', ESQUEMA,
+                                        valores_particoes=[(2020, 9), (2020, 10)])
+    assert resultado['situacao'] == 'inalterada'
+    assert resultado['particoes_novas'] == 1
+    assert len(particoes(glue_client, 'gold')) == 3
+
+
+def test_esquema_alterado_atualiza_tabela(glue_client):
+    catalogo.register_layer(glue_client, DATABASE, 'bkt-teste', 'gold/', ESQUEMA, valores_particoes=[])
+    novo = ESQUEMA.append(pa.field('idade', pa.int16()))
+
+    assert catalogo.register_layer(glue_client, DATABASE, 'bkt-teste', 'gold/', novo,
+                                   valores_particoes=[])['situacao'] == 'atualizada'
+    colunas = glue_client.get_table(DatabaseName=DATABASE, Name='gold')['Table']['StorageDescriptor']['Columns']
+    assert colunas[-1] == {'Name': 'idade', 'Type': 'smallint'}
+
+
+def test_particoes_em_lotes(glue_client):
+    valores = [(ano, mes) for ano in range(2000, 2020) for mes in range(1, 13)]
+    catalogo.register_table(glue_client, DATABASE, 'gold', 's3://bkt-teste/gold/', ESQUEMA, catalogo.PARTICOES_GLUE)
+
+    assert catalogo.register_partitions(glue_client, DATABASE, 'gold', 's3://bkt-teste/gold/', ESQUEMA,
+                                        valores) == len(valores)
+    assert len(particoes(glue_client, 'gold')) == len(valores)
+
+
+def test_crawler_com_espera_exponencial(glue_client, relogio, monkeypatch):
+    def dormir_e_terminar(segundos):
+        relogio.append(segundos)
+        if len(relogio) == 4:
+            # Recriar o crawler o devolve ao estado READY
+            glue_client.delete_crawler(Name='crawler_gold')
+            glue_client.create_crawler(Name='crawler_gold', Role='role', DatabaseName=DATABASE,
+                                       Targets={'S3Targets': [{'Path': 's3://bkt-teste/gold/'}]})
+
+    monkeypatch.setattr(catalogo.time, 'sleep', dormir_e_terminar)
+    catalogo.run_crawler_and_wait(glue_client, 'crawler_gold', espera_inicial=5, espera_maxima=30)
+    assert relogio == [5, 10, 20, 30]
+
+
+def test_crawler_tempo_limite(glue_client, relogio):
+    with pytest.raises(TimeoutError):
+        catalogo.run_crawler_and_wait(glue_client, 'crawler_gold', espera_inicial=5, espera_maxima=60,
+                                      tempo_limite=100)
+    assert relogio == [5, 10, 20, 40, 60]
+
+
+def test_falha_no_glue_usa_crawler(glue_client, relogio, monkeypatch):
+    chamados = []
+    monkeypatch.setattr(catalogo, 'run_crawler_and_wait', lambda cliente, nome: chamados.append(nome))
+
+    # Banco inexistente: a API do Glue falha e o crawler é o plano B
+    resultado = catalogo.publish_layer(glue_client, 'inexistente', 'bkt-teste', 'gold/', ESQUEMA,
+                                       valores_particoes=[(2020, 9)], crawler_name='crawler_gold')
+    assert resultado['situacao'] == 'crawler'
+    assert chamados == ['crawler_gold']
+
+    # Sem crawler configurado, o erro é propagado
+    with pytest.raises(ClientError):
+        catalogo.publish_layer(glue_client, 'inexistente', 'bkt-teste', 'gold/', ESQUEMA)
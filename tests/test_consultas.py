@@ -0,0 +1,52 @@
+import duckdb
+import pandas as pd
+
+from pipeline.consultas import (COLUNAS_SINTOMAS, COLUNAS_TESTES, DIMENSOES, NOMES_SINTOMAS, NOMES_TESTES,
+                                build_distribution_query, to_distributions)
+from pipeline.mapeamentos import MAPEAMENTO_MORADIA, MAPEAMENTOS_GOLD
+from pipeline.transformacoes import encode_gold_codes
+from tests.conftest import respostas
+
+
+def percentuais_da_pagina(bruto: pd.DataFrame) -> dict:
+    """Os ``value_counts``/``apply`` que ``pages/2_analises.py`` fazia sobre todas as linhas rotuladas."""
+    df = bruto.copy()
+    for coluna, mapeamento in MAPEAMENTOS_GOLD.items():
+        df[coluna] = df[coluna].map(mapeamento).fillna('Desconhecido')
+    df['moradia'] = df['modaria'].map(MAPEAMENTO_MORADIA).fillna('Desconhecido')
+    df['sintoma_semana_anterior'] = df[COLUNAS_SINTOMAS].apply(lambda x: 1 if 'Sim' in x.values else 0, axis=1)
+    df_filtrado = df[df['sintoma_semana_anterior'] == 1].copy()
+
+    percentuais = {'total': len(df_filtrado)}
+    for dimensao in DIMENSOES + ['moradia']:
+        percentuais[dimensao] = df_filtrado[dimensao].value_counts(normalize=True) * 100
+
+    contagem_sintomas = df_filtrado[COLUNAS_SINTOMAS].apply(lambda x: (x == 'Sim').sum())
+    percentuais['sintomas'] = (contagem_sintomas / contagem_sintomas.sum() * 100).rename(NOMES_SINTOMAS)
+    contagem_testes = df_filtrado[COLUNAS_TESTES].apply(lambda x: (x == 'Positivo').sum())
+    percentuais['testes'] = (contagem_testes / contagem_testes.sum() * 100).rename(NOMES_TESTES)
+
+    bins = [0, 10, 20, 30, 40, 50, 60, 70, 120]
+    labels = ['0-10', '11-20', '21-30', '31-40', '41-50', '51-60', '61-70', '71+']
+    df_filtrado['faixa_etaria'] = pd.cut(df_filtrado['idade'], bins=bins, labels=labels, right=True, include_lowest=True)
+    faixas = df_filtrado['faixa_etaria'].value_counts(normalize=True) * 100
+    # O value_counts de uma categórica lista também as faixas vazias, que a consulta não devolve
+    percentuais['faixa_etaria'] = faixas[faixas > 0]
+    return percentuais
+
+
+def test_distribuicoes_iguais_as_da_pagina_original():
+    bruto = respostas()
+    con = duckdb.connect()
+    con.register('gold', encode_gold_codes(bruto))
+    distribuicoes = to_distributions(con.execute(build_distribution_query('gold')).df())
+
+    esperadas = percentuais_da_pagina(bruto)
+    assert distribuicoes['total'] == esperadas.pop('total') > 0
+    assert set(distribuicoes) - {'total'} == set(esperadas)
+    for dimensao, esperada in esperadas.items():
+        serie = distribuicoes[dimensao]
+        # Mesmos percentuais por rótulo (empates podem sair em outra ordem), em ordem decrescente
+        assert serie.is_monotonic_decreasing, dimensao
+        pd.testing.assert_series_equal(serie.sort_index(), esperada.set_axis(esperada.index.astype(str)).sort_index(),
+                                       check_names=False, check_index_type=False)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.cruzamentos import RECORTES, CrossTabs, categories, chi_square
+from pipeline.mapeamentos import COLUNAS_SINTOMAS_PRINCIPAIS, DESCONHECIDO, MAPEAMENTOS_GOLD
+
+# Tabela 2x3 (sem correção de Yates) e os valores de scipy.stats.chi2_contingency / contingency.association
+TABELA = np.array([[10, 20, 30], [20, 20, 10]], dtype='float64')
+QUI2 = 12.52777777777778
+V_CRAMER = 0.3374742788552765
+ESPERADO = np.array([[16.36363636, 21.81818182, 21.81818182], [13.63636364, 18.18181818, 18.18181818]])
+
+
+def gold() -> pd.DataFrame:
+    """Linhas da Gold com nulos e códigos fora do dicionário (9 -> Desconhecido)."""
+    df = pd.DataFrame({
+        'sexo': [1, 2, 1, 2, None, 9, 1, 2, 1, 2],
+        'cor': [1, 4, 4, 9, 1, 2, None, 4, 4, 1],
+        'peso': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, -1.0, 90.0, 100.0],
+    })
+    for coluna in COLUNAS_SINTOMAS_PRINCIPAIS:
+        df[coluna] = 2
+    df.loc[[1, 2, 5, 8], 'tosse_semana_anterior'] = 1
+    return df
+
+
+def rotulos(df: pd.DataFrame, dimensao: str) -> pd.Series:
+    return df[dimensao].map(MAPEAMENTOS_GOLD[dimensao]).fillna(DESCONHECIDO).rename(dimensao)
+
+
+def esperada(df: pd.DataFrame, **opcoes) -> pd.DataFrame:
+    tabela = pd.crosstab(rotulos(df, 'sexo'), rotulos(df, 'cor'), **opcoes)
+    return tabela.reindex(index=categories('sexo'), columns=categories('cor'), fill_value=0)
+
+
+@pytest.mark.parametrize('recorte', ['todos', 'com_sintomas'])
+def test_contagens_iguais_ao_crosstab(recorte):
+    df = gold()
+    # Dois lotes e blocos de 3 linhas: várias multiplicações somadas
+    cruzamentos = CrossTabs.build([df.iloc[:6], df.iloc[6:]], dimensoes=['sexo', 'cor'], linhas_por_bloco=3)
+    if recorte == 'com_sintomas':
+        df = df[df['tosse_semana_anterior'] == 1]
+
+    contagens = cruzamentos.table('sexo', 'cor', recorte, incluir_desconhecido=True)
+    np.testing.assert_array_equal(contagens.to_numpy(), esperada(df).to_numpy())
+
+    # Peso inválido (-1) conta na amostra, mas não na população
+    pesos = cruzamentos.table('sexo', 'cor', recorte, ponderado=True, incluir_desconhecido=True)
+    peso = df['peso'].where(df['peso'] > 0, 0.0)
+    np.testing.assert_allclose(pesos.to_numpy(), esperada(df, values=peso, aggfunc='sum').fillna(0).to_numpy())
+
+    # A diagonal guarda a distribuição de cada dimensão
+    distribuicao = np.diag(cruzamentos.contagens[RECORTES.index(recorte), 0, 0])[:len(categories('sexo'))]
+    np.testing.assert_array_equal(distribuicao, esperada(df).sum(axis=1).to_numpy())
+
+
+def test_qui_quadrado_igual_ao_scipy():
+    qui2, gl, v, esperado = chi_square(TABELA)
+    assert qui2 == pytest.approx(QUI2)
+    assert gl == 2
+    assert v == pytest.approx(V_CRAMER)
+    np.testing.assert_allclose(esperado, ESPERADO, rtol=1e-8)
+
+    # Várias tabelas de uma vez; linha vazia fica fora dos graus de liberdade e a tabela de uma linha só não tem V
+    vazia = np.vstack([TABELA, np.zeros((1, 3))])
+    qui2, gl, v, _ = chi_square(np.stack([vazia, np.vstack([TABELA[:1], np.zeros((2, 3))])]))
+    assert qui2[0] == pytest.approx(QUI2)
+    assert gl.tolist() == [2, 0]
+    assert v[0] == pytest.approx(V_CRAMER)
+    assert np.isnan(v[1])
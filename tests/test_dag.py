@@ -0,0 +1,61 @@
+import threading
+
+from pipeline import dag, execucao, metricas
+from tests.conftest import BUCKET
+
+
+def tarefa(nome: str) -> dag.Tarefa:
+    return next(tarefa for tarefa in execucao.build_tasks() if tarefa.nome == nome)
+
+
+def arquivos(nome: str) -> set:
+    return {caminho.relative_to(dag.RAIZ).as_posix() for caminho in dag.source_files(tarefa(nome).modulos)}
+
+
+def test_versao_do_codigo_inclui_os_modulos_do_dashboard():
+    assert {'dashboard/artefatos.py', 'dashboard/graficos.py', 'pipeline/consultas.py'} <= arquivos('artefatos')
+    assert {'dashboard/cruzamentos.py', 'pipeline/camadas.py'} <= arquivos('cruzamentos')
+    assert not any(caminho.startswith('dashboard/') for caminho in arquivos('gold'))
+
+
+def test_mudar_um_modulo_refaz_so_as_tarefas_que_o_executam(tmp_path, monkeypatch):
+    pacote = tmp_path / 'pacote'
+    pacote.mkdir()
+    (pacote / '__init__.py').write_text('')
+    (pacote / 'regras.py').write_text('LIMITE = 1\n')
+    (pacote / 'etapa.py').write_text('def executar():\n    from pacote.regras import LIMITE\n')
+    monkeypatch.setattr(dag, 'RAIZ', tmp_path)
+
+    usa = dag.Tarefa('usa', print, modulos=('pacote.etapa',))
+    nao_usa = dag.Tarefa('nao_usa', print)
+    antes = dag.fingerprints([usa, nao_usa], None)
+
+    # Import dentro da função também conta
+    (pacote / 'regras.py').write_text('LIMITE = 2\n')
+    depois = dag.fingerprints([usa, nao_usa], None)
+    assert depois['usa'] != antes['usa']
+    assert depois['nao_usa'] == antes['nao_usa']
+
+
+def test_run_dag_mede_cada_tarefa_no_relatorio(s3_client, tmp_path):
+    relatorio = metricas.RunReport('teste', diretorio=tmp_path)
+    relatorio.instrument_s3(s3_client)
+    # As duas tarefas só terminam juntas: garante que rodam ao mesmo tempo
+    juntas = threading.Barrier(2, timeout=10)
+
+    def gravar(quantas):
+        def funcao(contexto):
+            juntas.wait()
+            for i in range(quantas):
+                s3_client.put_object(Bucket=BUCKET, Key=f'{quantas}/{i}', Body=b'x')
+            return {'linhas_entrada': quantas, 'linhas_saida': quantas}
+        return funcao
+
+    tarefas = [dag.Tarefa('uma', gravar(1)), dag.Tarefa('tres', gravar(3))]
+    dag.run_dag(tarefas, None, max_workers=2, relatorio=relatorio)
+
+    etapas = {etapa.nome: etapa for etapa in relatorio.etapas}
+    assert etapas['uma'].chamadas_s3 == {'PutObject': 1}
+    assert etapas['tres'].chamadas_s3 == {'PutObject': 3}
+    assert etapas['tres'].bytes_gravados == 3
+    assert (etapas['tres'].linhas_entrada, etapas['tres'].linhas_saida) == (3, 3)
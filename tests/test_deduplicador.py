@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.camadas import RowDeduplicator
+
+
+def test_duplicada_entre_lotes_e_removida():
+    deduplicador = RowDeduplicator()
+    lote1 = pd.DataFrame({'a': [3, 1, 3, 2], 'b': ['x', 'y', 'x', 'z']})
+    lote2 = pd.DataFrame({'a': [2, 4, 1, 4], 'b': ['z', 'w', 'y', 'w']}, index=[10, 11, 12, 13])
+
+    # Dentro do lote fica a primeira ocorrência, na ordem original
+    assert deduplicador.filter(lote1).index.tolist() == [0, 1, 3]
+    # (2, z) e (1, y) já vieram no primeiro lote
+    assert deduplicador.filter(lote2).index.tolist() == [11]
+    assert len(deduplicador) == 4
+    vistos = deduplicador._vistos
+    assert np.all(vistos[1:] > vistos[:-1])
+
+
+def test_muitos_lotes_equivale_a_drop_duplicates():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.integers(0, 50, 5000), 'b': rng.integers(0, 20, 5000)})
+    deduplicador = RowDeduplicator()
+    filtrado = pd.concat([deduplicador.filter(df.iloc[i:i + 700]) for i in range(0, len(df), 700)])
+    pd.testing.assert_frame_equal(filtrado, df.drop_duplicates())
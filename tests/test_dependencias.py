@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+def test_etl_nao_importa_streamlit():
+    # Módulos que as tarefas de pipeline.execucao importam (inclusive os importados dentro das funções)
+    codigo = (
+        "import sys\n"
+        "import pipeline.execucao, pipeline.consultas, pipeline.versao\n"
+        "import dashboard.artefatos, dashboard.cruzamentos\n"
+        "assert 'streamlit' not in sys.modules, 'streamlit importado pelo ETL'\n"
+    )
+    subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True)
+
+
+def test_consultas_nao_importa_rds():
+    codigo = (
+        "import sys\n"
+        "import pipeline.consultas\n"
+        "assert 'pipeline.rds' not in sys.modules, 'pipeline.rds importado pelas consultas do dashboard'\n"
+    )
+    subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.esquema import COLUNAS_QUESTIONARIO, check_schema
+from pipeline.mapeamentos import COLUNA_PESO, COLUNAS_TEXTO_GOLD
+
+
+def gold(linhas: int = 3) -> pd.DataFrame:
+    """Lote da Gold no esquema da ``questionario_covid``, com as colunas fora de ordem."""
+    dados = {}
+    for coluna in reversed(COLUNAS_QUESTIONARIO):
+        if coluna in COLUNAS_TEXTO_GOLD:
+            dados[coluna] = pd.Series(['SP'] * linhas, dtype='category')
+        elif coluna == COLUNA_PESO:
+            dados[coluna] = np.full(linhas, 10.5)
+        else:
+            dados[coluna] = np.full(linhas, -1, dtype='int8')
+    return pd.DataFrame(dados)
+
+
+def test_esquema_valido_volta_na_ordem_da_tabela():
+    assert check_schema(gold()).columns.tolist() == COLUNAS_QUESTIONARIO
+
+
+def test_codigo_float_e_rejeitado():
+    df = gold()
+    # Um nulo no meio do código transforma a coluna inteira em float
+    df['sexo'] = [1.0, np.nan, 2.0]
+    with pytest.raises(ValueError, match=r"tipo incompatível: \['sexo \(float64\)'\]"):
+        check_schema(df)
+
+
+def test_colunas_sobrando_ou_faltando_sao_rejeitadas():
+    with pytest.raises(ValueError, match=r"colunas não previstas: \['nova'\]"):
+        check_schema(gold().assign(nova=1))
+    with pytest.raises(ValueError, match=r"colunas faltando: \['idade'\]"):
+        check_schema(gold().drop(columns='idade'))
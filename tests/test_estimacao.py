@@ -0,0 +1,66 @@
+import math
+from statistics import NormalDist
+
+import pandas as pd
+import pytest
+
+from pipeline.estimacao import weighted_estimates
+
+Z = NormalDist().inv_cdf(0.975)
+
+
+def amostra(*pessoas) -> pd.DataFrame:
+    return pd.DataFrame(pessoas, columns=['estrato', 'upa', 'x', 'peso'])
+
+
+# Dois estratos com duas UPAs cada; calculado à mão abaixo
+DOIS_ESTRATOS = [
+    (1, 'a', 1, 10.0), (1, 'a', 2, 10.0), (1, 'b', 1, 20.0),
+    (2, 'c', 1, 5.0), (2, 'd', 2, 15.0), (2, 'd', 2, 5.0),
+]
+
+
+def categoria(estimativas: pd.DataFrame, codigo: int) -> pd.Series:
+    return estimativas.set_index('codigo').loc[codigo]
+
+
+def test_estimativas_calculadas_a_mao():
+    # Linha sem peso (-1 da Bronze) fica de fora
+    df = amostra(*DOIS_ESTRATOS, (2, 'd', 1, -1.0))
+    um = categoria(weighted_estimates(df, ['x']), 1)
+
+    # Y_1 = 10 + 20 + 5 = 35 de Y = 65
+    assert (um['n'], um['total']) == (3, 35.0)
+    assert um['proporcao'] == pytest.approx(7 / 13)
+
+    # Var(Y_1) = Σ n_h/(n_h-1) Σ (y_hi - ȳ_h)²: estrato 1 (10, 20) → 2·50; estrato 2 (5, 0) → 2·12.5
+    ep_total = math.sqrt(125)
+    assert um['total_ep'] == pytest.approx(ep_total)
+    assert um['total_li'] == pytest.approx(35 - Z * ep_total)
+    assert um['total_ls'] == pytest.approx(35 + Z * ep_total)
+
+    # z_hi = (y_hi - p·x_hi) / Y: estrato 1 → (-10/13, 120/13); estrato 2 → (30/13, -140/13)
+    ep_proporcao = math.sqrt((2 * 50 + 2 * 2 * (85 / 13) ** 2) / 65 ** 2)
+    assert um['proporcao_ep'] == pytest.approx(ep_proporcao)
+    assert um['proporcao_li'] == pytest.approx(7 / 13 - Z * ep_proporcao)
+    # O limite superior (7/13 + 1,96·0,25 > 1) é cortado em 1
+    assert 7 / 13 + Z * ep_proporcao > 1
+    assert um['proporcao_ls'] == 1.0
+
+    # Com duas categorias, a proporção complementar tem o mesmo erro padrão
+    dois = categoria(weighted_estimates(df, ['x']), 2)
+    assert dois['proporcao'] == pytest.approx(6 / 13)
+    assert dois['proporcao_ep'] == pytest.approx(ep_proporcao)
+
+
+def test_estrato_com_uma_so_upa_nao_contribui_para_a_variancia():
+    sozinho = (3, 'e', 1, 8.0)
+    um = categoria(weighted_estimates(amostra(*DOIS_ESTRATOS, sozinho), ['x']), 1)
+    assert um['total'] == 43.0
+    assert um['total_ep'] == pytest.approx(math.sqrt(125))
+
+    # Só um estrato com uma UPA: erro padrão zero e intervalo degenerado, sem NaN
+    so_ele = weighted_estimates(amostra(sozinho, (3, 'e', 2, 2.0)), ['x'])
+    assert so_ele['total_ep'].tolist() == [0.0, 0.0]
+    assert so_ele['proporcao_ep'].tolist() == [0.0, 0.0]
+    assert so_ele['total_li'].tolist() == so_ele['total_ls'].tolist() == [8.0, 2.0]
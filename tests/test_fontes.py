@@ -0,0 +1,32 @@
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+
+from pipeline import fontes
+
+ESQUEMA = {'Ano': pa.int16(), 'V1013': pa.int8(), 'A002': pa.int8(), 'V1032': pa.float64()}
+
+
+def zip_de_csvs(*dfs) -> BytesIO:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for i, df in enumerate(dfs):
+            zip_file.writestr(f"PNAD_COVID_{i}.csv", df.to_csv(index=False))
+    buffer.seek(0)
+    return buffer
+
+
+def test_leitura_em_blocos_igual_a_leitura_inteira():
+    julho = pd.DataFrame({'Ano': 2020, 'V1013': 7, 'A002': [i % 100 for i in range(3000)], 'V1032': 1.5})
+    # Agosto sem a coluna A002: vem nula, com o mesmo tipo
+    agosto = pd.DataFrame({'Ano': 2020, 'V1013': 8, 'V1032': [2.5] * 2000})
+    colunas = list(ESQUEMA)
+
+    inteiro = fontes.read_zip_csvs(zip_de_csvs(julho, agosto), ESQUEMA, colunas)
+    lotes = list(fontes.iter_zip_batches(zip_de_csvs(julho, agosto), ESQUEMA, colunas, block_size=4096))
+
+    assert len(lotes) > 2
+    assert all(lote.dtypes.equals(inteiro.dtypes) for lote in lotes)
+    pd.testing.assert_frame_equal(pd.concat(lotes, ignore_index=True), inteiro)
@@ -0,0 +1,100 @@
+import pandas as pd
+from sqlalchemy import text
+
+from pipeline import camadas, incremental
+from tests.conftest import BUCKET, TABELA_TESTE
+
+
+def fontes_falsas(monkeypatch, conteudo: dict) -> list:
+    """Troca a leitura dos ZIPs por ``conteudo`` (``{nome: DataFrame}``) e devolve a lista dos arquivos lidos."""
+    lidos = []
+
+    def ler(arquivo, schema=None):
+        lidos.append(arquivo['name'])
+        df = conteudo[arquivo['name']]
+        # Dois lotes por arquivo, como na leitura em blocos
+        yield df.iloc[:len(df) // 2]
+        yield df.iloc[len(df) // 2:]
+
+    monkeypatch.setattr(incremental.fontes, 'iter_source_batches', ler)
+    return lidos
+
+
+def meses(ano: int, mes: int, linhas: int, inicio: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({'Ano': ano, 'V1013': mes, 'valor': range(inicio, inicio + linhas)})
+
+
+def tabela(engine) -> list:
+    with engine.connect() as conn:
+        return sorted(tuple(linha) for linha in conn.execute(text(f'SELECT "V1013", valor FROM {TABELA_TESTE}')))
+
+
+def ingerir(engine, s3_client, arquivos, **opcoes):
+    return incremental.ingest_sources(engine, s3_client, BUCKET, arquivos, tabela=TABELA_TESTE, schema={}, **opcoes)
+
+
+def test_meses_fora_do_filtro_nao_sao_baixados_de_novo(engine, s3_client, monkeypatch):
+    arquivo = {'name': 'PNAD_COVID_2020.zip', 'sha': 'abc'}
+    df = pd.concat([meses(2020, mes, 2, inicio=10 * mes) for mes in (7, 8, 9)], ignore_index=True)
+    lidos = fontes_falsas(monkeypatch, {arquivo['name']: df})
+
+    assert ingerir(engine, s3_client, [arquivo], meses=[9]) == [(2020, 9)]
+    manifesto = incremental.load_manifest(s3_client, BUCKET)
+    registro = manifesto['arquivos'][arquivo['name']]
+    assert registro['particoes'] == [[2020, 9]]
+    assert registro['ignoradas'] == [[2020, 7], [2020, 8]]
+    setembro = manifesto['particoes']['ano=2020/v1013=9']
+
+    # Com o mesmo filtro, o ZIP não é baixado de novo
+    assert ingerir(engine, s3_client, [arquivo], meses=[9]) == []
+    assert lidos == [arquivo['name']]
+
+    # Ampliando o filtro, só os meses que tinham ficado de fora são carregados
+    assert ingerir(engine, s3_client, [arquivo]) == [(2020, 7), (2020, 8)]
+    assert tabela(engine) == sorted((mes, valor) for mes, valor in zip(df['V1013'], df['valor']))
+    manifesto = incremental.load_manifest(s3_client, BUCKET)
+    assert manifesto['arquivos'][arquivo['name']]['particoes'] == [[2020, 7], [2020, 8], [2020, 9]]
+    assert manifesto['arquivos'][arquivo['name']]['ignoradas'] == []
+    assert manifesto['particoes']['ano=2020/v1013=9'] == setembro
+    assert incremental.pending_sources([arquivo], manifesto) == []
+
+
+def test_arquivo_alterado_substitui_so_os_meses_dele(engine, s3_client, monkeypatch):
+    julho = {'name': 'julho.zip', 'sha': 'a1'}
+    misto = {'name': 'misto.zip', 'sha': 'b1'}
+    conteudo = {julho['name']: meses(2020, 7, 4), misto['name']: pd.concat([meses(2020, 7, 2, inicio=100),
+                                                                          meses(2020, 8, 2, inicio=200)])}
+    lidos = fontes_falsas(monkeypatch, conteudo)
+    ingerir(engine, s3_client, [julho, misto])
+    agosto = incremental.load_manifest(s3_client, BUCKET)['particoes']['ano=2020/v1013=8']
+
+    # Julho muda: o mês 7 é apagado e reposto com o arquivo novo e as linhas de julho do arquivo inalterado
+    julho = {**julho, 'sha': 'a2'}
+    conteudo[julho['name']] = meses(2020, 7, 3, inicio=50)
+    lidos.clear()
+    assert ingerir(engine, s3_client, [julho, misto]) == [(2020, 7)]
+    assert lidos == [julho['name'], misto['name']]
+    assert tabela(engine) == [(7, 50), (7, 51), (7, 52), (7, 100), (7, 101), (8, 200), (8, 201)]
+
+    particoes = incremental.load_manifest(s3_client, BUCKET)['particoes']
+    assert particoes['ano=2020/v1013=7']['linhas'] == 5
+    assert particoes['ano=2020/v1013=8'] == agosto
+
+
+def test_particoes_desatualizadas():
+    origem = {
+        'ano=2020/v1013=9': {'valores': [2020, 9], 'execucao': 'e2'},
+        'ano=2020/v1013=7': {'valores': [2020, 7], 'execucao': 'e1'},
+        'ano=2020/v1013=8': {'valores': [2020, 8], 'execucao': 'e1'},
+    }
+    destino = {
+        'ano=2020/v1013=7': {'origem': 'e1', 'codigo': 'c1'},
+        'ano=2020/v1013=9': {'origem': 'e1', 'codigo': 'c1'},
+        'ano=2020/v1013=6': {'origem': 'e0', 'codigo': 'c1'},
+    }
+    assert camadas.stale_partitions(origem, destino, 'c1') == (
+        ['ano=2020/v1013=8', 'ano=2020/v1013=9'], {'ano=2020/v1013=6'})
+    # Código novo ou carga completa: todas as partições da origem
+    todas = ['ano=2020/v1013=7', 'ano=2020/v1013=8', 'ano=2020/v1013=9']
+    assert camadas.stale_partitions(origem, destino, 'c2')[0] == todas
+    assert camadas.stale_partitions(origem, destino, 'c1', completo=True)[0] == todas
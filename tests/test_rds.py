@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from pipeline.rds import bulk_load
+from tests.conftest import TABELA_TESTE
+
+
+class CursorFalso:
+    """Guarda os comandos executados; ``fetchall`` devolve os dependentes da tabela de carga."""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, comando, parametros=None):
+        self.conexao.comandos.append(' '.join(comando.split()))
+        if parametros is not None:
+            self.conexao.parametros.append(parametros)
+
+    def copy_expert(self, comando, buffer):
+        if self.conexao.falhar_no_copy:
+            raise RuntimeError('conexão perdida')
+        self.conexao.comandos.append(comando)
+        self.conexao.csv.append(buffer.read())
+
+    def fetchall(self):
+        return self.conexao.dependentes
+
+
+class ConexaoFalsa:
+    def __init__(self, dependentes=(), falhar_no_copy=False):
+        self.dependentes = list(dependentes)
+        self.falhar_no_copy = falhar_no_copy
+        self.comandos, self.parametros, self.csv, self.eventos = [], [], [], []
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.eventos.append('commit')
+
+    def rollback(self):
+        self.eventos.append('rollback')
+
+    def close(self):
+        self.eventos.append('close')
+
+
+class MotorFalso:
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def raw_connection(self):
+        return self.conexao
+
+
+def criar(tabela: str) -> str:
+    return f"CREATE TABLE {tabela} (id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY, a SMALLINT)"
+
+
+def test_bulk_load_carrega_indexa_e_troca_na_mesma_transacao():
+    conexao = ConexaoFalsa(dependentes=[('i', 'tab_carga_pkey'), ('i', 'tab_carga_uf_idx'), ('S', 'tab_carga_id_seq')])
+    lotes = [pd.DataFrame({'a': [1, 2, 3]}), pd.DataFrame({'a': [4]})]
+
+    linhas = bulk_load(MotorFalso(conexao), 'tab', lotes, indices={'uf': '(a)'}, create_sql=criar, chunk_rows=2)
+
+    copy = 'COPY tab_carga ("a") FROM STDIN WITH (FORMAT csv)'
+    assert linhas == 4
+    assert conexao.comandos[:9] == [
+        'DROP TABLE IF EXISTS tab_carga',
+        criar('tab_carga'),
+        copy, copy, copy,
+        'CREATE INDEX tab_carga_uf_idx ON tab_carga (a)',
+        'ANALYZE tab_carga',
+        'DROP TABLE IF EXISTS tab',
+        'ALTER TABLE tab_carga RENAME TO tab',
+    ]
+    assert conexao.comandos[9].startswith('SELECT c.relkind, c.relname FROM pg_class c')
+    assert conexao.parametros == [{'tabela': 'tab', 'prefixo': 'tab_carga%'}]
+    # Índices (inclusive o da chave primária) e a sequência do IDENTITY perdem o sufixo da carga
+    assert conexao.comandos[10:] == [
+        'ALTER INDEX tab_carga_pkey RENAME TO tab_pkey',
+        'ALTER INDEX tab_carga_uf_idx RENAME TO tab_uf_idx',
+        'ALTER SEQUENCE tab_carga_id_seq RENAME TO tab_id_seq',
+    ]
+    assert conexao.csv == ['1\n2\n', '3\n', '4\n']
+    assert conexao.eventos == ['commit', 'close']
+
+
+def test_bulk_load_desfaz_tudo_se_o_copy_falhar():
+    conexao = ConexaoFalsa(falhar_no_copy=True)
+    with pytest.raises(RuntimeError):
+        bulk_load(MotorFalso(conexao), 'tab', pd.DataFrame({'a': [1]}), create_sql=criar)
+    # A tabela definitiva não é tocada
+    assert 'DROP TABLE IF EXISTS tab' not in conexao.comandos
+    assert not any(comando.startswith('ALTER') for comando in conexao.comandos)
+    assert conexao.eventos == ['rollback', 'close']
+
+
+def test_bulk_load_sem_dados():
+    with pytest.raises(ValueError, match='Nenhum dado'):
+        bulk_load(MotorFalso(ConexaoFalsa()), 'tab', iter([]), create_sql=criar)
+
+
+def test_recarga_no_postgres_mantem_os_nomes_dos_indices(engine):
+    for valores in ([1, 2], [3, 4, 5]):
+        bulk_load(engine, TABELA_TESTE, pd.DataFrame({'a': valores}), indices={'a': '(a)'}, create_sql=criar)
+
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT a FROM {TABELA_TESTE} ORDER BY id")).scalars().all() == [3, 4, 5]
+        nomes = conn.execute(text(
+            "SELECT relname FROM pg_class WHERE relname LIKE :prefixo ORDER BY relname"
+        ), {'prefixo': f"{TABELA_TESTE}%"}).scalars().all()
+    assert nomes == [TABELA_TESTE, f"{TABELA_TESTE}_a_idx", f"{TABELA_TESTE}_id_seq", f"{TABELA_TESTE}_pkey"]
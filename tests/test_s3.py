@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from pipeline.s3 import list_parquet_keys, read_parquet_from_s3, split_partition_filters
+from tests.conftest import BUCKET, microdados
+
+
+def gravar(s3_client, key, df):
+    buffer = BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer)
+    s3_client.put_object(Bucket=BUCKET, Key=key, Body=buffer.getvalue())
+
+
+def baixadas(s3_client) -> list:
+    """Registra os arquivos Parquet pedidos em ``GetObject`` pelo cliente."""
+    chaves = []
+
+    def registrar(params, **_):
+        if params['Key'].endswith('.parquet'):
+            chaves.append(params['Key'])
+
+    s3_client.meta.events.register('provide-client-params.s3.GetObject', registrar)
+    return chaves
+
+
+def test_listagem_pagina_alem_de_mil_chaves(s3_client):
+    for i in range(1050):
+        gravar(s3_client, f'raw/part-{i:04d}.parquet', microdados(2, inicio=2 * i))
+
+    assert len(list_parquet_keys(s3_client, BUCKET, 'raw/')) == 1050
+    df = read_parquet_from_s3(s3_client, BUCKET, 'raw/')
+    assert len(df) == 2100
+    assert df['valor'].tolist() == list(range(2100))
+
+
+def test_projecao_e_filtros_no_arquivo(s3_client):
+    gravar(s3_client, 'raw/part-0000.parquet', microdados(10))
+
+    df = read_parquet_from_s3(s3_client, BUCKET, 'raw/', columns=['valor'], filters=[('valor', '>=', 7)])
+    assert list(df.columns) == ['valor']
+    assert df['valor'].tolist() == [7, 8, 9]
+
+
+def test_particoes_fora_do_filtro_nao_sao_baixadas(s3_client):
+    for mes in (7, 8, 9):
+        gravar(s3_client, f'gold/ano=2020/v1013={mes}/part-0000.parquet',
+               microdados(5, inicio=10 * mes).drop(columns='V1013'))
+    pedidas = baixadas(s3_client)
+
+    df = read_parquet_from_s3(s3_client, BUCKET, 'gold/', columns=['v1013', 'valor'],
+                              filters=[('v1013', 'in', [8, 9]), ('valor', '<', 92)])
+    assert sorted(pedidas) == ['gold/ano=2020/v1013=8/part-0000.parquet',
+                               'gold/ano=2020/v1013=9/part-0000.parquet']
+    assert df['v1013'].tolist() == [8] * 5 + [9] * 2
+    assert df['valor'].tolist() == [80, 81, 82, 83, 84, 90, 91]
+
+
+def test_filtro_em_disjuncao():
+    particoes = {'ano': 2020, 'v1013': 9}
+    assert split_partition_filters(particoes, [('v1013', '=', 7)]) == (False, None)
+    assert split_partition_filters(particoes, [('v1013', '=', 9)]) == (True, None)
+    assert split_partition_filters(particoes, [[('v1013', '=', 7)], [('valor', '>', 1)]]) == \
+        (True, [[('valor', '>', 1)]])
+
+
+def test_prefixo_vazio_retorna_vazio(s3_client):
+    assert read_parquet_from_s3(s3_client, BUCKET, 'raw/').empty
+
+
+def test_erro_de_leitura_propaga(s3_client):
+    s3_client.put_object(Bucket=BUCKET, Key='raw/part-0000.parquet', Body=b'nao e parquet')
+
+    with pytest.raises(pa.ArrowInvalid):
+        read_parquet_from_s3(s3_client, BUCKET, 'raw/')
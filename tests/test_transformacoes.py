@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.mapeamentos import (COLUNAS_GOLD, COLUNAS_SINTOMAS_PRINCIPAIS, MAPEAMENTO_FAIXA_SALARIAL,
+                                  MAPEAMENTO_MORADIA, MAPEAMENTOS_GOLD)
+from pipeline.transformacoes import any_equals, apply_gold_mappings, encode_codes, encode_gold_codes, map_codes
+from tests.conftest import respostas
+
+# Nulo, código fora do dicionário (9), float e inteiro
+CODIGOS = pd.Series([1, 2, None, 9, 2.0, 1, 3], name='sexo')
+
+
+def silver() -> pd.DataFrame:
+    """``respostas`` com os nomes de coluna da Silver."""
+    return respostas().rename(columns={gold: silver for silver, gold in COLUNAS_GOLD.items()})
+
+
+def test_map_codes_igual_ao_map_fillna():
+    for mapeamento in (MAPEAMENTOS_GOLD['sexo'], MAPEAMENTO_MORADIA, MAPEAMENTO_FAIXA_SALARIAL):
+        esperado = CODIGOS.map(mapeamento).fillna('Desconhecido')
+        assert map_codes(CODIGOS, mapeamento).astype(object).tolist() == esperado.tolist()
+
+    # O apply da situação escolar
+    esperado = CODIGOS.apply(lambda x: 'Sim' if x == 1 else 'Não' if x == 2 else 'Desconhecido')
+    assert map_codes(CODIGOS, {1: 'Sim', 2: 'Não'}).astype(object).tolist() == esperado.tolist()
+
+
+def test_apply_gold_mappings_igual_ao_notebook_original():
+    df_silver = silver()
+    esperado = df_silver.rename(columns=COLUNAS_GOLD)
+    for coluna, mapeamento in MAPEAMENTOS_GOLD.items():
+        esperado[coluna] = esperado[coluna].map(mapeamento).fillna('Desconhecido')
+
+    df_gold = apply_gold_mappings(df_silver)
+    pd.testing.assert_frame_equal(df_gold.astype(object), esperado.astype(object))
+
+
+def test_any_equals_igual_ao_apply_por_linha():
+    df = apply_gold_mappings(silver())
+    esperado = df[COLUNAS_SINTOMAS_PRINCIPAIS].apply(lambda x: 1 if 'Sim' in x.values else 0, axis=1)
+    np.testing.assert_array_equal(any_equals(df, COLUNAS_SINTOMAS_PRINCIPAIS, 'Sim'), esperado.to_numpy() == 1)
+
+
+def test_encode_codes_mantem_o_dicionario_e_o_resto_vira_menos_um():
+    codigos = encode_codes(CODIGOS, MAPEAMENTOS_GOLD['sexo'])
+    assert codigos.dtype == 'int8'
+    assert codigos.tolist() == [1, 2, -1, -1, 2, 1, -1]
+
+
+def test_gold_codificada_traduzida_na_borda_igual_a_gold_com_rotulos():
+    # Gold compacta + tradução na exibição == Gold antiga, que já guardava os rótulos
+    df_silver = silver()
+    rotulada = apply_gold_mappings(encode_gold_codes(df_silver))
+    for coluna in MAPEAMENTOS_GOLD:
+        esperado = df_silver.rename(columns=COLUNAS_GOLD)[coluna].map(MAPEAMENTOS_GOLD[coluna]).fillna('Desconhecido')
+        assert rotulada[coluna].astype(object).tolist() == esperado.tolist(), coluna